@@ -31,7 +31,8 @@ setup(name='robotframework-imagehorizonlibrary',
       license='MIT',
       install_requires=[
           'robotframework>=2.8',
-          'pyautogui>=0.9.30'
+          'pyautogui>=0.9.30',
+          'pillow'
       ],
       packages=[
           'ImageHorizonLibrary',
@@ -4,12 +4,6 @@ from contextlib import contextmanager
 
 from .errors import *    # import errors before checking dependencies!
 
-try:
-    import pyautogui as ag
-except ImportError:
-    raise ImageHorizonLibraryError('There is something wrong pyautogui or '
-                                   'it is not installed.')
-
 try:
     from robot.api import logger as LOGGER
     from robot.libraries.BuiltIn import BuiltIn
@@ -17,21 +11,31 @@ except ImportError:
     raise ImageHorizonLibraryError('There is something wrong with '
                                    'Robot Framework or it is not installed.')
 
-try:
-    from tkinter import Tk as TK
-except ImportError:
-    raise ImageHorizonLibraryError('There is either something wrong with '
-                                   'Tkinter or you are running this on Java, '
-                                   'which is not a supported platform. Please '
-                                   'use Python and verify that Tkinter works.')
-
 from . import utils
+from .utils import LazyModule, pyautogui as ag
 from .interaction import *
 from .recognition import *
+from .recognition import (BandMatcher, CaptureBackend, LibraryListener,
+                          LocationHints, Match, MatchingBackend,
+                          MultiScaleMatcher,
+                          MatchResultCache, PollingStrategy,
+                          RecognitionClient,
+                          RecognitionServer, RecognitionStatistics,
+                          ReferenceBundle, ReferenceImageCache,
+                          ScreenshotWriter, compile_bundle, format_statistics,
+                          write_statistics, default_address,
+                          get_capture_backend, get_match_strategy,
+                          get_matching_backend, register_capture_backend,
+                          register_matching_backend, suppress_overlapping)
 from .version import VERSION
 
 __version__ = VERSION
 
+tkinter = LazyModule('tkinter', 'There is either something wrong with '
+                                'Tkinter or you are running this on Java, '
+                                'which is not a supported platform. Please '
+                                'use Python and verify that Tkinter works.')
+
 
 class ImageHorizonLibrary(_Keyboard,
                           _Mouse,
@@ -65,11 +69,37 @@ class ImageHorizonLibrary(_Keyboard,
     precision during `library importing` and during the test case  with keyword
     `Set Confidence`.
 
+    == Match strategy ==
+
+    With the default match strategy ``best`` the whole screen is searched
+    and the best scoring location at least as good as the `confidence
+    level` is returned. With ``first`` the search stops at the first
+    location that is good enough, scanning from top to bottom and left to
+    right, which is faster when the image is near the top of the screen but
+    may miss a better match further down.
+
+    The strategy can be given when `importing` the library, changed with
+    `Set Match Strategy` and overridden for a single search with the
+    ``match_strategy`` argument of `Locate` and `Wait For`. Both keywords
+    also return the score of the match with ``with_score=True``.
+
+    Stopping early is supported by the ``opencv`` and ``numpy`` `matching
+    backends`. The ``coarse`` backend always returns the best match and
+    ``pyscreeze`` always the first one and does not calculate scores. With
+    a scale range, see `Scaling`, ``first`` uses the first scale where the
+    image is found. Scores are not available with a `recognition server`.
+
 
     = Reference image names =
     ``reference_image`` parameter can be either a single file, or a folder.
     If ``reference_image`` is a folder, image recognition is tried separately
-    for each image in that folder, in alphabetical order until a match is found.
+    for each image in that folder, in alphabetical order. With the `match
+    strategy` ``best`` the image with the highest score wins, and with
+    ``first``, or with a `matching backend` that does not calculate scores,
+    the search stops at the first image that is found. The screen is captured
+    only once per search and all images of the folder are matched against the
+    same capture. With ``matching_threads`` given when `importing` the
+    library, the images are matched concurrently with the same result.
 
     For ease of use, reference image names are automatically normalized
     according to the following rules:
@@ -93,6 +123,182 @@ class ImageHorizonLibrary(_Keyboard,
     | `Click Image`    | popup Window title                    |                         | # Path is images/popup_window_title.png                    |
     | `Click Image`    | button Login Without User Credentials |                         | # Path is images/button_login_without_user_credentials.png |
 
+    == Reference image bundles ==
+
+    Large reference folders can be compiled to a single bundle file that
+    contains the images already decoded:
+
+    | $ python -m ImageHorizonLibrary.bundle path/to/images images.bundle
+
+    The bundle file is then given as ``reference_folder``. Reference image
+    names work like with the folder, and images are read from the memory
+    mapped bundle only when they are used, without decoding. With
+    ``--grayscale`` the images are stored in grayscale and matched against
+    the screen converted to grayscale, which halves the bundle size and
+    speeds up matching but does not distinguish colors.
+
+    = Search region =
+
+    By default, images are searched from the whole screen. Searching only a
+    part of the screen is considerably faster on large or multiple screens.
+    The recognition keywords accept an optional ``region`` argument, and
+    `Set Search Region` sets a region for all the following searches.
+
+    ``region`` is given either as ``left, top, width, height`` of a rectangle
+    on screen, as a Python sequence or a comma separated string, or as
+    ``window:<title>`` to search only the window with the given title.
+    Finding windows by title is supported only on Windows.
+
+    Returned coordinates are always screen coordinates.
+
+    | `Click Image` | button OK | region=0, 0, 800, 600   |
+    | `Wait For`    | dialog    | region=window:Installer |
+
+    = Matching backends =
+
+    The engine that finds reference images from the screenshot can be
+    selected with ``matching_backend`` when `importing` the library or with
+    `Set Matching Backend`. This allows picking the fastest engine for each
+    host and comparing engines with each other:
+
+    - ``numpy`` does pixel-perfect matching vectorized with NumPy, which is
+      close to OpenCV in speed and can be used on hosts where OpenCV cannot
+      be installed. Matching with `confidence level` is done with OpenCV.
+      Requires [https://pypi.org/project/numpy|numpy].
+
+    - ``opencv`` uses OpenCV template matching also for pixel-perfect
+      matching, which then requires 0.999 similarity. Requires
+      [https://pypi.org/project/opencv-python|opencv-python].
+
+    - ``coarse`` matches first on a grayscale screenshot downscaled by four
+      and then confirms the best candidates with OpenCV at full resolution.
+      This is many times faster than ``opencv`` on large screens and uses
+      the same scores and `confidence level`. Reference images with hardly
+      any shapes, like noise, may not be found. Requires
+      [https://pypi.org/project/opencv-python|opencv-python].
+
+    - ``pyscreeze`` uses the same matching as pyautogui. Pixel-perfect
+      matching is done in pure Python, which can take seconds on large
+      screens. This is the default.
+
+    - ``auto`` selects the first available backend in the order above.
+
+    Other backends can be registered with
+    ``ImageHorizonLibrary.register_matching_backend``.
+
+    = Capture backends =
+
+    The engine that captures the screen can be selected with
+    ``capture_backend`` when `importing` the library or with `Set Capture
+    Backend`:
+
+    - ``pyautogui`` captures with pyautogui. On Linux this may run an
+      external tool that writes the screenshot to a temporary file. This is
+      the default.
+
+    - ``mss`` reads the screen from the display server straight into
+      memory, which is considerably faster especially on headless Linux
+      hosts running Xvfb. Requires [https://pypi.org/project/mss|mss] and
+      [https://pypi.org/project/numpy|numpy].
+
+    - ``image:<path>`` uses the given image file instead of the screen.
+      This makes image recognition deterministic for testing the tests and
+      needs no display at all.
+
+    The capture backend is used also by `Take A Screenshot`. Other backends
+    can be registered with ``ImageHorizonLibrary.register_capture_backend``.
+
+    | `Import Library`      | ImageHorizonLibrary | reference_folder=images | capture_backend=mss |
+    | `Set Capture Backend` | image:${CURDIR}/screens/login.png |           |                     |
+
+    = Recognition server =
+
+    The library is created again for every suite, so every suite decodes
+    its reference images again, and parallel executions with
+    [https://pabot.org|pabot] do the same in every process. With
+    ``recognition_server`` given when `importing` the library, images are
+    located by a recognition server process instead. The server captures
+    the screen and keeps decoded reference images, reference image bundles
+    and matching backends in memory for all suites and processes using it.
+
+    With value ``auto`` the server is reached at a Unix socket in a
+    directory only the current user can access, under ``$XDG_RUNTIME_DIR``
+    or the temporary directory, or at a named pipe on Windows, and otherwise
+    at the given address. Clients authenticate with a random key the server
+    stores next to the socket, and refuse to connect if the socket or the
+    key does not belong to the current user. If no server is running, the
+    library starts one in the background, which exits after a minute
+    without clients. The server can also be started beforehand:
+
+    | $ python -m ImageHorizonLibrary.server
+
+    The server uses the `matching backend`, `capture backend`, `confidence
+    level` and reference folder of the library. `Scaling`, location hints,
+    the ``change`` `polling strategy` and ``frame`` and ``annotated``
+    `failure screenshots` are not used with the server.
+
+    = Failure screenshots =
+
+    When an image is not found, the keyword given as ``keyword_on_failure``
+    when `importing` the library is run, by default `Take A Screenshot`.
+    By default it captures the screen again, which takes time and may show
+    something else than what the failed search saw. ``failure_screenshot``
+    given when `importing` the library changes this:
+
+    - ``screen`` captures the screen again. This is the default.
+
+    - ``frame`` saves the screen capture the failed search was matched
+      against. If the search was restricted to a `search region`, only the
+      region is saved.
+
+    - ``annotated`` is like ``frame`` but also outlines the best matching
+      candidate and its score, which tells how close the search was.
+      Requires [https://pypi.org/project/opencv-python|opencv-python].
+
+    = Scaling =
+
+    Reference images captured with one display scaling, say 100%, are not
+    found pixel by pixel on a screen that uses another one, say 150%. With
+    [https://pypi.org/project/opencv-python|opencv-python] installed, the
+    library can search reference images over a range of scales in one pass
+    and use the best matching scale. The scale range is given as
+    ``scale_range`` when `importing` the library or with `Set Scale Range`:
+
+    | `Import Library`  | ImageHorizonLibrary | reference_folder=images | scale_range=1.0, 2.0 |
+    | `Set Scale Range` | 0.5                 | 1.5                     | step=0.25            |
+
+    Matching is done with `confidence level` or with 0.999 if confidence is
+    not set. The scale an image was last found at is tried first on the
+    following searches, which makes them as fast as normal searches. This
+    can be turned off by importing the library with ``remember_scale=False``.
+    The matched scale is returned by `Get Matched Scale`.
+
+    = Polling strategy =
+
+    `Wait For` searches the screen repeatedly until the image is found or
+    the timeout expires. Between the attempts it sleeps according to the
+    polling strategy, which leaves the CPU to the application under test:
+
+    - ``fixed`` sleeps ``interval`` seconds between the attempts. This is
+      the default with an interval of 0.1 seconds.
+
+    - ``backoff`` starts with ``interval`` and doubles the sleep after
+      every attempt up to ``max_interval``.
+
+    - ``change`` sleeps ``interval`` seconds and matches images only when
+      the captured screen has changed since the previous attempt.
+
+    The strategy can be given when `importing` the library and changed with
+    `Set Polling Strategy`.
+
+    All waiting keywords compare each capture with the previous one in
+    small tiles. An image that was not found on the previous attempt can
+    only have appeared where the screen changed, so `Wait For`, `Wait For
+    Any` and `Wait For All` match images only in the changed parts of the
+    screen, grown by the size of the image, and skip matching altogether
+    when nothing changed. `Wait Until Image Vanishes` similarly matches the
+    image again only when the screen has changed where it was found.
+
     = Performance =
 
     Locating images on screen, especially if screen resolution is large and
@@ -108,6 +314,50 @@ class ImageHorizonLibrary(_Keyboard,
 
     | ${location}=           | `Wait For`  | label Name |
     | `Click To The Left Of` | ${location} | 200        |
+
+    The reference folder is indexed on first use, so finding reference
+    images by name does not query the file system even if the folder
+    contains thousands of images. The folder is indexed again if an image
+    is not found from the index.
+
+    Reference images are decoded only once and then kept in memory, so
+    repeated searches for the same image, for example in `Wait For`, do not
+    read the file again. The number of images kept in memory can be set with
+    ``image_cache_size`` when `importing` the library.
+
+    When the library is imported with ``location_hints=True``, it remembers
+    where each reference image was last found and first searches only the
+    surroundings of that location. The whole screen is searched only if the
+    image is not found there. If an image is on screen many times, this may
+    return another occurrence than a search of the whole screen would.
+
+    With ``result_cache`` given when `importing` the library, found
+    locations are stored in a file together with a hash of the screen
+    content. When the same image is searched again on a screen that looks
+    the same, for example when failed tests are run again with
+    ``--rerunfailed``, the image is matched only at the cached location.
+    The whole screen is searched if the image is not found there. The
+    result cache requires [https://pypi.org/project/numpy|numpy].
+
+    `Take A Screenshot`, which is by default run when a keyword fails,
+    writes a full resolution PNG file. With ``async_screenshots=True`` given
+    when `importing` the library, the screen is captured into memory and the
+    image is encoded and written by a background thread, so failing
+    keywords, for example in retry loops, do not wait for the disk. Pending
+    screenshots are written at the latest when the suite ends.
+    ``screenshot_format`` ``jpg`` or ``webp`` and ``screenshot_scale``
+    below 1 make the files and the log considerably smaller.
+
+    `Get Recognition Statistics` tells where the time goes: capturing the
+    screen, decoding reference images, matching, taking screenshots or
+    clicking. With ``statistics_summary`` given when `importing` the library,
+    the statistics are written to the log or to a JSON file at the end of
+    the suite.
+
+    pyautogui, Tkinter, NumPy, OpenCV and Pillow are imported only when
+    they are first needed, and the display is probed once per process.
+    Importing the library is thus fast, and generating documentation with
+    libdoc or dry-runs do not load them at all.
     '''
 
     ROBOT_LIBRARY_SCOPE = 'TEST SUITE'
@@ -115,11 +365,20 @@ class ImageHorizonLibrary(_Keyboard,
 
     def __init__(self, reference_folder=None, screenshot_folder=None,
                  keyword_on_failure='ImageHorizonLibrary.Take A Screenshot',
-                 confidence=None):
+                 confidence=None, image_cache_size=64, matching_threads=1,
+                 polling_strategy='fixed', polling_interval=0.1,
+                 scale_range=None, remember_scale=True,
+                 matching_backend='pyscreeze', location_hints=False,
+                 statistics_summary=None, capture_backend='pyautogui',
+                 screenshot_format='png', screenshot_scale=1.0,
+                 async_screenshots=False, failure_screenshot='screen',
+                 recognition_server=None, result_cache=None,
+                 result_cache_size=1000, match_strategy='best'):
         '''ImageHorizonLibrary can be imported with several options.
 
         ``reference_folder`` is path to the folder where all reference images
-        are stored. It must be a _valid absolute path_. As the library
+        are stored, or to a bundle file described in `Reference image
+        bundles`. It must be a _valid absolute path_. As the library
         is suite-specific (ie. new instance is created for every suite),
         different suites can have different folders for it's reference images.
 
@@ -135,6 +394,57 @@ class ImageHorizonLibrary(_Keyboard,
                        It can be used if python-opencv is installed and
                        is given as number between 0 and 1. Not used
                        by default.
+
+        ``image_cache_size`` is the number of decoded reference images kept
+        in memory. Reference images are read from disk and decoded only once
+        and reused by all image recognition keywords until the file changes.
+        Setting it to ``0`` disables the cache.
+
+        ``matching_threads`` is the number of threads used to match the
+        images of a reference image folder against the screen concurrently.
+        Single images are matched in horizontal bands of the screen, one
+        band per thread. By default matching uses one thread.
+
+        ``polling_strategy`` and ``polling_interval`` control how often
+        `Wait For` searches the screen as described in `Polling strategy`.
+
+        ``scale_range`` is the range of scales ``min, max`` reference images
+        are searched at and ``remember_scale`` whether the scale an image was
+        found at is tried first next time. See `Scaling`.
+
+        ``matching_backend`` is the engine used to find images as described
+        in `Matching backends`.
+
+        ``location_hints`` enables searching images first where they were
+        found previously as described in `Performance`.
+
+        ``statistics_summary`` writes the statistics returned by `Get
+        Recognition Statistics` at the end of the suite. With value ``log``
+        they are written to the log, otherwise ``statistics_summary`` is
+        the path to a JSON file where the statistics are stored under the
+        suite name.
+
+        ``capture_backend`` is the engine used to capture the screen as
+        described in `Capture backends`.
+
+        ``screenshot_format`` is the format of the screenshots, ``png``,
+        ``jpg`` or ``webp``, and ``screenshot_scale`` a number between 0 and
+        1 screenshots are resized by. ``async_screenshots`` writes the
+        screenshots in the background as described in `Performance`.
+
+        ``failure_screenshot`` is ``screen``, ``frame`` or ``annotated`` as
+        described in `Failure screenshots`.
+
+        ``recognition_server`` is ``auto`` or the address of the server that
+        locates the images as described in `Recognition server`. Not used
+        by default.
+
+        ``result_cache`` is the path to a file where match results are
+        cached across executions and ``result_cache_size`` the number of
+        results kept in it. Requires numpy. See `Performance`.
+
+        ``match_strategy`` is ``best`` or ``first`` as described in `Match
+        strategy`.
         '''
 
         self.reference_folder = reference_folder
@@ -145,9 +455,85 @@ class ImageHorizonLibrary(_Keyboard,
         self.is_windows = utils.is_windows()
         self.is_mac = utils.is_mac()
         self.is_linux = utils.is_linux()
-        self.has_retina = utils.has_retina()
-        self.has_cv = utils.has_cv()
-        self.confidence = confidence
+        self._has_retina = None
+        self._has_cv = None
+        self.confidence = None
+        self.set_confidence(confidence)
+        self.match_strategy = get_match_strategy(match_strategy)
+        self._match_scores = {}
+        self._image_cache = ReferenceImageCache(image_cache_size)
+        self._reference_index = None
+        self.matching_threads = int(matching_threads)
+        self._bands = None
+        if self.matching_threads > 1:
+            self._bands = BandMatcher(self.matching_threads)
+        self.search_region = None
+        self._polling = PollingStrategy(polling_strategy, polling_interval)
+        self._backend = get_matching_backend(matching_backend)
+        self._capture_backend = get_capture_backend(capture_backend)
+        self._capture_spec = capture_backend
+        self._hints = LocationHints() if location_hints else None
+        self._result_cache = None
+        if result_cache:
+            self._result_cache = MatchResultCache(result_cache,
+                                                  result_cache_size)
+        self._statistics = RecognitionStatistics()
+        self.statistics_summary = statistics_summary
+        self.screenshot_format = str(screenshot_format).lower()
+        if self.screenshot_format not in ('png', 'jpg', 'webp'):
+            raise ScreenshotException('Invalid screenshot format "%s", valid '
+                                      'formats are: png, jpg, webp' %
+                                      screenshot_format)
+        self.screenshot_scale = float(screenshot_scale)
+        if not 0 < self.screenshot_scale <= 1:
+            raise ScreenshotException('Screenshot scale must be greater than '
+                                      '0 and at most 1, got "%s".' %
+                                      screenshot_scale)
+        self._screenshot_writer = None
+        if async_screenshots:
+            self._screenshot_writer = ScreenshotWriter()
+        self.failure_screenshot = str(failure_screenshot).lower()
+        if self.failure_screenshot not in ('screen', 'frame', 'annotated'):
+            raise ScreenshotException('Invalid failure screenshot "%s", '
+                                      'valid values are: screen, frame, '
+                                      'annotated' % failure_screenshot)
+        self._last_frame = None
+        self._failure_frame = None
+        self._server = None
+        if recognition_server:
+            address = str(recognition_server)
+            self._server = RecognitionClient(
+                None if address.lower() in ('auto', 'true') else address)
+        if statistics_summary or async_screenshots or self._server:
+            self.ROBOT_LIBRARY_LISTENER = LibraryListener(self)
+        self._scaling = None
+        self.remember_scale = remember_scale
+        if scale_range:
+            if isinstance(scale_range, str):
+                scale_range = scale_range.split(',')
+            self.set_scale_range(*scale_range)
+
+    @property
+    def has_retina(self):
+        # Probing the display is slow on OS X, so it is done only when
+        # coordinates are first needed and then once per process.
+        if self._has_retina is None:
+            self._has_retina = utils.has_retina()
+        return self._has_retina
+
+    @has_retina.setter
+    def has_retina(self, value):
+        self._has_retina = value
+
+    @property
+    def has_cv(self):
+        if self._has_cv is None:
+            self._has_cv = utils.has_cv()
+        return self._has_cv
+
+    @has_cv.setter
+    def has_cv(self, value):
+        self._has_cv = value
 
     def _get_location(self, direction, location, offset):
         x, y = location
@@ -179,7 +565,8 @@ class ImageHorizonLibrary(_Keyboard,
         LOGGER.info('Clicking %d time(s) at (%d, %d) with '
                     '%s mouse button at interval %f' % (clicks, x, y,
                                                         button, interval))
-        ag.click(x, y, clicks=clicks, button=button, interval=interval)
+        with self._statistics.measure('click'):
+            ag.click(x, y, clicks=clicks, button=button, interval=interval)
 
     def _convert_to_valid_special_key(self, key):
         key = str(key).lower()
@@ -204,11 +591,12 @@ class ImageHorizonLibrary(_Keyboard,
 
     def _press(self, *keys, **options):
         keys = self._validate_keys(keys)
-        ag.hotkey(*keys, **options)
+        with self._statistics.measure('keyboard'):
+            ag.hotkey(*keys, **options)
 
     @contextmanager
     def _tk(self):
-        tk = TK()
+        tk = tkinter.Tk()
         yield tk.clipboard_get()
         tk.destroy()
 
@@ -238,12 +626,73 @@ class ImageHorizonLibrary(_Keyboard,
     def _run_on_failure(self):
         if not self.keyword_on_failure:
             return
+        self._failure_frame = self._frame_for_failure()
         try:
             BuiltIn().run_keyword(self.keyword_on_failure)
         except Exception as e:
             LOGGER.debug(e)
             LOGGER.warn('Failed to take a screenshot. '
                         'Is Robot Framework running?')
+        finally:
+            self._failure_frame = None
+            self._last_frame = None
+
+    def get_recognition_statistics(self):
+        '''Returns the time spent in the phases of image recognition and
+        interaction and related counts as a dictionary.
+
+        ``phases`` contains ``count``, ``total``, ``average`` and ``max``
+        time in seconds for ``capture`` of the screen, ``decode`` of the
+        reference images, ``match`` of the images, ``wait`` in waiting
+        keywords, ``screenshot`` taken, and ``click``, ``move`` and
+        ``keyboard`` actions.
+
+        ``counters`` contains the number of ``searches``, of them ``found``,
+        ``polls`` of waiting keywords and ``unchanged frames`` that waiting
+        keywords did not match because the screen, or the area of the image,
+        had not changed since the previous poll. ``image cache`` and
+        ``location hints`` contain the hits and misses of those and
+        ``reference index`` the number of indexed reference images and
+        folders.
+
+        | ${statistics}= | Get Recognition Statistics |
+        | Log            | ${statistics['phases']['match']['total']} |
+        '''
+        statistics = self._statistics.as_dict()
+        statistics['image cache'] = self._image_cache.statistics()
+        if self._reference_index is not None:
+            statistics['reference index'] = \
+                self._reference_index.statistics()
+        if self._hints is not None:
+            statistics['location hints'] = self._hints.statistics()
+        if self._result_cache is not None:
+            statistics['result cache'] = self._result_cache.statistics()
+        return statistics
+
+    def _end_suite(self, suite):
+        self._close()
+        if self.statistics_summary:
+            self._write_statistics_summary(suite)
+
+    def _close(self):
+        if self._server is not None:
+            self._server.close()
+        if self._result_cache is not None:
+            self._result_cache.close()
+        if self._bands is not None:
+            self._bands.close()
+        if self._screenshot_writer is None:
+            return
+        for error in self._screenshot_writer.flush():
+            LOGGER.warn('Failed to write screenshot %s' % error)
+
+    def _write_statistics_summary(self, suite):
+        statistics = self.get_recognition_statistics()
+        if self.statistics_summary.lower() == 'log':
+            LOGGER.info('Image recognition statistics:\n%s' %
+                        format_statistics(statistics))
+        else:
+            write_statistics(self.statistics_summary, suite, statistics)
 
     def set_reference_folder(self, reference_folder_path):
         '''Sets where all reference images are stored.
@@ -259,6 +708,95 @@ class ImageHorizonLibrary(_Keyboard,
         '''
         self.screenshot_folder = screenshot_folder_path
 
+    def set_search_region(self, region=None, relative_to=None):
+        '''Restricts image recognition to a part of the screen.
+
+        ``region`` is given as described in `Search region`. If ``region``
+        is not given, the whole screen is searched again.
+
+        ``relative_to`` is a location returned by the locating keywords. If
+        it is given, ``left`` and ``top`` of ``region`` are offsets from that
+        location.
+
+        Examples:
+
+        | `Set Search Region` | 0, 0, 800, 600     |                          |
+        | `Set Search Region` | window:Calculator  |                          |
+        | ${location}=        | `Locate`           | label Name               |
+        | `Set Search Region` | -20, -10, 400, 100 | relative_to=${location}  |
+        | `Set Search Region` |                    | # Search whole screen    |
+        '''
+        self.search_region = self._parse_region(region, relative_to)
+
+    def set_polling_strategy(self, strategy, interval=0.1, max_interval=None):
+        '''Sets how often `Wait For` searches the screen.
+
+        ``strategy`` is one of ``fixed``, ``backoff`` or ``change`` as
+        described in `Polling strategy`. ``interval`` and ``max_interval``
+        are given in seconds. ``max_interval`` defaults to one second or
+        ``interval`` if that is longer.
+
+        | `Set Polling Strategy` | backoff | interval=0.05 | max_interval=0.5 |
+        | `Set Polling Strategy` | change  | interval=0.2  |                  |
+        '''
+        self._polling = PollingStrategy(strategy, interval, max_interval)
+
+    def set_match_strategy(self, strategy):
+        '''Sets whether searches return the best or the first good enough
+        match.
+
+        ``strategy`` is ``best`` or ``first`` as described in `Match
+        strategy`.
+
+        Returns the previous strategy.
+        '''
+        previous = self.match_strategy
+        self.match_strategy = get_match_strategy(strategy)
+        return previous
+
+    def set_matching_backend(self, backend):
+        '''Sets the engine used to find images on screen.
+
+        See `Matching backends` for valid values of ``backend``.
+
+        Returns the name of the previous backend.
+        '''
+        previous = self._backend.name
+        self._backend = get_matching_backend(backend)
+        return previous
+
+    def set_capture_backend(self, backend):
+        '''Sets the engine used to capture the screen.
+
+        See `Capture backends` for valid values of ``backend``.
+
+        Returns the name of the previous backend.
+        '''
+        previous = self._capture_backend.name
+        self._capture_backend = get_capture_backend(backend)
+        self._capture_spec = backend
+        return previous
+
+    def set_scale_range(self, min_scale=None, max_scale=None, step=0.05):
+        '''Sets the range of scales reference images are searched at.
+
+        ``min_scale`` and ``max_scale`` are decimal numbers where ``1.0`` is
+        the size of the reference image. Scales between them are tried in
+        ``step`` increments. If ``min_scale`` is not given, images are again
+        searched only in their original size. ``max_scale`` defaults to
+        ``min_scale``.
+
+        See `Scaling` about additional dependencies that needs to be
+        installed before this keyword has any effect.
+        '''
+        if min_scale is None:
+            self._scaling = None
+            return
+        if max_scale is None:
+            max_scale = min_scale
+        self._scaling = MultiScaleMatcher(min_scale, max_scale, step,
+                                          remember=self.remember_scale)
+
     def set_confidence(self, new_confidence):
         '''Sets the accuracy when finding images.
 
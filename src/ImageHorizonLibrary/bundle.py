@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+'''Compiles a reference folder to a reference image bundle.
+
+Usage:
+
+    python -m ImageHorizonLibrary.bundle [--grayscale] <folder> <bundle>
+
+The bundle can be used as the ``reference_folder`` of ImageHorizonLibrary.
+'''
+import argparse
+import sys
+
+from .recognition import compile_bundle
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description='Compiles a reference folder to a reference image '
+                    'bundle.')
+    parser.add_argument('folder', help='reference folder to compile')
+    parser.add_argument('bundle', help='bundle file to write')
+    parser.add_argument('--grayscale', action='store_true',
+                        help='store the images in grayscale')
+    options = parser.parse_args(arguments)
+    count = compile_bundle(options.folder, options.bundle, options.grayscale)
+    print('Compiled %d reference images to %s' % (count, options.bundle))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
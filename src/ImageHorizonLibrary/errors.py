@@ -3,6 +3,10 @@ class ImageHorizonLibraryError(ImportError):
     pass
 
 
+class BackendException(Exception):
+    pass
+
+
 class ImageNotFoundException(Exception):
     def __init__(self, image_name):
         self.image_name = image_name
@@ -11,10 +15,27 @@ class ImageNotFoundException(Exception):
         return 'Reference image "%s" was not found on screen' % self.image_name
 
 
+class ImageVisibleException(Exception):
+    def __init__(self, image_name):
+        self.image_name = image_name
+
+    def __str__(self):
+        return ('Reference image "%s" is still visible on screen' %
+                self.image_name)
+
+
 class InvalidImageException(Exception):
     pass
 
 
+class InvalidRegionException(Exception):
+    pass
+
+
+class InvalidScaleException(Exception):
+    pass
+
+
 class KeyboardException(Exception):
     pass
 
@@ -27,9 +48,25 @@ class OSException(Exception):
     pass
 
 
+class PollingException(Exception):
+    pass
+
+
 class ReferenceFolderException(Exception):
     pass
 
 
+class ServerException(Exception):
+    pass
+
+
+class ScreenNotSettledException(Exception):
+    pass
+
+
+class ScreenshotException(Exception):
+    pass
+
+
 class ScreenshotFolderException(Exception):
     pass
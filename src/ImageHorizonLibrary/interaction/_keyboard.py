@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-import pyautogui as ag
+from ..utils import pyautogui as ag
 
 
 class _Keyboard(object):
@@ -29,12 +29,13 @@ class _Keyboard(object):
         | Type | Submit this with enter | Key.enter |              |
         | Type | key.windows            | notepad   | Key.enter    |
         '''
-        for key_or_text in keys_or_text:
-            key = self._convert_to_valid_special_key(key_or_text)
-            if key:
-                ag.press(key)
-            else:
-                ag.typewrite(key_or_text)
+        with self._statistics.measure('keyboard'):
+            for key_or_text in keys_or_text:
+                key = self._convert_to_valid_special_key(key_or_text)
+                if key:
+                    ag.press(key)
+                else:
+                    ag.typewrite(key_or_text)
 
 
     def type_with_keys_down(self, text, *keys):
@@ -48,8 +49,9 @@ class _Keyboard(object):
         | Type with keys down | write this in caps  | Key.Shift |
         '''
         valid_keys = self._validate_keys(keys)
-        for key in valid_keys:
-            ag.keyDown(key)
-        ag.typewrite(text)
-        for key in valid_keys:
-            ag.keyUp(key)
+        with self._statistics.measure('keyboard'):
+            for key in valid_keys:
+                ag.keyDown(key)
+            ag.typewrite(text)
+            for key in valid_keys:
+                ag.keyUp(key)
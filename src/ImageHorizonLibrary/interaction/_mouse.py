@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-import pyautogui as ag
+from ..utils import pyautogui as ag
 
 from ..errors import MouseException
 
@@ -91,7 +91,8 @@ class _Mouse(object):
         except ValueError:
             raise MouseException('Coordinates %s are not integers' %
                                  (coordinates,))
-        ag.moveTo(*coordinates)
+        with self._statistics.measure('move'):
+            ag.moveTo(*coordinates)
 
     def mouse_down(self, button='left'):
         '''Presses specidied mouse button down'''
@@ -106,7 +107,8 @@ class _Mouse(object):
 
         Valid buttons are ``left``, ``right`` or ``middle``.
         '''
-        ag.click(button=button)
+        with self._statistics.measure('click'):
+            ag.click(button=button)
 
     def double_click(self, button='left', interval=0.0):
         '''Double clicks with the specified mouse button.
@@ -116,7 +118,8 @@ class _Mouse(object):
         ``interval`` specifies the time between clicks and should be
         floating point number.
         '''
-        ag.doubleClick(button=button, interval=float(interval))
+        with self._statistics.measure('click'):
+            ag.doubleClick(button=button, interval=float(interval))
 
     def triple_click(self, button='left', interval=0.0):
         '''Triple clicks with the specified mouse button.
@@ -125,4 +128,5 @@ class _Mouse(object):
 
         See documentation of ``interval`` in `Double Click`.
         '''
-        ag.tripleClick(button=button, interval=float(interval))
+        with self._statistics.measure('click'):
+            ag.tripleClick(button=button, interval=float(interval))
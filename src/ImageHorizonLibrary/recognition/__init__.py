@@ -1,5 +1,23 @@
 # -*- coding: utf-8 -*-
+from ._bands import BandMatcher
+from ._bundle import ReferenceBundle, compile_bundle
+from ._capture import (CaptureBackend, get_capture_backend,
+                       register_capture_backend)
+from ._hints import LocationHints
+from ._image_cache import ReferenceImageCache
+from ._listener import LibraryListener
+from ._matching import (Match, MatchingBackend, get_match_strategy,
+                        get_matching_backend, register_matching_backend,
+                        suppress_overlapping)
+from ._polling import PollingStrategy
+from ._pyramid import CoarseToFineBackend
 from ._recognize_images import _RecognizeImages
+from ._result_cache import MatchResultCache
+from ._scaling import MultiScaleMatcher
+from ._screenshot_writer import ScreenshotWriter
+from ._server import RecognitionClient, RecognitionServer, default_address
+from ._statistics import (RecognitionStatistics, format_statistics,
+                          write_statistics)
 from ._screenshot import _Screenshot
 #
 __all__ = [
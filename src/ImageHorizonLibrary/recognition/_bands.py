@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from ..utils import lazy_import
+from ._matching import image_size, to_array
+
+np = lazy_import('numpy')
+
+
+class BandMatcher(object):
+    '''Matches a reference image in horizontal bands of the screenshot
+    concurrently with ``threads`` threads.
+
+    Bands overlap by the height of the reference image minus one pixel, so
+    every position of the image is inside exactly one band. Of the matches
+    found in the bands, the best scoring is returned, and of equally good
+    ones the topmost, which is what matching the whole screenshot at once
+    returns too. OpenCV and NumPy release the GIL while matching, so the
+    bands are matched on separate cores.
+    '''
+
+    def __init__(self, threads, min_height=64):
+        self.threads = int(threads)
+        self.min_height = int(min_height)
+        self._executor = None
+        self._lock = Lock()
+        self._frame = (None, None)
+
+    def bands(self, height, needle_height):
+        '''Returns the bands ``(top, bottom)`` of a screenshot of
+        ``height``, or an empty list if splitting it is not worthwhile.'''
+        positions = height - needle_height + 1
+        count = min(self.threads,
+                    positions // max(needle_height, self.min_height))
+        if count < 2:
+            return []
+        step = -(-positions // count)
+        return [(top, min(top + step + needle_height - 1, height))
+                for top in range(0, positions, step)]
+
+    def _as_array(self, haystack):
+        # The same screenshot is split again for every reference image of a
+        # folder, so the latest conversion is kept.
+        with self._lock:
+            image, array = self._frame
+            if image is not haystack:
+                array = to_array(haystack)
+                self._frame = (haystack, array)
+            return array
+
+    def _map(self, function, bands):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.threads)
+            executor = self._executor
+        return list(executor.map(function, bands))
+
+    def _split(self, backend, needle, haystack):
+        if np is None or not backend.parallel_bands:
+            return None, []
+        needle_height = image_size(needle)[1]
+        pixels = self._as_array(haystack)
+        return pixels, self.bands(pixels.shape[0], needle_height)
+
+    def locate(self, backend, needle, haystack, confidence=None):
+        '''Like ``backend.locate`` but matches the bands concurrently.'''
+        pixels, bands = self._split(backend, needle, haystack)
+        if not bands:
+            return backend.locate(needle, haystack, confidence)
+
+        def locate_in_band(band):
+            match = backend.locate(needle, pixels[band[0]:band[1]],
+                                   confidence)
+            if match is None:
+                return None
+            return match._replace(top=match.top + band[0])
+
+        best = None
+        for match in self._map(locate_in_band, bands):
+            if match is None:
+                continue
+            if best is None or (match.score is not None and
+                                best.score is not None and
+                                match.score > best.score):
+                best = match
+        return best
+
+    def locate_first(self, backend, needle, haystack, confidence=None):
+        '''Like ``backend.locate_first`` but matches the bands concurrently.
+        The match of the topmost band having one is returned.'''
+        pixels, bands = self._split(backend, needle, haystack)
+        if not bands:
+            return backend.locate_first(needle, haystack, confidence)
+
+        def locate_in_band(band):
+            match = backend.locate_first(needle, pixels[band[0]:band[1]],
+                                         confidence)
+            if match is None:
+                return None
+            return match._replace(top=match.top + band[0])
+
+        for match in self._map(locate_in_band, bands):
+            if match is not None:
+                return match
+        return None
+
+    def locate_all(self, backend, needle, haystack, confidence=None):
+        '''Like ``backend.locate_all`` but matches the bands concurrently.'''
+        pixels, bands = self._split(backend, needle, haystack)
+        if not bands:
+            return backend.locate_all(needle, haystack, confidence)
+
+        def locate_all_in_band(band):
+            return [match._replace(top=match.top + band[0]) for match in
+                    backend.locate_all(needle, pixels[band[0]:band[1]],
+                                       confidence)]
+
+        return [match for matches in self._map(locate_all_in_band, bands)
+                for match in matches]
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self._frame = (None, None)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import json
+import mmap
+import struct
+
+from os import walk
+from os.path import abspath, isfile, join as path_join, relpath, sep
+
+from ..errors import InvalidImageException, ReferenceFolderException
+from ..utils import LazyModule, lazy_import
+from ._matching import to_array, to_grayscale
+from ._reference_index import ReferenceIndex, path_key
+
+np = lazy_import('numpy')
+Image = LazyModule('PIL.Image')
+
+MAGIC = b'IHLBNDL1'
+ALIGNMENT = 64
+_HEADER = struct.Struct('<8sQ')
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def compile_bundle(folder, path, grayscale=False):
+    '''Compiles the PNG images in ``folder`` and its subfolders to the
+    bundle file ``path``. Images are stored decoded, as RGB or, if
+    ``grayscale`` is true, as grayscale arrays. Returns the number of
+    images in the bundle.'''
+    if np is None:
+        raise ReferenceFolderException('Reference image bundles require '
+                                       'NumPy.')
+    folder = abspath(folder)
+    entries, folders, arrays = {}, {}, []
+    offset = 0
+    for directory, dirnames, filenames in walk(folder, followlinks=True):
+        dirnames.sort()
+        names = sorted(name for name in filenames
+                       if name.lower().endswith('.png'))
+        key = relpath(directory, folder).replace(sep, '/')
+        folders[key] = None if dirnames else [
+            '%s/%s' % (key, name) if key != '.' else name for name in names]
+        for name in names:
+            with Image.open(path_join(directory, name)) as image:
+                pixels = to_array(image)
+            if grayscale:
+                pixels = to_grayscale(pixels)
+            pixels = np.ascontiguousarray(pixels)
+            entry = '%s/%s' % (key, name) if key != '.' else name
+            entries[entry] = {'offset': offset, 'shape': pixels.shape,
+                              'dtype': pixels.dtype.str}
+            arrays.append(pixels)
+            offset = _align(offset + pixels.nbytes)
+    header = json.dumps({'entries': entries, 'folders': folders,
+                         'grayscale': bool(grayscale)}).encode('UTF-8')
+    start = _align(_HEADER.size + len(header))
+    with open(path, 'wb') as bundle:
+        bundle.write(_HEADER.pack(MAGIC, len(header)))
+        bundle.write(header)
+        for pixels, entry in zip(arrays, entries.values()):
+            bundle.seek(start + entry['offset'])
+            bundle.write(pixels.tobytes())
+    return len(arrays)
+
+
+def is_bundle(path):
+    '''Returns true if ``path`` is a reference image bundle file.'''
+    if not isinstance(path, str) or not isfile(path):
+        return False
+    with open(path, 'rb') as bundle:
+        return bundle.read(len(MAGIC)) == MAGIC
+
+
+class ReferenceBundle(ReferenceIndex):
+    '''Reference images compiled with ``compile_bundle`` and memory mapped
+    from the bundle file.
+
+    Names are resolved like in a reference folder, with paths of the images
+    inside the bundle file, for example ``images.bundle/dialogs/ok.png``.
+    Images are NumPy arrays reading directly from the mapped file, so they
+    are loaded only when the matching touches their pixels.
+    '''
+
+    def __init__(self, path):
+        super(ReferenceBundle, self).__init__(path)
+        with open(self.root, 'rb') as bundle:
+            magic, length = _HEADER.unpack(bundle.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ReferenceFolderException('Invalid reference image '
+                                               'bundle "%s".' % path)
+            header = json.loads(bundle.read(length).decode('UTF-8'))
+            self._map = mmap.mmap(bundle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._start = _align(_HEADER.size + length)
+        self._entries = header['entries']
+        self._header_folders = header['folders']
+        self.grayscale = header['grayscale']
+        self.loads = 0
+
+    def _path(self, name):
+        if name == '.':
+            return self.root
+        return path_join(self.root, *name.split('/'))
+
+    def _build(self):
+        self._files = dict((self._key(name), self._path(name))
+                           for name in self._entries)
+        self._folders = {}
+        for name, images in self._header_folders.items():
+            if images is not None:
+                images = [self._path(image) for image in images]
+            self._folders[self._key(name)] = (self._path(name), images)
+        self.builds += 1
+
+    def _key(self, name):
+        return path_key(self._path(name))
+
+    def _find_outside(self, path):
+        return None
+
+    def load(self, path):
+        name = relpath(path, self.root).replace(sep, '/')
+        entry = self._entries.get(name)
+        if entry is None:
+            raise InvalidImageException('Image path not found: "%s".' % path)
+        self.loads += 1
+        shape = tuple(entry['shape'])
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(shape))
+        return np.frombuffer(self._map, dtype, count,
+                             self._start + entry['offset']).reshape(shape)
+
+    def statistics(self):
+        statistics = super(ReferenceBundle, self).statistics()
+        statistics['loads'] = self.loads
+        return statistics
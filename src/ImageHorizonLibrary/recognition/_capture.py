@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+from threading import local
+
+from ..errors import BackendException
+from ..utils import lazy_import, pyautogui as ag
+from ._matching import crop, to_image
+
+np = lazy_import('numpy')
+mss = lazy_import('mss')
+
+
+class CaptureBackend(object):
+    '''Base class for the engines that capture the screen.
+
+    ``grab`` returns the screen or the ``(left, top, width, height)``
+    ``region`` of it as a PIL image or an RGB NumPy array. ``save`` writes
+    the whole screen to an image file.
+    '''
+    name = None
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def grab(self, region=None):
+        raise NotImplementedError
+
+    def save(self, path):
+        to_image(self.grab()).save(path)
+
+
+class PyautoguiCapture(CaptureBackend):
+    '''Captures with ``pyautogui.screenshot``. Depending on the platform
+    this may go through a temporary file written by an external tool.'''
+    name = 'pyautogui'
+
+    def grab(self, region=None):
+        if region is None:
+            return ag.screenshot()
+        return ag.screenshot(region=region)
+
+    def save(self, path):
+        ag.screenshot(path)
+
+
+class MSSCapture(CaptureBackend):
+    '''Captures with [https://pypi.org/project/mss|mss], which reads the
+    pixels from the display server straight into memory. Screenshots are
+    returned as NumPy arrays without converting them to PIL images.'''
+    name = 'mss'
+
+    def __init__(self):
+        # mss connections can not be shared between threads.
+        self._local = local()
+
+    @classmethod
+    def is_available(cls):
+        return mss is not None and np is not None
+
+    @property
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = mss.mss()
+        return connection
+
+    def grab(self, region=None):
+        if region is None:
+            monitor = self._connection.monitors[1]
+        else:
+            left, top, width, height = region
+            monitor = {'left': left, 'top': top, 'width': width,
+                       'height': height}
+        shot = self._connection.grab(monitor)
+        pixels = np.frombuffer(shot.bgra, np.uint8)
+        pixels = pixels.reshape(shot.height, shot.width, 4)
+        return np.ascontiguousarray(pixels[:, :, 2::-1])
+
+
+class ImageCapture(CaptureBackend):
+    '''Returns a fixed image instead of the screen. ``source`` is the path
+    to an image file, a PIL image or an RGB NumPy array. Meant for testing
+    recognition deterministically without a display.'''
+    name = 'image'
+
+    def __init__(self, source=None):
+        self.image = None
+        if source is not None:
+            self.set_image(source)
+
+    def set_image(self, source):
+        if isinstance(source, str):
+            from PIL import Image
+            source = Image.open(source).convert('RGB')
+        self.image = source
+
+    def grab(self, region=None):
+        if self.image is None:
+            raise BackendException('Capture backend "image" has no image.')
+        if region is None:
+            return self.image
+        left, top, width, height = region
+        return crop(self.image, (left, top, left + width, top + height))
+
+
+CAPTURE_BACKENDS = OrderedDict()
+
+
+def register_capture_backend(backend):
+    '''Makes ``backend``, a ``CaptureBackend`` subclass, selectable by its
+    ``name``.'''
+    CAPTURE_BACKENDS[backend.name] = backend
+    return backend
+
+
+for _backend in (PyautoguiCapture, MSSCapture, ImageCapture):
+    register_capture_backend(_backend)
+
+
+def get_capture_backend(name='pyautogui'):
+    '''Returns a new instance of the capture backend called ``name``.
+    Arguments can follow the name after a colon, for example
+    ``image:screen.png``.'''
+    name, _, argument = str(name).partition(':')
+    name = name.lower()
+    if name not in CAPTURE_BACKENDS:
+        raise BackendException('Invalid capture backend "%s", valid '
+                               'backends are: %s' %
+                               (name, ', '.join(CAPTURE_BACKENDS)))
+    if not CAPTURE_BACKENDS[name].is_available():
+        raise BackendException('Capture backend "%s" is not available on '
+                               'this host.' % name)
+    if argument:
+        return CAPTURE_BACKENDS[name](argument.strip())
+    return CAPTURE_BACKENDS[name]()
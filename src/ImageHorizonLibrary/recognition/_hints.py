@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+class LocationHints(object):
+    '''Remembers where each reference image was last found.
+
+    Searches first look for the image in the neighbourhood of its previous
+    location, ``margin`` pixels around it, and search the whole screen only
+    if the image is not found there. ``hits`` and ``misses`` count how often
+    the neighbourhood search succeeds.
+    '''
+
+    def __init__(self, margin=50):
+        self.margin = int(margin)
+        self.hits = 0
+        self.misses = 0
+        self._boxes = {}
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def area(self, key, offset, size):
+        '''Returns the neighbourhood of the previous location of ``key`` as
+        ``(left, top, right, bottom)`` in the coordinates of a screenshot
+        whose top left corner is at screen pixel ``offset`` and whose size
+        is ``size``, or ``None`` if there is no usable hint.'''
+        box = self._boxes.get(key)
+        if box is None:
+            return None
+        left = max(box[0] - offset[0] - self.margin, 0)
+        top = max(box[1] - offset[1] - self.margin, 0)
+        right = min(box[0] - offset[0] + box[2] + self.margin, size[0])
+        bottom = min(box[1] - offset[1] + box[3] + self.margin, size[1])
+        if right - left < box[2] or bottom - top < box[3]:
+            return None
+        if (left, top, right, bottom) == (0, 0) + tuple(size):
+            return None
+        return (left, top, right, bottom)
+
+    def remember(self, key, box):
+        '''Stores ``box`` ``(left, top, width, height)`` in screen pixels as
+        the latest location of ``key``.'''
+        self._boxes[key] = tuple(box)
+
+    def clear(self):
+        self._boxes.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def statistics(self):
+        return {'size': len(self._boxes),
+                'hits': self.hits,
+                'misses': self.misses}
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+from os.path import abspath, getmtime, normcase
+
+from ..errors import InvalidImageException
+from ..utils import LazyModule
+
+Image = LazyModule('PIL.Image')
+
+
+class ReferenceImageCache(object):
+    '''Size-bounded LRU cache of decoded reference images.
+
+    Entries are keyed by the normalized path of the image file and its
+    modification time, so a reference image that is changed on disk is
+    decoded again on next use. ``InvalidImageException`` is raised if the
+    file does not exist.
+    '''
+
+    def __init__(self, max_size=64):
+        self.max_size = int(max_size)
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+
+    def __len__(self):
+        return len(self._images)
+
+    def get(self, path):
+        path = normcase(abspath(path))
+        try:
+            key = (path, getmtime(path))
+        except OSError:
+            self._evict(path)
+            raise InvalidImageException('Image path not found: "%s".' % path)
+        image = self._images.pop(key, None)
+        if image is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._evict(path)
+            image = self._load(path)
+        if self.max_size > 0:
+            self._images[key] = image
+            while len(self._images) > self.max_size:
+                self._images.popitem(last=False)
+        return image
+
+    def _evict(self, path):
+        for key in [key for key in self._images if key[0] == path]:
+            del self._images[key]
+
+    def _load(self, path):
+        with open(path, 'rb') as image_file:
+            image = Image.open(image_file)
+            image.load()
+        return image
+
+    def clear(self):
+        self._images.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def statistics(self):
+        return {'size': len(self._images),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses}
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+class LibraryListener(object):
+    '''Library listener finishing the work of the library when a suite
+    ends, like writing the statistics summary and pending screenshots.'''
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self, library):
+        self.library = library
+
+    def end_suite(self, name, attributes):
+        self.library._end_suite(attributes.get('longname', name))
+
+    def close(self):
+        self.library._close()
@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple, OrderedDict
+from threading import Lock
+
+from ..errors import BackendException
+from ..utils import lazy_import, pyautogui as ag
+
+np = lazy_import('numpy')
+cv2 = lazy_import('cv2')
+
+
+Match = namedtuple('Match', 'left top width height score')
+
+MATCH_STRATEGIES = ('best', 'first')
+
+
+def get_match_strategy(strategy):
+    '''Returns ``strategy`` normalized or raises ``BackendException`` if it
+    is not one of ``MATCH_STRATEGIES``.'''
+    name = str(strategy).lower()
+    if name not in MATCH_STRATEGIES:
+        raise BackendException('Invalid match strategy "%s", valid '
+                               'strategies are: %s' %
+                               (strategy, ', '.join(MATCH_STRATEGIES)))
+    return name
+
+
+def image_size(image):
+    '''Returns ``(width, height)`` of a PIL image or a NumPy array.'''
+    if np is not None and isinstance(image, np.ndarray):
+        return image.shape[1], image.shape[0]
+    return image.size
+
+
+def crop(image, box):
+    '''Crops ``(left, top, right, bottom)`` from a PIL image or a NumPy
+    array.'''
+    if np is not None and isinstance(image, np.ndarray):
+        left, top, right, bottom = box
+        return image[top:bottom, left:right]
+    return image.crop(box)
+
+
+def suppress_overlapping(matches, max_overlap=0.5):
+    '''Non-maximum suppression: drops matches that overlap a better match
+    by more than ``max_overlap`` of their union. Matches without a score
+    are preferred in the given order.'''
+    if any(match.score is None for match in matches):
+        ordered = list(matches)
+    else:
+        ordered = sorted(matches, key=lambda match: -match.score)
+    kept = []
+    for match in ordered:
+        if all(_overlap(match, other) <= max_overlap for other in kept):
+            kept.append(match)
+    return kept
+
+
+def _overlap(first, second):
+    width = (min(first.left + first.width, second.left + second.width) -
+             max(first.left, second.left))
+    height = (min(first.top + first.height, second.top + second.height) -
+              max(first.top, second.top))
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    union = (first.width * first.height + second.width * second.height -
+             intersection)
+    return intersection / float(union)
+
+
+def to_array(image):
+    '''Converts a PIL image to an RGB NumPy array.'''
+    if isinstance(image, np.ndarray):
+        return image
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return np.asarray(image)
+
+
+def to_grayscale(pixels):
+    '''Converts an RGB NumPy array to grayscale exactly like PIL converts
+    images to mode ``L``.'''
+    if pixels.ndim == 2:
+        return pixels
+    pixels = pixels.astype(np.uint32)
+    return ((pixels[:, :, 0] * 19595 + pixels[:, :, 1] * 38470 +
+             pixels[:, :, 2] * 7471 + 0x8000) >> 16).astype(np.uint8)
+
+
+def to_image(image):
+    '''Converts an RGB NumPy array to a PIL image.'''
+    if np is not None and isinstance(image, np.ndarray):
+        from PIL import Image
+        return Image.fromarray(image)
+    return image
+
+
+class MatchingBackend(object):
+    '''Base class for the engines that find a reference image in a
+    screenshot.
+
+    ``locate`` returns a ``Match`` with the box of the match in screenshot
+    coordinates and its score between 0 and 1, or ``None`` if the image is
+    not found. Scores are ``None`` when the engine does not calculate them.
+    ``confidence`` is ``None`` for pixel-perfect matching.
+
+    ``locate_first`` returns the first match at least as good as
+    ``confidence`` scanning from top to bottom and left to right, and may
+    stop scanning there. Engines that cannot stop early return the best
+    match like ``locate``.
+
+    ``locate_all`` returns all matches, possibly overlapping each other.
+
+    Reference images given as two dimensional NumPy arrays are grayscale
+    and matched against the screenshot converted to grayscale.
+
+    ``parallel_bands`` tells whether matching parts of the screenshot
+    concurrently is faster, ie. whether the engine releases the GIL.
+    '''
+    name = None
+    parallel_bands = True
+
+    def __init__(self):
+        self._lock = Lock()
+        self._conversions = []
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def _as_array(self, haystack, grayscale=False):
+        # Folders match many reference images against the same screenshot,
+        # possibly interleaved with parts of it, so the conversions of the
+        # latest few screenshots are kept. Converting is done without the
+        # lock, so that bands of a screenshot are converted concurrently.
+        with self._lock:
+            for image, gray, array in self._conversions:
+                if image is haystack and gray == grayscale:
+                    return array
+        array = self._convert(haystack, grayscale)
+        with self._lock:
+            self._conversions = ([(haystack, grayscale, array)] +
+                                 self._conversions[:3])
+        return array
+
+    def _convert(self, image, grayscale=False):
+        if grayscale:
+            return to_grayscale(to_array(image))
+        return to_array(image)
+
+    def locate(self, needle, haystack, confidence=None):
+        raise NotImplementedError
+
+    def locate_first(self, needle, haystack, confidence=None):
+        return self.locate(needle, haystack, confidence)
+
+    def locate_all(self, needle, haystack, confidence=None):
+        raise NotImplementedError
+
+
+class PyscreezeBackend(MatchingBackend):
+    '''Matches with ``pyautogui.locate``, ie. with pyscreeze. Pixel-perfect
+    matching is done in pure Python and matching with confidence requires
+    OpenCV.'''
+    name = 'pyscreeze'
+    parallel_bands = False
+
+    def _convert(self, image, grayscale=False):
+        return to_image(image)
+
+    def _options(self, needle, confidence):
+        options = {'confidence': confidence} if confidence else {}
+        if np is not None and isinstance(needle, np.ndarray) and \
+                needle.ndim == 2:
+            options['grayscale'] = True
+        return options
+
+    def locate(self, needle, haystack, confidence=None):
+        options = self._options(needle, confidence)
+        needle = to_image(needle)
+        haystack = self._as_array(haystack)
+        try:
+            box = ag.locate(needle, haystack, **options)
+        except Exception as error:
+            # Newer pyscreeze versions raise instead of returning None.
+            if type(error).__name__ != 'ImageNotFoundException':
+                raise
+            box = None
+        if box is None:
+            return None
+        return Match(box[0], box[1], box[2], box[3], None)
+
+    def locate_all(self, needle, haystack, confidence=None):
+        options = self._options(needle, confidence)
+        needle = to_image(needle)
+        haystack = self._as_array(haystack)
+        return [Match(box[0], box[1], box[2], box[3], None)
+                for box in ag.locateAll(needle, haystack, **options)]
+
+
+class OpenCVBackend(MatchingBackend):
+    '''Matches with normalized cross-correlation of OpenCV
+    ``matchTemplate``. Pixel-perfect matching uses confidence 0.999 like
+    pyscreeze does.
+
+    ``locate_first`` matches ``first_rows`` rows of positions at a time and
+    stops at the first strip containing a match. The best match around the
+    first position scoring at least ``confidence`` is returned.'''
+    name = 'opencv'
+    first_rows = 64
+
+    @classmethod
+    def is_available(cls):
+        return cv2 is not None
+
+    def _match_template(self, needle, haystack):
+        needle = to_array(needle)
+        haystack = self._as_array(haystack, needle.ndim == 2)
+        height, width = needle.shape[:2]
+        if height > haystack.shape[0] or width > haystack.shape[1]:
+            return None, width, height
+        result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+        return result, width, height
+
+    def best_match(self, needle, haystack):
+        '''Returns the best scoring match regardless of its score or
+        ``None`` if the reference image is larger than the screenshot.'''
+        result, width, height = self._match_template(needle, haystack)
+        if result is None:
+            return None
+        _, score, _, (left, top) = cv2.minMaxLoc(result)
+        return Match(left, top, width, height, score)
+
+    def locate(self, needle, haystack, confidence=None):
+        confidence = 0.999 if confidence is None else confidence
+        match = self.best_match(needle, haystack)
+        if match is None or match.score < confidence:
+            return None
+        return match
+
+    def locate_first(self, needle, haystack, confidence=None):
+        confidence = 0.999 if confidence is None else confidence
+        needle = to_array(needle)
+        haystack = self._as_array(haystack, needle.ndim == 2)
+        height, width = needle.shape[:2]
+        positions = haystack.shape[0] - height + 1
+        if positions <= 0 or width > haystack.shape[1]:
+            return None
+        # Strips overlap by the height of the reference image, so they are
+        # kept at least that high to not match the same rows many times.
+        rows = max(self.first_rows, height)
+        for top in range(0, positions, rows):
+            result = cv2.matchTemplate(haystack[top:top + rows + height - 1],
+                                       needle, cv2.TM_CCOEFF_NORMED)
+            tops, lefts = np.nonzero(result >= confidence)
+            if len(tops):
+                return self._peak_below(needle, haystack, top + int(tops[0]),
+                                        int(lefts[0]))
+        return None
+
+    def _peak_below(self, needle, haystack, top, left):
+        # The first position scoring above confidence is usually on the
+        # slope of a peak, so the best position below it, within the size of
+        # the reference image, is returned instead.
+        height, width = needle.shape[:2]
+        left = max(left - width + 1, 0)
+        result = cv2.matchTemplate(
+            haystack[top:top + 2 * height - 1, left:left + 3 * width - 2],
+            needle, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        return Match(left + x, top + y, width, height, score)
+
+    def locate_all(self, needle, haystack, confidence=None):
+        confidence = 0.999 if confidence is None else confidence
+        result, width, height = self._match_template(needle, haystack)
+        if result is None:
+            return []
+        return matches_above(result, confidence, width, height)
+
+
+def matches_above(result, confidence, width, height):
+    '''Returns the matches of an OpenCV ``matchTemplate`` result scoring at
+    least ``confidence``.'''
+    tops, lefts = np.nonzero(result >= confidence)
+    scores = result[tops, lefts]
+    return [Match(left, top, width, height, score) for left, top, score
+            in zip(lefts.tolist(), tops.tolist(), scores.tolist())]
+
+
+def pack_pixels(image):
+    '''Packs an RGB image into a 2D array with one 32-bit integer per
+    pixel, so that pixels can be compared with a single operation.
+    Grayscale images keep their single value.'''
+    pixels = to_array(image)
+    if pixels.ndim == 2:
+        return pixels.astype(np.uint32)
+    packed = pixels[:, :, 0].astype(np.uint32) << 16
+    packed |= pixels[:, :, 1].astype(np.uint32) << 8
+    packed |= pixels[:, :, 2]
+    return packed
+
+
+class NumpyBackend(MatchingBackend):
+    '''Pixel-perfect matching vectorized with NumPy.
+
+    Candidate positions are the screen pixels equal to the first distinctive
+    pixel of the reference image. They are filtered with the other pixels of
+    the first row of the reference image, then with a sample of its other
+    pixels, and the few remaining candidates are verified completely.
+
+    Matching with confidence is done with OpenCV when it is installed.
+    '''
+    name = 'numpy'
+    sample_size = 64
+
+    def __init__(self):
+        super(NumpyBackend, self).__init__()
+        self._opencv = None
+        if OpenCVBackend.is_available():
+            self._opencv = OpenCVBackend()
+
+    @classmethod
+    def is_available(cls):
+        return np is not None
+
+    def _convert(self, image, grayscale=False):
+        if grayscale:
+            return pack_pixels(to_grayscale(to_array(image)))
+        return pack_pixels(image)
+
+    def _probes(self, needle):
+        # Pixels of the most common colour, often the background, match
+        # almost everywhere and filter out nothing, so they are skipped.
+        values, counts = np.unique(needle, return_counts=True)
+        background = values[counts.argmax()]
+        height, width = needle.shape
+        first_row = [(0, x) for x in range(width)
+                     if needle[0, x] != background]
+        others = np.argwhere(needle[1:] != background)
+        if len(others) > self.sample_size:
+            step = len(others) / float(self.sample_size)
+            others = others[(np.arange(self.sample_size) * step).astype(int)]
+        probes = first_row + [(y + 1, x) for y, x in others]
+        return probes or [(0, 0)]
+
+    def _locate_all(self, needle, haystack):
+        # Yields all pixel-perfect matches from top to bottom and left to
+        # right.
+        needle = to_array(needle)
+        haystack = self._as_array(haystack, needle.ndim == 2)
+        needle = pack_pixels(needle)
+        height, width = needle.shape
+        rows = haystack.shape[0] - height + 1
+        columns = haystack.shape[1] - width + 1
+        if rows <= 0 or columns <= 0:
+            return
+        probes = self._probes(needle)
+        y, x = probes[0]
+        ys, xs = np.nonzero(haystack[y:y + rows, x:x + columns] ==
+                            needle[y, x])
+        for y, x in probes[1:]:
+            if not len(ys):
+                return
+            keep = haystack[ys + y, xs + x] == needle[y, x]
+            ys, xs = ys[keep], xs[keep]
+        for top, left in zip(ys.tolist(), xs.tolist()):
+            if np.array_equal(haystack[top:top + height, left:left + width],
+                              needle):
+                yield Match(left, top, width, height, 1.0)
+
+    def locate(self, needle, haystack, confidence=None):
+        if confidence and self._opencv is not None:
+            return self._opencv.locate(needle, haystack, confidence)
+        return next(self._locate_all(needle, haystack), None)
+
+    def locate_first(self, needle, haystack, confidence=None):
+        if confidence and self._opencv is not None:
+            return self._opencv.locate_first(needle, haystack, confidence)
+        return next(self._locate_all(needle, haystack), None)
+
+    def locate_all(self, needle, haystack, confidence=None):
+        if confidence and self._opencv is not None:
+            return self._opencv.locate_all(needle, haystack, confidence)
+        return list(self._locate_all(needle, haystack))
+
+
+BACKENDS = OrderedDict()
+
+
+def register_matching_backend(backend):
+    '''Makes ``backend``, a ``MatchingBackend`` subclass, selectable by its
+    ``name``.'''
+    BACKENDS[backend.name] = backend
+    return backend
+
+
+for _backend in (NumpyBackend, OpenCVBackend, PyscreezeBackend):
+    register_matching_backend(_backend)
+
+
+def get_matching_backend(name='pyscreeze'):
+    '''Returns a new instance of the backend called ``name``. With ``auto``
+    the first available backend in the registration order is used.'''
+    name = str(name).lower()
+    if name == 'auto':
+        for backend in BACKENDS.values():
+            if backend.is_available():
+                return backend()
+    if name not in BACKENDS:
+        raise BackendException('Invalid matching backend "%s", valid '
+                               'backends are: %s' %
+                               (name, ', '.join(['auto'] + list(BACKENDS))))
+    if not BACKENDS[name].is_available():
+        raise BackendException('Matching backend "%s" is not available on '
+                               'this host.' % name)
+    return BACKENDS[name]()
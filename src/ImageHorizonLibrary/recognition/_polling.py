@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from time import sleep, time
+from zlib import crc32
+
+from ..errors import PollingException
+from ._tiles import TileDiff
+
+
+class PollingStrategy(object):
+    '''Decides how often waiting keywords search the screen.
+
+    ``fixed`` waits ``interval`` seconds between the attempts, ``backoff``
+    doubles the wait after every attempt up to ``max_interval`` and
+    ``change`` polls like ``fixed`` but skips matching while the captured
+    screen stays the same.
+    '''
+    STRATEGIES = ('fixed', 'backoff', 'change')
+
+    def __init__(self, strategy='fixed', interval=0.1, max_interval=None):
+        strategy = str(strategy).lower()
+        if strategy not in self.STRATEGIES:
+            raise PollingException('Invalid polling strategy "%s", valid '
+                                   'strategies are: %s' %
+                                   (strategy, ', '.join(self.STRATEGIES)))
+        try:
+            interval = float(interval)
+            if max_interval is None:
+                max_interval = max(interval, 1.0)
+            max_interval = float(max_interval)
+        except (TypeError, ValueError):
+            raise PollingException('Polling intervals must be numbers, got '
+                                   '"%s" and "%s".' % (interval, max_interval))
+        if interval < 0 or max_interval < interval:
+            raise PollingException('Polling interval must be between 0 and '
+                                   'maximum interval %s, got %s.' %
+                                   (max_interval, interval))
+        self.strategy = strategy
+        self.interval = interval
+        self.max_interval = max_interval
+
+    def start(self, timeout):
+        return Polling(self, float(timeout))
+
+
+class Polling(object):
+    '''State of a single wait. Iterating yields once per attempt and sleeps
+    between the attempts until the timeout expires. ``tiles`` tracks which
+    parts of the screen changed between the attempts.'''
+
+    def __init__(self, strategy, timeout):
+        self.strategy = strategy
+        self.stop_time = time() + timeout
+        self.attempts = 0
+        self.matches_skipped = 0
+        self._frame_hash = None
+        self.tiles = TileDiff()
+
+    def __iter__(self):
+        interval = self.strategy.interval
+        while True:
+            self.attempts += 1
+            yield self.attempts
+            remaining = self.stop_time - time()
+            if remaining <= 0:
+                return
+            sleep(min(interval, remaining))
+            if self.strategy.strategy == 'backoff':
+                interval = min(interval * 2, self.strategy.max_interval)
+
+    def frame_changed(self, frame):
+        '''Returns ``False`` if ``frame`` is identical to the frame seen on
+        the previous attempt and matching can therefore be skipped.'''
+        if self.strategy.strategy != 'change':
+            return True
+        frame_hash = (frame.size, crc32(frame.tobytes()))
+        changed = frame_hash != self._frame_hash
+        self._frame_hash = frame_hash
+        if not changed:
+            self.matches_skipped += 1
+        return changed
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+from ..utils import lazy_import
+from ._matching import (Match, OpenCVBackend, crop,
+                        register_matching_backend, to_array)
+
+cv2 = lazy_import('cv2')
+
+
+class CoarseToFineBackend(OpenCVBackend):
+    '''Matches first on a grayscale screenshot downscaled by ``factor`` and
+    then confirms the best candidates at full resolution.
+
+    The ``candidates`` best positions of the coarse match are matched again
+    with OpenCV in full color and full resolution, in windows slightly
+    larger than the reference image. Scores and ``confidence`` are thus the
+    same as with the ``opencv`` backend. Reference images too small to be
+    downscaled to at least ``min_size`` pixels are matched at full
+    resolution.
+    '''
+    name = 'coarse'
+    min_size = 16
+
+    def __init__(self, factor=4, candidates=32):
+        super(CoarseToFineBackend, self).__init__()
+        self.factor = int(factor)
+        self.candidates = int(candidates)
+        self._coarse_frames = []
+
+    def _downscale(self, pixels, factor):
+        height, width = pixels.shape[:2]
+        return cv2.resize(pixels, (max(width // factor, 1),
+                                   max(height // factor, 1)),
+                          interpolation=cv2.INTER_AREA)
+
+    def _grayscale(self, pixels):
+        # The coarse match only finds candidates, so the faster conversion
+        # of OpenCV is good enough.
+        if pixels.ndim == 2:
+            return pixels
+        return cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)
+
+    def _coarse(self, haystack, factor):
+        with self._lock:
+            for image, scale, array in self._coarse_frames:
+                if image is haystack and scale == factor:
+                    return array
+        array = self._downscale(self._grayscale(self._as_array(haystack)),
+                                factor)
+        with self._lock:
+            self._coarse_frames = ([(haystack, factor, array)] +
+                                   self._coarse_frames[:3])
+        return array
+
+    def _peaks(self, result, width, height):
+        # Yields the best positions of the coarse match, suppressing the
+        # neighbourhood of each found position.
+        result = result.copy()
+        for _ in range(self.candidates):
+            _, score, _, (left, top) = cv2.minMaxLoc(result)
+            if score <= -1:
+                return
+            yield left, top
+            result[max(top - height // 2, 0):top + height // 2 + 1,
+                   max(left - width // 2, 0):left + width // 2 + 1] = -1
+
+    def best_match(self, needle, haystack):
+        needle = to_array(needle)
+        height, width = needle.shape[:2]
+        # Small reference images are downscaled less, because too few
+        # pixels do not tell the image apart from its surroundings.
+        factor = min(self.factor, min(width, height) // self.min_size)
+        if factor < 2:
+            return super(CoarseToFineBackend, self).best_match(needle,
+                                                               haystack)
+        full = self._as_array(haystack, needle.ndim == 2)
+        if height > full.shape[0] or width > full.shape[1]:
+            return None
+        coarse_needle = self._downscale(self._grayscale(needle), factor)
+        result = cv2.matchTemplate(self._coarse(haystack, factor),
+                                   coarse_needle, cv2.TM_CCOEFF_NORMED)
+        best = None
+        margin = factor
+        for left, top in self._peaks(result, coarse_needle.shape[1],
+                                     coarse_needle.shape[0]):
+            left = max(min(left * factor - margin, full.shape[1] - width), 0)
+            top = max(min(top * factor - margin, full.shape[0] - height), 0)
+            window = (left, top,
+                      min(left + width + 2 * margin, full.shape[1]),
+                      min(top + height + 2 * margin, full.shape[0]))
+            fine = cv2.matchTemplate(crop(full, window), needle,
+                                     cv2.TM_CCOEFF_NORMED)
+            _, score, _, (x, y) = cv2.minMaxLoc(fine)
+            if best is None or score > best.score:
+                best = Match(left + x, top + y, width, height, score)
+        return best
+
+    def locate_first(self, needle, haystack, confidence=None):
+        # The coarse match ranks candidates by score, not by position.
+        return self.locate(needle, haystack, confidence)
+
+
+register_matching_backend(CoarseToFineBackend)
@@ -1,43 +1,108 @@
 # -*- coding: utf-8 -*-
-from os import listdir
-from os.path import abspath, isdir, isfile, join as path_join
-from time import time
+from concurrent.futures import ThreadPoolExecutor
+from os.path import isdir
 from contextlib import contextmanager
+from math import ceil
+from time import time
 
-import pyautogui as ag
 from robot.api import logger as LOGGER
 
 from ..errors import ImageNotFoundException, InvalidImageException
-from ..errors import ReferenceFolderException
+from ..errors import InvalidRegionException, ReferenceFolderException
+from ..errors import ImageVisibleException, ScreenNotSettledException
+from ..utils import pyautogui as ag
+from ._matching import (OpenCVBackend, crop, get_match_strategy,
+                        image_size, suppress_overlapping)
+from ._bundle import ReferenceBundle, is_bundle
+from ._reference_index import ReferenceIndex
+from ._screenshot_writer import annotate
+from ._tiles import TileDiff
 
 class _RecognizeImages(object):
 
-    def __normalize(self, path):
-        if (not self.reference_folder or
-                not isinstance(self.reference_folder, str) or
-                not isdir(self.reference_folder)):
-            raise ReferenceFolderException('Reference folder is invalid: '
-                                           '"%s"' % self.reference_folder)
-        if (not path or not isinstance(path, str)):
-            raise InvalidImageException('"%s" is invalid image name.' % path)
-        path = str(path.lower().replace(' ', '_'))
-        path = abspath(path_join(self.reference_folder, path))
-        if not path.endswith('.png') and not isdir(path):
-            path += '.png'
-        if not isfile(path) and not isdir(path):
-            raise InvalidImageException('Image path not found: "%s".' % path)
-        return path
-
-    def click_image(self, reference_image):
+    def _get_reference_index(self):
+        index = self._reference_index
+        if index is None or index.folder != self.reference_folder:
+            folder = self.reference_folder
+            if folder and isinstance(folder, str) and isdir(folder):
+                index = ReferenceIndex(folder)
+            elif is_bundle(folder):
+                index = ReferenceBundle(folder)
+            else:
+                raise ReferenceFolderException('Reference folder is invalid: '
+                                               '"%s"' % folder)
+            self._reference_index = index
+        return index
+
+    def _parse_region(self, region, relative_to=None):
+        if region is None or region == '':
+            return None
+        if isinstance(region, str):
+            if region.lower().startswith('window:'):
+                if relative_to is not None:
+                    raise InvalidRegionException('Window regions can not be '
+                                                 'relative to a location.')
+                return 'window:%s' % region.split(':', 1)[1].strip()
+            region = region.split(',')
+        try:
+            left, top, width, height = (int(float(value)) for value in region)
+            if relative_to is not None:
+                x, y = relative_to
+                left += int(x)
+                top += int(y)
+        except (TypeError, ValueError):
+            raise InvalidRegionException('Invalid region "%s".' % (region,))
+        if width <= 0 or height <= 0:
+            raise InvalidRegionException('Region width and height must be '
+                                         'positive, got "%s".' % (region,))
+        return (left, top, width, height)
+
+    def _window_region(self, title):
+        get_windows = getattr(ag, 'getWindowsWithTitle', None)
+        if get_windows is None:
+            raise InvalidRegionException('Finding windows by title is not '
+                                         'supported on this platform.')
+        windows = get_windows(title)
+        if not windows:
+            raise InvalidRegionException('Window "%s" was not found.' % title)
+        window = windows[0]
+        return (window.left, window.top, window.width, window.height)
+
+    def _search_region(self, region):
+        region = self._parse_region(region)
+        if region is None:
+            region = self.search_region
+        if isinstance(region, str):
+            region = self._window_region(region.split(':', 1)[1])
+        return region
+
+    def _capture(self, region):
+        '''Returns the screenshot to match against and the screen pixel
+        offset of its top left corner.'''
+        # A frame of an earlier keyword must not end up as the failure
+        # screenshot of this one.
+        self._last_frame = None
+        with self._statistics.measure('capture'):
+            if region is None:
+                return self._capture_backend.grab(), (0, 0)
+            scale = 2 if self.has_retina else 1
+            region = tuple(value * scale for value in region)
+            return self._capture_backend.grab(region), region[:2]
+
+    def click_image(self, reference_image, region=None):
         '''Finds the reference image on screen and clicks it once.
 
         ``reference_image`` is automatically normalized as described in the
         `Reference image names`.
+
+        ``region`` restricts the search to a part of the screen as described
+        in `Search region`.
         '''
-        center_location = self.locate(reference_image)
+        center_location = self.locate(reference_image, region)
         LOGGER.info('Clicking image "%s" in position %s' % (reference_image,
                                                             center_location))
-        ag.click(center_location)
+        with self._statistics.measure('click'):
+            ag.click(center_location)
         return center_location
 
     def _click_to_the_direction_of(self, direction, location, offset,
@@ -143,54 +208,250 @@ class _RecognizeImages(object):
         yield None
         self.keyword_on_failure = keyword
 
-    def _locate(self, reference_image, log_it=True):
-        is_dir = False
-        try:
-            if isdir(self.__normalize(reference_image)):
-                is_dir = True
-        except InvalidImageException:
-            pass
-        is_file = False
+    @contextmanager
+    def _use_match_strategy(self, strategy):
+        previous = self.match_strategy
+        if strategy:
+            self.match_strategy = get_match_strategy(strategy)
         try:
-            if isfile(self.__normalize(reference_image)):
-                is_file = True
-        except InvalidImageException:
-            pass
-        reference_image = self.__normalize(reference_image)
-
-        reference_images = []
-        if is_file:
-            reference_images = [reference_image]
-        elif is_dir:
-            for f in listdir(self.__normalize(reference_image)):
-                if not isfile(self.__normalize(path_join(reference_image, f))):
-                    raise InvalidImageException(
-                                            self.__normalize(reference_image))
-                reference_images.append(path_join(reference_image, f))
-
-        def try_locate(ref_image):
-            location = None
-            with self._suppress_keyword_on_failure():
+            yield None
+        finally:
+            self.match_strategy = previous
+
+    def _match(self, ref_image, needle, haystack):
+        confidence = self.confidence if self.has_cv else None
+        first = self.match_strategy == 'first'
+        with self._statistics.measure('match'):
+            if self.has_cv and self._scaling is not None:
+                locate = self._scaling.locate_first if first else \
+                    self._scaling.locate
+                return locate(needle, haystack, confidence, key=ref_image)
+            if self._bands is not None:
+                locate = self._bands.locate_first if first else \
+                    self._bands.locate
+                return locate(self._backend, needle, haystack, confidence)
+            locate = self._backend.locate_first if first else \
+                self._backend.locate
+            return locate(needle, haystack, confidence)
+
+    def _load_reference_image(self, ref_image):
+        with self._statistics.measure('decode'):
+            index = self._get_reference_index()
+            image = index.load(ref_image)
+            if image is None:
                 try:
-                    if self.has_cv and self.confidence:
-                        location = ag.locateOnScreen(ref_image,
-                                                     confidence=self.confidence)
-                    else:
-                        if self.confidence:
-                            LOGGER.warn("Can't set confidence because you don't "
-                                        "have OpenCV (python-opencv) installed "
-                                        "or a confidence level was not given.")
-                        location = ag.locateOnScreen(ref_image)
-                except ImageNotFoundException as ex:
-                    LOGGER.info(ex)
-                    pass
-            return location
+                    image = self._image_cache.get(ref_image)
+                except InvalidImageException:
+                    # Deleted after the folder was indexed, so the index is
+                    # built again on the next search.
+                    index.clear()
+                    raise
+            return image
+
+    def _try_locate(self, ref_image, haystack, offset=(0, 0)):
+        needle = self._load_reference_image(ref_image)
+        if self._result_cache is None:
+            return self._search(ref_image, needle, haystack, offset)
+        cache = self._result_cache
+        key = cache.key(haystack, needle,
+                        self.confidence if self.has_cv else None,
+                        tuple(offset) + tuple(image_size(haystack)),
+                        self.match_strategy)
+        cached = cache.get(key)
+        if cached is not None:
+            # The screen hash is perceptual, so the location is confirmed
+            # by matching the image there.
+            width, height = image_size(haystack)
+            area = (max(cached.left - 1, 0), max(cached.top - 1, 0),
+                    min(cached.left + cached.width + 1, width),
+                    min(cached.top + cached.height + 1, height))
+            match = self._match(ref_image, needle, crop(haystack, area))
+            if match is not None:
+                cache.hits += 1
+                match = match._replace(left=match.left + area[0],
+                                       top=match.top + area[1])
+                if self._hints is not None:
+                    self._remember_location(ref_image, match, offset)
+                return match
+            cache.discard(key)
+        cache.misses += 1
+        match = self._search(ref_image, needle, haystack, offset)
+        if match is not None:
+            cache.put(key, match)
+        return match
+
+    def _search(self, ref_image, needle, haystack, offset):
+        if self._hints is None:
+            return self._match(ref_image, needle, haystack)
+        area = self._hints.area(ref_image, offset, image_size(haystack))
+        if area is not None:
+            match = self._match(ref_image, needle, crop(haystack, area))
+            if match is not None:
+                self._hints.hits += 1
+                match = match._replace(left=match.left + area[0],
+                                       top=match.top + area[1])
+                self._remember_location(ref_image, match, offset)
+                return match
+            self._hints.misses += 1
+        match = self._match(ref_image, needle, haystack)
+        if match is not None:
+            self._remember_location(ref_image, match, offset)
+        return match
+
+    def _remember_location(self, ref_image, match, offset):
+        self._hints.remember(ref_image, (match.left + offset[0],
+                                         match.top + offset[1],
+                                         match.width, match.height))
+
+    def _locate_candidates(self, reference_images, haystack, offset):
+        return self._find_candidate(
+            reference_images,
+            lambda ref_image: self._try_locate(ref_image, haystack, offset))
+
+    def _find_candidate(self, reference_images, locate):
+        '''Returns the result of ``locate`` for the best scoring of
+        ``reference_images``, or for the first one found in their order with
+        match strategy ``first`` or without scores. They are tried
+        concurrently with ``matching_threads`` threads.'''
+        first = self.match_strategy == 'first'
+        if self.matching_threads < 2 or len(reference_images) < 2:
+            locations = (locate(ref_image) for ref_image in reference_images)
+            return self._pick_candidate(locations, first)
+        workers = min(self.matching_threads, len(reference_images))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(locate, ref_image)
+                       for ref_image in reference_images]
+            try:
+                return self._pick_candidate(
+                    (future.result() for future in futures), first)
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _pick_candidate(self, locations, first):
+        best = None
+        for location in locations:
+            if location is None:
+                continue
+            if first or location.score is None:
+                return location
+            if best is None or location.score > best.score:
+                best = location
+        return best
+
+    def _reference_images(self, reference_image):
+        '''Returns the path of ``reference_image`` and the list of the
+        image files it refers to.'''
+        index = self._get_reference_index()
+        if not reference_image or not isinstance(reference_image, str):
+            raise InvalidImageException('"%s" is invalid image name.' %
+                                        reference_image)
+        return index.resolve(str(reference_image.lower().replace(' ', '_')))
+
+    def _warn_about_missing_opencv(self):
+        if self.confidence and not self.has_cv:
+            LOGGER.warn("Can't set confidence because you don't "
+                        "have OpenCV (python-opencv) installed "
+                        "or a confidence level was not given.")
+        if self._scaling is not None and not self.has_cv:
+            LOGGER.warn("Can't search images at multiple scales because you "
+                        "don't have OpenCV (python-opencv) installed.")
+
+    def _center(self, location):
+        center_point = ag.center(location)
+        x = center_point.x
+        y = center_point.y
+        if self.has_retina:
+            x = x / 2
+            y = y / 2
+        return (x, y)
 
-        location = None
-        for ref_image in reference_images:
-            location = try_locate(ref_image)
-            if location != None:
-                break
+    def _locate_on_one_capture(self, references, region, polling=None):
+        '''Captures the screen once and matches all ``references``, pairs of
+        a normalized reference image and its image files, against it.
+        Returns a dictionary from the found reference images to their
+        locations on screen.'''
+        if self._server is not None:
+            return self._locate_on_server(references, region)
+        haystack, (left, top) = self._capture(self._search_region(region))
+        self._last_frame = (haystack, references)
+        locations = {}
+        if polling is not None and not polling.frame_changed(haystack):
+            self._statistics.increment('unchanged frames')
+            return locations
+        tiles = None
+        if polling is not None:
+            # Images not found on the previous attempt can only have
+            # appeared where the screen changed since.
+            tiles = polling.tiles
+            tiles.update(haystack)
+            if not tiles.is_changed():
+                self._statistics.increment('unchanged frames')
+                return locations
+        for reference_image, reference_images in references:
+            if tiles is None:
+                match = self._locate_candidates(reference_images, haystack,
+                                                (left, top))
+            else:
+                match = self._locate_in_changed_regions(
+                    reference_images, haystack, (left, top), tiles,
+                    self._reference_margin(reference_images))
+            self._statistics.increment('searches')
+            if match is not None:
+                self._statistics.increment('found')
+                locations[reference_image] = (match[0] + left, match[1] + top,
+                                              match[2], match[3])
+                self._match_scores[reference_image] = match.score
+        return locations
+
+    def _locate_on_server(self, references, region):
+        region = self._search_region(region)
+        if region is not None and self.has_retina:
+            region = tuple(value * 2 for value in region)
+        references = [(reference_image, list(reference_images))
+                      for reference_image, reference_images in references]
+        with self._statistics.measure('match'):
+            locations = self._server.locate(
+                references, region,
+                self.confidence if self.has_cv else None,
+                self._backend.name, self._capture_spec,
+                self._get_reference_index().root, self.match_strategy)
+        # The server does not return scores.
+        for reference_image in locations:
+            self._match_scores[reference_image] = None
+        self._last_frame = None
+        self._statistics.increment('searches', len(references))
+        self._statistics.increment('found', len(locations))
+        return locations
+
+    def _frame_for_failure(self):
+        if self.failure_screenshot == 'screen' or self._last_frame is None:
+            return None
+        haystack, references = self._last_frame
+        if self.failure_screenshot != 'annotated' or not self.has_cv:
+            return haystack
+        matcher = self._scaling if self._scaling is not None else \
+            OpenCVBackend()
+        best = None
+        for _, reference_images in references:
+            for ref_image in reference_images:
+                match = matcher.best_match(
+                    self._load_reference_image(ref_image), haystack)
+                if match is not None and (best is None or
+                                          match.score > best.score):
+                    best = match
+        if best is None:
+            return haystack
+        return annotate(haystack, best[:4], 'best match %.3f' % best.score)
+
+    def _locate(self, reference_image, log_it=True, region=None,
+                polling=None, with_score=False):
+        reference_image, reference_images = self._reference_images(
+            reference_image)
+        self._warn_about_missing_opencv()
+        location = self._locate_on_one_capture(
+            [(reference_image, reference_images)], region,
+            polling).get(reference_image)
 
         if location is None:
             if log_it:
@@ -198,38 +459,119 @@ class _RecognizeImages(object):
                             'on screen.' % reference_image)
             self._run_on_failure()
             raise ImageNotFoundException(reference_image)
+        self._last_frame = None
         if log_it:
             LOGGER.info('Image "%s" found at %r' % (reference_image, location))
-        center_point = ag.center(location)
-        x = center_point.x
-        y = center_point.y
-        if self.has_retina:
-            x = x / 2
-            y = y / 2
-        return (x, y)
-
-    def does_exist(self, reference_image):
+        if with_score:
+            return self._center(location) + \
+                (self._match_scores[reference_image],)
+        return self._center(location)
+
+    def _try_locate_all(self, ref_image, haystack):
+        needle = self._load_reference_image(ref_image)
+        confidence = self.confidence if self.has_cv else None
+        with self._statistics.measure('match'):
+            if self.has_cv and self._scaling is not None:
+                return self._scaling.locate_all(needle, haystack, confidence,
+                                                key=ref_image)
+            if self._bands is not None:
+                return self._bands.locate_all(self._backend, needle,
+                                              haystack, confidence)
+            return self._backend.locate_all(needle, haystack, confidence)
+
+    def locate_all(self, reference_image, region=None, with_scores=False):
+        '''Locates all occurrences of the image on screen.
+
+        The screen is captured and searched only once. Overlapping matches
+        of the same occurrence are reported only once. If
+        ``reference_image`` is a folder, occurrences of all images in the
+        folder are returned.
+
+        See `Reference image names` for documentation for ``reference_image``
+        and `Search region` for ``region``.
+
+        Returns a list of Python tuples ``(x, y)`` of the coordinates sorted
+        from top to bottom and left to right. The list is empty if the image
+        is not found. If ``with_scores`` is given a true value, tuples are
+        ``(x, y, score)``, where score is the similarity between 0 and 1, or
+        ``None`` with the ``pyscreeze`` `matching backend`.
+
+        | @{checkboxes}= | `Locate All` | checkbox unchecked |
+        | ${count}=      | Get Length   | ${checkboxes}      |
+        '''
+        reference_image, reference_images = self._reference_images(
+            reference_image)
+        self._warn_about_missing_opencv()
+        haystack, (left, top) = self._capture(self._search_region(region))
+        matches = []
+        for ref_image in reference_images:
+            matches.extend(self._try_locate_all(ref_image, haystack))
+        matches = suppress_overlapping(matches)
+        LOGGER.info('Image "%s" found %d time(s)' % (reference_image,
+                                                     len(matches)))
+        locations = []
+        for match in matches:
+            location = (match[0] + left, match[1] + top, match[2], match[3])
+            locations.append(self._center(location) + (match.score,))
+        locations.sort(key=lambda location: (location[1], location[0]))
+        if with_scores:
+            return locations
+        return [location[:2] for location in locations]
+
+    def does_exist(self, reference_image, region=None):
         '''Returns ``True`` if reference image was found on screen or
         ``False`` otherwise. Never fails.
 
         See `Reference image names` for documentation for ``reference_image``.
+
+        See `Search region` for documentation for ``region``.
         '''
         with self._suppress_keyword_on_failure():
             try:
-                return bool(self._locate(reference_image, log_it=False))
+                return bool(self._locate(reference_image, log_it=False,
+                                         region=region))
             except ImageNotFoundException:
+                self._last_frame = None
                 return False
 
-    def locate(self, reference_image):
+    def locate(self, reference_image, region=None, match_strategy=None,
+               with_score=False):
         '''Locate image on screen.
 
         Fails if image is not found on screen.
 
-        Returns Python tuple ``(x, y)`` of the coordinates.
+        ``region`` restricts the search to a part of the screen as described
+        in `Search region`.
+
+        ``match_strategy`` is ``best`` or ``first`` and overrides `Set Match
+        Strategy` for this search. See `Match strategy`.
+
+        Returns Python tuple ``(x, y)`` of the coordinates. If
+        ``with_score`` is given a true value, the tuple is ``(x, y,
+        score)`` like with `Locate All`.
+
+        | ${x} | ${y} | ${score}= | `Locate` | button OK | match_strategy=first | with_score=True |
         '''
-        return self._locate(reference_image)
+        with self._use_match_strategy(match_strategy):
+            return self._locate(reference_image, region=region,
+                                with_score=with_score)
+
+    def get_matched_scale(self, reference_image):
+        '''Returns the scale at which ``reference_image`` was last found.
 
-    def wait_for(self, reference_image, timeout=10):
+        Returns ``None`` if the image has not been found with a scale range
+        set. See `Scaling` for details.
+        '''
+        if self._scaling is None:
+            return None
+        for ref_image in self._reference_images(reference_image)[1]:
+            scale = self._scaling.matched_scales.get(ref_image)
+            if scale is not None:
+                return scale
+        return None
+
+    def wait_for(self, reference_image, timeout=10, region=None,
+                 match_strategy=None, with_score=False):
         '''Tries to locate given image from the screen for given time.
 
         Fail if the image is not found on the screen after ``timeout`` has
@@ -237,21 +579,253 @@ class _RecognizeImages(object):
 
         See `Reference image names` for documentation for ``reference_image``.
 
-        ``timeout`` is given in seconds.
+        ``timeout`` is given in seconds. The screen is searched as often as
+        the `polling strategy` allows, after the first attempt only where it
+        has changed.
+
+        See `Search region` for documentation for ``region`` and `Locate`
+        for ``match_strategy`` and ``with_score``.
 
         Returns Python tuple ``(x, y)`` of the coordinates.
         '''
-        stop_time = time() + int(timeout)
+        polling = self._polling.start(timeout)
         location = None
-        with self._suppress_keyword_on_failure():
-            while time() < stop_time:
+        with self._suppress_keyword_on_failure(), \
+                self._use_match_strategy(match_strategy), \
+                self._statistics.measure('wait'):
+            for _ in polling:
                 try:
-                    location = self._locate(reference_image, log_it=False)
+                    location = self._locate(reference_image, log_it=False,
+                                            region=region, polling=polling,
+                                            with_score=with_score)
                     break
                 except ImageNotFoundException:
                     pass
+        self._statistics.increment('polls', polling.attempts)
         if location is None:
             self._run_on_failure()
-            raise ImageNotFoundException(self.__normalize(reference_image))
+            raise ImageNotFoundException(
+                self._reference_images(reference_image)[0])
         LOGGER.info('Image "%s" found at %r' % (reference_image, location))
         return location
+
+    def _reference_margin(self, reference_images):
+        '''Returns the largest width and height of ``reference_images`` at
+        the largest scale they are searched at.'''
+        scale = 1.0
+        if self.has_cv and self._scaling is not None:
+            scale = max(self._scaling.scales)
+        margin = (1, 1)
+        for ref_image in reference_images:
+            width, height = image_size(self._load_reference_image(ref_image))
+            margin = (max(margin[0], int(ceil(width * scale))),
+                      max(margin[1], int(ceil(height * scale))))
+        return margin
+
+    def _locate_in_changed_regions(self, reference_images, haystack, offset,
+                                   tiles, margin):
+        '''Matches ``reference_images`` only in the parts of ``haystack``
+        that changed on the latest ``tiles`` update.'''
+        boxes = None if tiles.changed is None else tiles.regions(margin)
+        if boxes is None or boxes == [(0, 0) + image_size(haystack)]:
+            return self._locate_candidates(reference_images, haystack,
+                                           offset)
+        return self._find_candidate(
+            reference_images,
+            lambda ref_image: self._locate_in_boxes(ref_image, haystack,
+                                                    offset, boxes))
+
+    def _locate_in_boxes(self, ref_image, haystack, offset, boxes):
+        # Returns the match that searching the whole screen would have
+        # returned, if it is inside one of the boxes.
+        matches = []
+        for box in boxes:
+            match = self._try_locate(ref_image, crop(haystack, box),
+                                     (offset[0] + box[0], offset[1] + box[1]))
+            if match is not None:
+                matches.append(match._replace(left=match.left + box[0],
+                                              top=match.top + box[1]))
+        if not matches:
+            return None
+        matches.sort(key=lambda match: (match.top, match.left))
+        if self.match_strategy == 'first' or \
+                any(match.score is None for match in matches):
+            return matches[0]
+        return max(matches, key=lambda match: match.score)
+
+    def wait_until_image_vanishes(self, reference_image, timeout=10,
+                                  region=None):
+        '''Waits until the reference image is no longer on the screen.
+
+        The first attempt searches the whole screen. Later attempts compare
+        the screen with the previous attempt in small tiles: while the area
+        where the image was found stays the same, the image is not matched
+        at all, and otherwise it is matched first in the changed parts of
+        the screen. Only if it is not found there, the whole screen is
+        searched to confirm it is gone. Waiting for a spinner to disappear
+        thus costs mostly screen captures.
+
+        Fails if the image is still on the screen after ``timeout`` has
+        expired. See `Wait For` for documentation for the arguments.
+
+        | `Click Image`               | button Save |            |
+        | `Wait Until Image Vanishes` | spinner     | timeout=30 |
+        '''
+        reference_image, reference_images = self._reference_images(
+            reference_image)
+        self._warn_about_missing_opencv()
+        margin = self._reference_margin(reference_images)
+        polling = self._polling.start(timeout)
+        tiles = TileDiff()
+        match = None
+        vanished = False
+        with self._statistics.measure('wait'):
+            for _ in polling:
+                haystack, offset = self._capture(self._search_region(region))
+                self._last_frame = (haystack, [(reference_image,
+                                                reference_images)])
+                tiles.update(haystack)
+                if match is not None and not tiles.is_changed(match[:4]):
+                    self._statistics.increment('unchanged frames')
+                    continue
+                match = self._locate_in_changed_regions(
+                    reference_images, haystack, offset, tiles, margin)
+                if match is None and tiles.changed is not None:
+                    # Other occurrences may be where nothing changed.
+                    match = self._locate_candidates(reference_images,
+                                                    haystack, offset)
+                self._statistics.increment('searches')
+                if match is not None:
+                    self._statistics.increment('found')
+                else:
+                    vanished = True
+                    break
+        self._statistics.increment('polls', polling.attempts)
+        if not vanished:
+            self._run_on_failure()
+            raise ImageVisibleException(reference_image)
+        self._last_frame = None
+        LOGGER.info('Image "%s" is not on screen' % reference_image)
+
+    def wait_for_screen_to_settle(self, timeout=10, stable_time=1,
+                                  region=None):
+        '''Waits until the screen has not changed for ``stable_time``
+        seconds.
+
+        This is useful before locating images on a screen that is still
+        being drawn, for example during animations. The screen is captured
+        as often as the `polling strategy` allows and compared with the
+        previous capture. ``region`` restricts the comparison to a part of
+        the screen as described in `Search region`, which allows ignoring
+        parts that keep changing, like clocks.
+
+        Fails if the screen has not settled after ``timeout`` has expired.
+        Returns the number of seconds waited.
+
+        | `Wait For Screen To Settle` | timeout=5 | stable_time=0.5 |
+        '''
+        stable_time = float(stable_time)
+        polling = self._polling.start(timeout)
+        tiles = TileDiff()
+        start = stable_since = time()
+        settled = False
+        with self._statistics.measure('wait'):
+            for _ in polling:
+                haystack, _ = self._capture(self._search_region(region))
+                self._last_frame = (haystack, [])
+                tiles.update(haystack)
+                now = time()
+                if tiles.is_changed():
+                    stable_since = now
+                elif now - stable_since >= stable_time:
+                    settled = True
+                    break
+        self._statistics.increment('polls', polling.attempts)
+        if not settled:
+            self._run_on_failure()
+            raise ScreenNotSettledException('Screen did not settle for %s '
+                                            'seconds in %s seconds.' %
+                                            (stable_time, timeout))
+        self._last_frame = None
+        LOGGER.info('Screen settled in %.2f seconds' % (now - start))
+        return now - start
+
+    def _wait_for_images(self, reference_images, timeout, region,
+                         require_all):
+        if not reference_images:
+            raise InvalidImageException('No reference images given.')
+        references = [self._reference_images(reference_image)
+                      for reference_image in reference_images]
+        self._warn_about_missing_opencv()
+        expected = set(reference for reference, _ in references)
+        polling = self._polling.start(timeout)
+        locations = {}
+        with self._statistics.measure('wait'):
+            for _ in polling:
+                missing = [reference for reference in references
+                           if reference[0] not in locations]
+                locations.update(self._locate_on_one_capture(missing, region,
+                                                             polling))
+                if locations and (not require_all or
+                                  expected.issubset(locations)):
+                    break
+        self._statistics.increment('polls', polling.attempts)
+        if locations and (not require_all or expected.issubset(locations)):
+            self._last_frame = None
+        return [locations.get(reference) for reference, _ in references]
+
+    def wait_for_any(self, *reference_images, timeout=10, region=None):
+        '''Waits until any of the given images appears on the screen.
+
+        All images are matched against the same screen capture on each
+        attempt, so waiting for many images costs only one capture per
+        attempt. Fails if none of the images is found on the screen after
+        ``timeout`` has expired.
+
+        See `Reference image names` for documentation for
+        ``reference_images``, `Wait For` for ``timeout`` and `Search region`
+        for ``region``.
+
+        Returns the name of the found image and its coordinates ``(x, y)``.
+        If many images are found at the same time, the one given first is
+        returned.
+
+        | ${image} | ${location}= | `Wait For Any` | success dialog | error dialog | timeout=30 |
+        '''
+        locations = self._wait_for_images(reference_images, timeout, region,
+                                          require_all=False)
+        for reference_image, location in zip(reference_images, locations):
+            if location is not None:
+                location = self._center(location)
+                LOGGER.info('Image "%s" found at %r' % (reference_image,
+                                                        location))
+                return reference_image, location
+        self._run_on_failure()
+        raise ImageNotFoundException(', '.join(reference_images))
+
+    def wait_for_all(self, *reference_images, timeout=10, region=None):
+        '''Waits until all of the given images have appeared on the screen.
+
+        Each attempt captures the screen once and matches the images that
+        have not been found yet. An image found on an earlier attempt is not
+        searched again, even if it has since disappeared. Fails if some of
+        the images are not found after ``timeout`` has expired.
+
+        See `Wait For Any` for documentation for the arguments.
+
+        Returns a list of coordinates ``(x, y)`` of the images in the order
+        the images were given.
+
+        | ${title} | ${button}= | `Wait For All` | title | button OK |
+        '''
+        locations = self._wait_for_images(reference_images, timeout, region,
+                                          require_all=True)
+        missing = [reference_image for reference_image, location
+                   in zip(reference_images, locations) if location is None]
+        if missing:
+            self._run_on_failure()
+            raise ImageNotFoundException(', '.join(missing))
+        locations = [self._center(location) for location in locations]
+        LOGGER.info('Images %s found at %r' % (', '.join(reference_images),
+                                               locations))
+        return locations
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+from os import listdir, stat, walk
+from os.path import abspath, isdir, isfile, join as path_join, normcase, sep
+
+from ..errors import InvalidImageException
+
+
+def path_key(path):
+    '''Returns the key of ``path`` in the index. Reference image names are
+    lower cased, so keys ignore case like the file systems of Windows and
+    macOS do.'''
+    return normcase(path).lower()
+
+
+class ReferenceIndex(object):
+    '''Index of the reference images in a reference folder and its
+    subfolders.
+
+    The folder is walked once, on first use, and reference images are then
+    resolved with dictionary lookups instead of querying the file system.
+    When a name is not found, the folder is walked again, so images added
+    during the execution are found too. Paths outside the folder, like
+    ``../other/image.png``, are resolved from the file system.
+    '''
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.root = abspath(folder)
+        self.builds = 0
+        self._files = None
+        self._folders = None
+
+    def _build(self):
+        files, folders = {}, {}
+        visited = set()
+        for directory, dirnames, filenames in walk(self.root,
+                                                   followlinks=True):
+            # Symbolic links pointing to a parent folder are walked once.
+            info = stat(directory)
+            if (info.st_dev, info.st_ino) in visited:
+                dirnames[:] = []
+                continue
+            visited.add((info.st_dev, info.st_ino))
+            paths = [path_join(directory, name) for name in filenames]
+            for path in paths:
+                self._add(files, path, path)
+            # Like before the index, folders containing other folders are
+            # not valid reference images.
+            self._add(folders, directory,
+                      (directory, None if dirnames else sorted(paths)))
+        self._files, self._folders = files, folders
+        self.builds += 1
+
+    def _add(self, table, path, value):
+        # Of paths differing only in case, the lower case one is used like
+        # before the index on case sensitive file systems.
+        key = path_key(path)
+        relative = path[len(self.root):]
+        if key not in table or relative == relative.lower():
+            table[key] = value
+
+    def _find(self, path):
+        key = path_key(path)
+        if key in self._folders:
+            return self._folders[key]
+        if not key.endswith('.png'):
+            key += '.png'
+        if key in self._files:
+            path = self._files[key]
+            return path, [path]
+        return None
+
+    def _find_outside(self, path):
+        if not path.endswith('.png') and not isdir(path):
+            path += '.png'
+        if isfile(path):
+            return path, [path]
+        if isdir(path):
+            images = [path_join(path, name) for name in sorted(listdir(path))]
+            return path, images if all(map(isfile, images)) else None
+        return None
+
+    def resolve(self, name):
+        '''Returns the path of the reference image or folder ``name`` and
+        the list of the image files in it. ``name`` must already be
+        normalized.'''
+        path = abspath(path_join(self.root, name))
+        if not normcase(path).startswith(normcase(self.root) + sep):
+            found = self._find_outside(path)
+        else:
+            if self._files is None:
+                self._build()
+            found = self._find(path)
+            if found is None:
+                self._build()
+                found = self._find(path)
+        if found is None:
+            if not path.endswith('.png'):
+                path += '.png'
+            raise InvalidImageException('Image path not found: "%s".' % path)
+        path, images = found
+        if images is None:
+            raise InvalidImageException(path)
+        return path, images
+
+    def load(self, path):
+        '''Returns the image ``path`` if the index stores images itself and
+        ``None`` if the image must be read from the file.'''
+        return None
+
+    def clear(self):
+        self._files = self._folders = None
+
+    def statistics(self):
+        return {'files': len(self._files or ()),
+                'folders': len(self._folders or ()),
+                'builds': self.builds}
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import time
+
+from collections import OrderedDict
+from hashlib import sha1
+from threading import Lock
+
+from ..errors import ImageHorizonLibraryError
+from ..utils import LazyModule, lazy_import
+from ._matching import Match, to_array, to_grayscale
+
+np = lazy_import('numpy')
+sqlite3 = LazyModule('sqlite3')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS matches (
+    key TEXT PRIMARY KEY,
+    left INTEGER, top INTEGER, width INTEGER, height INTEGER, score REAL,
+    used REAL
+);
+CREATE INDEX IF NOT EXISTS matches_used ON matches (used);
+'''
+
+
+def frame_hash(image, grid=64, levels=16):
+    '''Returns a perceptual hash of a screenshot.
+
+    The screenshot is reduced to ``grid`` x ``grid`` cells of average
+    brightness quantized to ``levels`` levels, so screenshots that differ
+    only by a few pixels usually have the same hash.'''
+    pixels = to_array(image)
+    height, width = pixels.shape[:2]
+    pixels = to_grayscale(pixels[::4, ::4])
+    rows, columns = min(grid, pixels.shape[0]), min(grid, pixels.shape[1])
+    cell_height = pixels.shape[0] // rows
+    cell_width = pixels.shape[1] // columns
+    cells = pixels[:rows * cell_height, :columns * cell_width].reshape(
+        rows, cell_height, columns, cell_width).mean(axis=(1, 3))
+    quantized = (cells // (256 // levels)).astype('uint8')
+    return sha1(b'%dx%d:' % (width, height) +
+                quantized.tobytes()).hexdigest()
+
+
+def template_hash(image):
+    '''Returns an exact hash of the pixels of a reference image.'''
+    pixels = to_array(image)
+    return sha1(repr(pixels.shape).encode('ASCII') +
+                pixels.tobytes()).hexdigest()
+
+
+class MatchResultCache(object):
+    '''Match results persisted in an SQLite database.
+
+    Results are keyed by a perceptual hash of the screenshot, an exact hash
+    of the reference image, the confidence and the searched region, so a
+    search repeated on the same screen, for example when a failed test is
+    run again, is answered from the cache. Because the screenshot hash is
+    perceptual, the library confirms a cached location by matching the
+    reference image there before using it.
+
+    At most ``max_size`` results are kept; the least recently used are
+    evicted first. The database can be shared by many processes. Hashing
+    the screenshots requires NumPy.
+    '''
+
+    def __init__(self, path, max_size=1000):
+        if np is None:
+            raise ImageHorizonLibraryError('Result cache requires numpy, '
+                                           'which is not installed.')
+        self.path = path
+        self.max_size = int(max_size)
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._lock = Lock()
+        self._frame = (None, None)
+        self._templates = OrderedDict()
+
+    def _connect(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=10,
+                                         isolation_level=None,
+                                         check_same_thread=False)
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _frame_hash(self, haystack):
+        # All reference images are matched against the same screenshot, so
+        # it is hashed only once.
+        image, digest = self._frame
+        if image is not haystack:
+            digest = frame_hash(haystack)
+            self._frame = (haystack, digest)
+        return digest
+
+    def _template_hash(self, needle):
+        # Reference images come from the image cache and are the same
+        # objects on every search. Keeping them here keeps their ids valid.
+        entry = self._templates.pop(id(needle), None)
+        if entry is None or entry[0] is not needle:
+            entry = (needle, template_hash(needle))
+        self._templates[id(needle)] = entry
+        while len(self._templates) > 256:
+            self._templates.popitem(last=False)
+        return entry[1]
+
+    def key(self, haystack, needle, confidence, region, strategy='best'):
+        '''Returns the cache key of matching ``needle`` with ``confidence``
+        and match ``strategy`` against ``haystack`` captured from ``region``
+        ``(left, top, width, height)``.'''
+        with self._lock:
+            parts = (self._frame_hash(haystack), self._template_hash(needle),
+                     confidence, tuple(region), strategy)
+        return sha1(repr(parts).encode('ASCII')).hexdigest()
+
+    def get(self, key):
+        '''Returns the cached ``Match`` of ``key`` or ``None``.'''
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                'SELECT left, top, width, height, score FROM matches '
+                'WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE matches SET used = ? WHERE key = ?',
+                               (time.time(), key))
+        return Match(*row)
+
+    def put(self, key, match):
+        with self._lock:
+            connection = self._connect()
+            connection.execute('INSERT OR REPLACE INTO matches '
+                               'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                               (key,) + tuple(match) + (time.time(),))
+            connection.execute('DELETE FROM matches WHERE key IN '
+                               '(SELECT key FROM matches ORDER BY used DESC '
+                               'LIMIT -1 OFFSET ?)', (self.max_size,))
+
+    def discard(self, key):
+        with self._lock:
+            self._connect().execute('DELETE FROM matches WHERE key = ?',
+                                    (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute(
+                'SELECT COUNT(*) FROM matches').fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute('DELETE FROM matches')
+            self._templates.clear()
+            self._frame = (None, None)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def statistics(self):
+        return {'size': len(self),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses}
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+from ..errors import InvalidScaleException
+from ..utils import lazy_import
+from ._matching import Match, MatchingBackend, matches_above, to_array
+
+cv2 = lazy_import('cv2')
+
+
+class MultiScaleMatcher(MatchingBackend):
+    '''Matches reference images over a range of scales with OpenCV.
+
+    Reference images captured with one display scaling are found on screens
+    using another one by resizing the reference image to every scale between
+    ``min_scale`` and ``max_scale`` in ``step`` increments and keeping the
+    best match. When ``remember`` is true, the scale an image was last found
+    at is tried first and the other scales only if that fails.
+    '''
+
+    def __init__(self, min_scale=1.0, max_scale=1.0, step=0.05,
+                 remember=True):
+        try:
+            min_scale, max_scale, step = (float(min_scale), float(max_scale),
+                                          float(step))
+        except (TypeError, ValueError):
+            raise InvalidScaleException('Invalid scale range "%s, %s" with '
+                                        'step "%s".' %
+                                        (min_scale, max_scale, step))
+        if not 0 < min_scale <= max_scale or step <= 0:
+            raise InvalidScaleException('Scale range must be positive and '
+                                        'step greater than zero, got '
+                                        '"%s, %s" with step "%s".' %
+                                        (min_scale, max_scale, step))
+        count = int(round((max_scale - min_scale) / step)) + 1
+        scales = [round(min_scale + i * step, 4) for i in range(count)]
+        scales = [scale for scale in scales if scale <= max_scale]
+        self.scales = sorted(scales, key=lambda scale: abs(scale - 1.0))
+        self.remember = remember
+        self.matched_scales = {}
+        super(MultiScaleMatcher, self).__init__()
+
+    @classmethod
+    def is_available(cls):
+        return cv2 is not None
+
+    def _match_template(self, needle, haystack, scale):
+        if scale != 1.0:
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+            needle = cv2.resize(needle, None, fx=scale, fy=scale,
+                                interpolation=interpolation)
+        height, width = needle.shape[:2]
+        if (not height or not width or height > haystack.shape[0] or
+                width > haystack.shape[1]):
+            return None, width, height
+        result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+        return result, width, height
+
+    def _match(self, needle, haystack, scale):
+        result, width, height = self._match_template(needle, haystack, scale)
+        if result is None:
+            return None
+        _, score, _, (left, top) = cv2.minMaxLoc(result)
+        return Match(left, top, width, height, score)
+
+    def locate(self, needle, haystack, confidence=None, key=None):
+        '''Returns the best match at least as good as ``confidence`` or
+        ``None``. ``key`` identifies the reference image for remembering the
+        matched scale.'''
+        confidence = 0.999 if confidence is None else confidence
+        needle = to_array(needle)
+        haystack = self._as_array(haystack, needle.ndim == 2)
+        scales = self.scales
+        remembered = self.matched_scales.get(key) if self.remember else None
+        if remembered is not None:
+            match = self._match(needle, haystack, remembered)
+            if match is not None and match.score >= confidence:
+                return match
+            scales = [scale for scale in scales if scale != remembered]
+        best, best_scale = self._best_match(needle, haystack, scales)
+        if best is None or best.score < confidence:
+            return None
+        self.matched_scales[key] = best_scale
+        return best
+
+    def locate_first(self, needle, haystack, confidence=None, key=None):
+        '''Returns the best match at the first scale, in the order they are
+        tried, where it is at least as good as ``confidence``, or
+        ``None``.'''
+        confidence = 0.999 if confidence is None else confidence
+        needle = to_array(needle)
+        haystack = self._as_array(haystack, needle.ndim == 2)
+        scales = self.scales
+        remembered = self.matched_scales.get(key) if self.remember else None
+        if remembered is not None:
+            scales = [remembered] + [scale for scale in scales
+                                     if scale != remembered]
+        for scale in scales:
+            match = self._match(needle, haystack, scale)
+            if match is not None and match.score >= confidence:
+                self.matched_scales[key] = scale
+                return match
+        return None
+
+    def _best_match(self, needle, haystack, scales):
+        best, best_scale = None, None
+        for scale in scales:
+            match = self._match(needle, haystack, scale)
+            if match is not None and (best is None or
+                                      match.score > best.score):
+                best, best_scale = match, scale
+        return best, best_scale
+
+    def best_match(self, needle, haystack):
+        '''Returns the best scoring match over all scales regardless of
+        its score, or ``None``.'''
+        needle = to_array(needle)
+        return self._best_match(needle,
+                                self._as_array(haystack, needle.ndim == 2),
+                                self.scales)[0]
+
+    def locate_all(self, needle, haystack, confidence=None, key=None):
+        '''Returns all matches at least as good as ``confidence`` at the
+        scale where the best match is found.'''
+        if self.locate(needle, haystack, confidence, key) is None:
+            return []
+        confidence = 0.999 if confidence is None else confidence
+        needle = to_array(needle)
+        result, width, height = self._match_template(
+            needle, self._as_array(haystack, needle.ndim == 2),
+            self.matched_scales[key])
+        return matches_above(result, confidence, width, height)
@@ -3,11 +3,11 @@ from os.path import abspath, join as path_join
 from random import choice
 from string import ascii_lowercase
 
-import pyautogui as ag
 from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
 from robot.api import logger as LOGGER
 
 from ..errors import ScreenshotFolderException
+from ._screenshot_writer import save_image
 
 
 class _Screenshot(object):
@@ -19,7 +19,8 @@ class _Screenshot(object):
             LOGGER.info('Could not get suite name, using '
                         'default naming scheme')
             path = 'ImageHorizon-screenshot'
-        path = '%s-%d.png' % (path, self.screenshot_counter)
+        path = '%s-%d.%s' % (path, self.screenshot_counter,
+                             self.screenshot_format)
         self.screenshot_counter += 1
         return path
 
@@ -36,6 +37,13 @@ class _Screenshot(object):
         running integer appended. If this keyword is used outside of Robot
         Framework execution, file name is this library's name with running
         integer appended.
+
+        The format, size and writing of the screenshot can be configured
+        when `importing` the library. When this keyword is run because an
+        image was not found, it can save the screen the failed search saw
+        as described in `Failure screenshots`. With ``async_screenshots`` the
+        screenshot is written in the background and this keyword returns as
+        soon as the screen is captured.
         '''
         target_dir = self.screenshot_folder if self.screenshot_folder else ''
         if not isinstance(target_dir, str):
@@ -45,4 +53,21 @@ class _Screenshot(object):
         path = abspath(path_join(target_dir, path))
         LOGGER.info('Screenshot taken: {0}<br/><img src="{0}" '
                     'width="100%" />'.format(path), html=True)
-        ag.screenshot(path)
+        with self._statistics.measure('screenshot'):
+            self._save_screenshot(path)
+
+    def _save_screenshot(self, path):
+        # When run on failure, the frame the failed search saw is saved
+        # instead of capturing the screen again.
+        image = self._failure_frame
+        if image is None:
+            if (self._screenshot_writer is None and
+                    self.screenshot_format == 'png' and
+                    self.screenshot_scale == 1.0):
+                self._capture_backend.save(path)
+                return
+            image = self._capture_backend.grab()
+        if self._screenshot_writer is not None:
+            self._screenshot_writer.submit(image, path, self.screenshot_scale)
+        else:
+            save_image(image, path, self.screenshot_scale)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from os.path import splitext
+from queue import Queue
+from threading import Lock, Thread
+
+from ..utils import LazyModule
+from ._matching import image_size, to_image
+
+Image = LazyModule('PIL.Image')
+ImageDraw = LazyModule('PIL.ImageDraw')
+
+FORMATS = {'png': 'PNG', 'jpg': 'JPEG', 'jpeg': 'JPEG', 'webp': 'WEBP'}
+
+
+def save_image(image, path, scale=1.0, quality=85):
+    '''Saves a PIL image or an RGB NumPy array to ``path`` in the format
+    given by its extension, resized by ``scale``.'''
+    image = to_image(image)
+    if scale != 1.0:
+        width, height = image_size(image)
+        image = image.resize((max(int(width * scale), 1),
+                              max(int(height * scale), 1)), Image.BICUBIC)
+    image_format = FORMATS[splitext(path)[1][1:].lower()]
+    if image_format == 'PNG':
+        image.save(path, image_format)
+        return
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    image.save(path, image_format, quality=quality)
+
+
+def annotate(image, box, label=None):
+    '''Returns a copy of ``image`` with the ``(left, top, width, height)``
+    ``box`` outlined in red and ``label`` written above it.'''
+    image = to_image(image).convert('RGB')
+    draw = ImageDraw.Draw(image)
+    left, top, width, height = box
+    draw.rectangle((left, top, left + width - 1, top + height - 1),
+                   outline=(255, 0, 0), width=3)
+    if label:
+        draw.text((left, max(top - 12, 0)), label, fill=(255, 0, 0))
+    return image
+
+
+class ScreenshotWriter(object):
+    '''Encodes and writes screenshots in a background thread.
+
+    ``submit`` returns as soon as the image is queued. At most
+    ``queue_size`` screenshots wait to be written; when the queue is full,
+    ``submit`` waits for the writer to catch up. ``flush`` waits until all
+    queued screenshots are written and returns the errors that occurred.
+    '''
+
+    def __init__(self, queue_size=8):
+        self._queue = Queue(maxsize=int(queue_size))
+        self._lock = Lock()
+        self._thread = None
+        self._errors = []
+
+    def submit(self, image, path, scale=1.0, quality=85):
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._write,
+                                      name='ImageHorizonScreenshotWriter')
+                self._thread.daemon = True
+                self._thread.start()
+        self._queue.put((image, path, scale, quality))
+
+    def _write(self):
+        while True:
+            image, path, scale, quality = self._queue.get()
+            try:
+                save_image(image, path, scale, quality)
+            except Exception as error:
+                with self._lock:
+                    self._errors.append('%s: %s' % (path, error))
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        self._queue.join()
+        with self._lock:
+            errors, self._errors = self._errors, []
+        return errors
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+import os
+import stat
+import subprocess
+import sys
+import time
+
+from getpass import getuser
+from os.path import basename, dirname, join as path_join
+from tempfile import gettempdir
+from threading import Lock, Thread
+
+from ..errors import ServerException
+from ..utils import LazyModule
+from ._bundle import ReferenceBundle, is_bundle
+from ._capture import get_capture_backend
+from ._image_cache import ReferenceImageCache
+from ._matching import get_matching_backend
+
+connection = LazyModule('multiprocessing.connection')
+
+COMMANDS = ('locate', 'ping', 'statistics', 'shutdown')
+
+
+def default_address():
+    '''Returns the default address of the recognition server of the
+    current user: a Unix socket in a directory only the user can access,
+    under ``$XDG_RUNTIME_DIR`` or the temporary directory, or a named pipe
+    on Windows.'''
+    if sys.platform == 'win32':
+        return r'\\.\pipe\imagehorizon-%s' % getuser()
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime:
+        return path_join(runtime, 'imagehorizon', 'server.sock')
+    return path_join(gettempdir(), 'imagehorizon-%s' % getuser(),
+                     'server.sock')
+
+
+def key_path(address):
+    '''Returns the path of the file holding the authentication key of the
+    server at ``address``.'''
+    if sys.platform == 'win32':
+        return path_join(gettempdir(), '%s.key' % basename(address))
+    return '%s.key' % address
+
+
+def _check_private(path):
+    # Requests and responses are pickled, so anything another user could
+    # have created or can read would let them run code in our process.
+    if sys.platform == 'win32':
+        return
+    info = os.lstat(path)
+    if (info.st_uid != os.getuid() or stat.S_ISLNK(info.st_mode) or
+            info.st_mode & 0o077):
+        raise ServerException('"%s" must be owned by the current user and '
+                              'accessible only by them.' % path)
+
+
+def _private_directory(path):
+    if sys.platform == 'win32' or not path:
+        return
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    _check_private(path)
+
+
+def _read_key(address):
+    '''Returns the key of the server at ``address`` or ``None`` if no
+    server has been started there.'''
+    path = key_path(address)
+    try:
+        _check_private(path)
+        if sys.platform != 'win32':
+            _check_private(address)
+        with open(path, 'rb') as key_file:
+            return key_file.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_key(address):
+    key = os.urandom(32)
+    path = key_path(address)
+    temporary = '%s.%d' % (path, os.getpid())
+    descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                         0o600)
+    with os.fdopen(descriptor, 'wb') as key_file:
+        key_file.write(key)
+    os.replace(temporary, path)
+    return key
+
+
+def _mount(folder):
+    return ReferenceBundle(folder) if is_bundle(folder) else None
+
+
+class RecognitionServer(object):
+    '''Serves image recognition requests of library instances running in
+    other processes or suites.
+
+    The server captures the screen itself and keeps decoded reference
+    images, mounted bundles, capture backends and matching backends warm
+    between the requests. Each connection is served in its own thread.
+
+    Clients authenticate with a random key the server writes next to the
+    socket in a file only the current user can read. With ``idle_timeout``
+    the server exits after that many seconds without clients.
+    '''
+
+    def __init__(self, address=None, image_cache_size=256,
+                 idle_timeout=None):
+        self.address = address or default_address()
+        self.idle_timeout = float(idle_timeout) if idle_timeout else None
+        self._image_cache = ReferenceImageCache(image_cache_size)
+        self._bundles = {}
+        self._captures = {}
+        self._backends = {}
+        self._lock = Lock()
+        self._listener = None
+        self._key = None
+        self._running = False
+        self._clients = 0
+        self._last_active = time.time()
+        self.requests = 0
+
+    def _remove_stale(self):
+        if sys.platform == 'win32' or not os.path.exists(self.address):
+            return
+        key = _read_key(self.address)
+        if key is not None:
+            try:
+                connection.Client(self.address, authkey=key).close()
+            except (OSError, EOFError, connection.AuthenticationError):
+                pass
+            else:
+                raise ServerException('Recognition server is already '
+                                      'running at "%s".' % self.address)
+        # Left behind by a server that did not exit cleanly.
+        os.remove(self.address)
+
+    def serve_forever(self):
+        if sys.platform != 'win32':
+            _private_directory(dirname(self.address))
+        self._remove_stale()
+        self._key = _write_key(self.address)
+        # Only the current user may connect, because requests are pickled.
+        umask = os.umask(0o077)
+        try:
+            self._listener = connection.Listener(self.address,
+                                                 authkey=self._key)
+        finally:
+            os.umask(umask)
+        self._running = True
+        if self.idle_timeout:
+            watchdog = Thread(target=self._exit_when_idle)
+            watchdog.daemon = True
+            watchdog.start()
+        try:
+            while self._running:
+                try:
+                    client = self._listener.accept()
+                except (OSError, EOFError, connection.AuthenticationError):
+                    continue
+                thread = Thread(target=self._serve, args=(client,))
+                thread.daemon = True
+                thread.start()
+        finally:
+            self._listener.close()
+            try:
+                os.remove(key_path(self.address))
+            except OSError:
+                pass
+
+    def _exit_when_idle(self):
+        while self._running:
+            time.sleep(min(self.idle_timeout, 1.0))
+            with self._lock:
+                idle = (not self._clients and
+                        time.time() - self._last_active > self.idle_timeout)
+            if idle:
+                self.shutdown()
+
+    def shutdown(self):
+        self._running = False
+        # Wakes up the listener waiting for connections.
+        try:
+            connection.Client(self.address, authkey=self._key).close()
+        except (OSError, EOFError, connection.AuthenticationError):
+            pass
+
+    def _serve(self, connection):
+        with self._lock:
+            self._clients += 1
+        try:
+            self._serve_requests(connection)
+        finally:
+            with self._lock:
+                self._clients -= 1
+                self._last_active = time.time()
+
+    def _serve_requests(self, connection):
+        with connection:
+            while True:
+                try:
+                    command, arguments = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if command not in COMMANDS:
+                        raise ServerException('Invalid command "%s".' %
+                                              command)
+                    result = ('ok', getattr(self, '_%s' % command)(
+                        **arguments))
+                except Exception as error:
+                    result = ('error', '%s: %s' % (type(error).__name__,
+                                                   error))
+                connection.send(result)
+                if command == 'shutdown':
+                    self.shutdown()
+                    return
+
+    def _cached(self, cache, name, factory):
+        with self._lock:
+            if name not in cache:
+                cache[name] = factory(name)
+            return cache[name]
+
+    def _load(self, folder, path):
+        bundle = self._cached(self._bundles, folder, _mount)
+        if bundle is not None:
+            return bundle.load(path)
+        with self._lock:
+            return self._image_cache.get(path)
+
+    def _ping(self):
+        return os.getpid()
+
+    def _shutdown(self):
+        return None
+
+    def _statistics(self):
+        with self._lock:
+            return {'requests': self.requests,
+                    'image cache': self._image_cache.statistics()}
+
+    def _locate(self, references, region=None, confidence=None,
+                backend='pyscreeze', capture='pyautogui', folder=None,
+                strategy='best'):
+        capture = self._cached(self._captures, capture, get_capture_backend)
+        backend = self._cached(self._backends, backend, get_matching_backend)
+        with self._lock:
+            self.requests += 1
+        if region is None:
+            haystack, left, top = capture.grab(), 0, 0
+        else:
+            haystack, (left, top) = capture.grab(region), region[:2]
+        locate = backend.locate_first if strategy == 'first' else \
+            backend.locate
+        locations = {}
+        for reference_image, reference_images in references:
+            best = None
+            for ref_image in reference_images:
+                match = locate(self._load(folder, ref_image), haystack,
+                               confidence)
+                if match is None:
+                    continue
+                if best is None or (match.score is not None and
+                                    match.score > best.score):
+                    best = match
+                if strategy == 'first' or match.score is None:
+                    break
+            if best is not None:
+                locations[reference_image] = (best[0] + left, best[1] + top,
+                                              best[2], best[3])
+        return locations
+
+
+class RecognitionClient(object):
+    '''Connection to a ``RecognitionServer``. If ``autostart`` is true and
+    no server is running at ``address``, one is started in the background.
+    It exits after ``idle_timeout`` seconds without clients.
+
+    The socket and the key file of the server must belong to the current
+    user, otherwise ``ServerException`` is raised without connecting.'''
+
+    def __init__(self, address=None, autostart=True, timeout=10,
+                 idle_timeout=60):
+        self.address = address or default_address()
+        self.autostart = autostart
+        self.timeout = float(timeout)
+        self.idle_timeout = idle_timeout
+        self._connection = None
+        self._lock = Lock()
+
+    def _try_connect(self):
+        key = _read_key(self.address)
+        if key is None:
+            raise FileNotFoundError(key_path(self.address))
+        return connection.Client(self.address, authkey=key)
+
+    def _connect(self):
+        try:
+            return self._try_connect()
+        except (OSError, EOFError, connection.AuthenticationError):
+            if not self.autostart:
+                raise ServerException('Recognition server is not running '
+                                      'at "%s".' % self.address)
+        self._start_server()
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                return self._try_connect()
+            except (OSError, EOFError, connection.AuthenticationError):
+                if time.time() > deadline:
+                    raise ServerException('Starting recognition server at '
+                                          '"%s" failed.' % self.address)
+                time.sleep(0.1)
+
+    def _start_server(self):
+        command = [sys.executable, '-m', 'ImageHorizonLibrary.server',
+                   self.address]
+        if self.idle_timeout:
+            command += ['--idle-timeout', str(self.idle_timeout)]
+        # The library may be importable only through paths added at run
+        # time, for example with ``robot --pythonpath``.
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        with open(os.devnull, 'wb') as devnull:
+            subprocess.Popen(command, stdout=devnull, stderr=devnull,
+                             env=env, start_new_session=True)
+
+    def request(self, command, **arguments):
+        with self._lock:
+            for attempt in range(2):
+                if self._connection is None:
+                    self._connection = self._connect()
+                try:
+                    self._connection.send((command, arguments))
+                    status, result = self._connection.recv()
+                    break
+                except (OSError, EOFError):
+                    # The server was restarted, connect again once.
+                    self._connection = None
+                    if attempt:
+                        raise ServerException('Lost connection to '
+                                              'recognition server at '
+                                              '"%s".' % self.address)
+        if status == 'error':
+            raise ServerException('Recognition server failed: %s' % result)
+        return result
+
+    def locate(self, references, region=None, confidence=None,
+               backend='pyscreeze', capture='pyautogui', folder=None,
+               strategy='best'):
+        '''Returns a dictionary from the found reference images to their
+        boxes on screen. ``references`` are pairs of a reference image and
+        its image files like in the library.'''
+        return self.request('locate', references=references, region=region,
+                            confidence=confidence, backend=backend,
+                            capture=capture, folder=folder,
+                            strategy=strategy)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import json
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from os.path import isfile
+from threading import Lock
+from time import perf_counter
+
+
+class RecognitionStatistics(object):
+    '''Collects timings of the phases of image recognition and interaction,
+    like ``capture``, ``decode``, ``match`` and ``click``, and counts of
+    events, like searches that found the image.'''
+
+    def __init__(self):
+        self._lock = Lock()
+        self._phases = OrderedDict()
+        self._counters = OrderedDict()
+
+    @contextmanager
+    def measure(self, phase):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, perf_counter() - start)
+
+    def record(self, phase, seconds):
+        with self._lock:
+            count, total, longest = self._phases.get(phase, (0, 0.0, 0.0))
+            self._phases[phase] = (count + 1, total + seconds,
+                                   max(longest, seconds))
+
+    def increment(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self._phases.clear()
+            self._counters.clear()
+
+    def as_dict(self):
+        '''Returns timings in seconds as ``{phase: {count, total, average,
+        max}}`` under ``phases`` and counts under ``counters``.'''
+        with self._lock:
+            phases = OrderedDict()
+            for phase, (count, total, longest) in self._phases.items():
+                phases[phase] = OrderedDict([('count', count),
+                                             ('total', total),
+                                             ('average', total / count),
+                                             ('max', longest)])
+            return OrderedDict([('phases', phases),
+                                ('counters', OrderedDict(self._counters))])
+
+
+def format_statistics(statistics):
+    '''Formats the dictionary returned by `Get Recognition Statistics` as a
+    plain text table.'''
+    lines = ['%-20s %8s %10s %10s %10s' % ('Phase', 'Count', 'Total (s)',
+                                           'Avg (ms)', 'Max (ms)')]
+    for phase, timing in statistics['phases'].items():
+        lines.append('%-20s %8d %10.3f %10.1f %10.1f' %
+                     (phase, timing['count'], timing['total'],
+                      timing['average'] * 1000, timing['max'] * 1000))
+    for section, counters in statistics.items():
+        if section == 'phases':
+            continue
+        for counter, count in counters.items():
+            if section != 'counters':
+                counter = '%s %s' % (section, counter)
+            lines.append('%-29s %10s' % (counter, count))
+    return '\n'.join(lines)
+
+
+def write_statistics(path, suite, statistics):
+    '''Stores ``statistics`` under ``suite`` in the JSON file ``path`` and
+    keeps the statistics of other suites already in the file.'''
+    suites = OrderedDict()
+    if isfile(path):
+        with open(path) as statistics_file:
+            try:
+                suites = json.load(statistics_file,
+                                   object_pairs_hook=OrderedDict)
+            except ValueError:
+                pass
+    suites[suite] = statistics
+    with open(path, 'w') as statistics_file:
+        json.dump(suites, statistics_file, indent=2)
+
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+from ..utils import lazy_import
+from ._matching import image_size, to_array
+
+np = lazy_import('numpy')
+
+
+class TileDiff(object):
+    '''Finds the parts of the screen that changed between screenshots.
+
+    Screenshots are compared with the previous one in square tiles of
+    ``tile_size`` pixels. ``update`` returns the grid of changed tiles, or
+    ``None`` when there is nothing to compare with, and ``regions`` the
+    boxes in which an image of a given size may have appeared since.
+    Without NumPy the whole screenshot is a single tile.
+    '''
+
+    def __init__(self, tile_size=32):
+        self.tile_size = int(tile_size)
+        self.changed = None
+        self._previous = None
+        self._size = None
+
+    def update(self, frame):
+        '''Compares ``frame`` with the previous frame and returns a two
+        dimensional boolean grid of the changed tiles.'''
+        size = image_size(frame)
+        if np is None:
+            pixels = frame.tobytes()
+        else:
+            pixels = to_array(frame)
+        previous, self._previous = self._previous, pixels
+        if previous is None or size != self._size:
+            self._size = size
+            self.changed = None
+        elif np is None:
+            self.changed = [[pixels != previous]]
+        else:
+            differs = pixels != previous
+            if differs.ndim == 3:
+                differs = differs.any(axis=2)
+            rows = np.arange(0, differs.shape[0], self.tile_size)
+            columns = np.arange(0, differs.shape[1], self.tile_size)
+            self.changed = np.logical_or.reduceat(
+                np.logical_or.reduceat(differs, rows, axis=0), columns,
+                axis=1)
+        return self.changed
+
+    def _tile_box(self, row, column):
+        if np is None:
+            return (0, 0) + self._size
+        return (column * self.tile_size, row * self.tile_size,
+                min((column + 1) * self.tile_size, self._size[0]),
+                min((row + 1) * self.tile_size, self._size[1]))
+
+    def _changed_tiles(self):
+        if np is None:
+            return [(0, 0)] if self.changed[0][0] else []
+        return [(int(row), int(column))
+                for row, column in np.argwhere(self.changed)]
+
+    def is_changed(self, box=None):
+        '''Returns ``True`` if any pixel of ``box`` ``(left, top, width,
+        height)``, or of the whole frame, changed on the latest update.'''
+        if self.changed is None:
+            return True
+        if np is None:
+            return self.changed[0][0]
+        if box is None:
+            return bool(self.changed.any())
+        left, top, width, height = box
+        size = self.tile_size
+        return bool(self.changed[top // size:(top + height - 1) // size + 1,
+                                 left // size:(left + width - 1) // size + 1]
+                    .any())
+
+    def regions(self, margin=(1, 1)):
+        '''Returns the changed areas as boxes ``(left, top, right, bottom)``
+        grown so that any image of size ``margin`` ``(width, height)``
+        overlapping a changed tile is inside one of them. Overlapping boxes
+        are merged. The whole frame is returned if there is nothing to
+        compare with.'''
+        if self.changed is None:
+            return [(0, 0) + self._size]
+        boxes = []
+        for component in self._components():
+            lefts, tops, rights, bottoms = zip(*(self._tile_box(*tile)
+                                                 for tile in component))
+            boxes.append((max(min(lefts) - margin[0] + 1, 0),
+                          max(min(tops) - margin[1] + 1, 0),
+                          min(max(rights) + margin[0] - 1, self._size[0]),
+                          min(max(bottoms) + margin[1] - 1, self._size[1])))
+        return _merge(boxes)
+
+    def _components(self):
+        # Groups changed tiles touching each other, also diagonally.
+        remaining = set(self._changed_tiles())
+        while remaining:
+            component = [remaining.pop()]
+            stack = list(component)
+            while stack:
+                row, column = stack.pop()
+                for neighbour in ((row + i, column + j) for i in (-1, 0, 1)
+                                  for j in (-1, 0, 1)):
+                    if neighbour in remaining:
+                        remaining.remove(neighbour)
+                        component.append(neighbour)
+                        stack.append(neighbour)
+            yield component
+
+
+def _merge(boxes):
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in boxes:
+            for index, other in enumerate(result):
+                if (box[0] < other[2] and other[0] < box[2] and
+                        box[1] < other[3] and other[1] < box[3]):
+                    result[index] = (min(box[0], other[0]),
+                                     min(box[1], other[1]),
+                                     max(box[2], other[2]),
+                                     max(box[3], other[3]))
+                    merged = True
+                    break
+            else:
+                result.append(box)
+        boxes = result
+    return sorted(boxes, key=lambda box: (box[1], box[0]))
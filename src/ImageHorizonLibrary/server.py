@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+'''Runs the recognition server shared by ImageHorizonLibrary instances.
+
+Usage:
+
+    python -m ImageHorizonLibrary.server [--idle-timeout <seconds>] [<address>]
+
+The address defaults to a Unix socket in a directory of the current user
+under ``$XDG_RUNTIME_DIR`` or the temporary directory. The library starts
+the server itself when it is imported with ``recognition_server`` and no
+server is running. Such a server exits after a minute without clients.
+'''
+import argparse
+import sys
+
+from .recognition import RecognitionServer
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description='Runs the recognition server shared by '
+                    'ImageHorizonLibrary instances.')
+    parser.add_argument('address', nargs='?', default=None,
+                        help='Unix socket or named pipe to listen at')
+    parser.add_argument('--image-cache-size', type=int, default=256,
+                        help='number of decoded reference images to keep')
+    parser.add_argument('--idle-timeout', type=float, default=None,
+                        help='exit after this many seconds without clients')
+    options = parser.parse_args(arguments)
+    RecognitionServer(options.address, options.image_cache_size,
+                      options.idle_timeout).serve_forever()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
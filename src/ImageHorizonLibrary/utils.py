@@ -1,12 +1,64 @@
 # -*- coding: utf-8 -*-
+from functools import lru_cache
+from importlib import import_module
+from importlib.util import find_spec
 from platform import platform, architecture
 from subprocess import call
 
+from .errors import ImageHorizonLibraryError
+
 
 PLATFORM = platform()
 ARCHITECTURE = architecture()
 
 
+class LazyModule(object):
+    '''Stands in for module ``name`` and imports it on first attribute
+    access. If importing fails and ``error`` is given, it is raised as
+    ``ImageHorizonLibraryError``.'''
+
+    def __init__(self, name, error=None):
+        self.__dict__['_name'] = name
+        self.__dict__['_error'] = error
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        if self._module is None:
+            try:
+                module = import_module(self._name)
+            except ImportError:
+                if self._error is None:
+                    raise
+                raise ImageHorizonLibraryError(self._error)
+            self.__dict__['_module'] = module
+        return self._module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __repr__(self):
+        return '<lazy module %r>' % self._name
+
+
+def lazy_import(name):
+    '''Returns a ``LazyModule`` for the optional module ``name``, or
+    ``None`` if the module is not installed. The module itself is not
+    imported.'''
+    try:
+        if find_spec(name) is None:
+            return None
+    except (ImportError, ValueError):
+        return None
+    return LazyModule(name)
+
+
+pyautogui = LazyModule('pyautogui', 'There is something wrong pyautogui or '
+                                    'it is not installed.')
+
+
 def is_windows():
     return PLATFORM.lower().startswith('windows')
 
@@ -22,16 +74,13 @@ def is_linux():
 def is_java():
     return PLATFORM.lower().startswith('java')
 
+@lru_cache(maxsize=None)
 def has_retina():
     if is_mac():
         # Will return 0 if there is a retina display
         return call("system_profiler SPDisplaysDataType | grep 'Retina'", shell=True) == 0
     return False
 
+@lru_cache(maxsize=None)
 def has_cv():
-    has_cv = True
-    try:
-        import cv2
-    except ModuleNotFoundError as err:
-        has_cv = False
-    return has_cv
+    return lazy_import('cv2') is not None
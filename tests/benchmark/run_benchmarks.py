@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''Benchmarks the image recognition engines against synthetic screens.
+
+Renders desktops with windows, buttons and distractors in memory, hides a
+reference image in them and measures how fast and how accurately every
+available matching backend finds it. No display is needed.
+
+Usage:
+
+    python tests/benchmark/run_benchmarks.py [options]
+
+Use ``--json`` to store the results and ``--baseline`` with the stored
+results of an earlier run to fail on regressions.
+'''
+import argparse
+import json
+import sys
+
+from itertools import product
+from os.path import abspath, dirname, join as path_join
+from time import perf_counter
+
+directory = dirname(__file__)
+sys.path.insert(1, abspath(path_join(directory, '..', '..', 'src')))
+
+try:
+    import pyautogui
+except Exception:
+    # pyautogui needs a display to import on Linux. Matching is done by
+    # pyscreeze, which works without one.
+    try:
+        import pyscreeze
+        sys.modules['pyautogui'] = pyscreeze
+    except ImportError:
+        sys.exit('Please install pyautogui or pyscreeze')
+
+import numpy as np
+
+from PIL import Image, ImageDraw
+
+from ImageHorizonLibrary.recognition._matching import (BACKENDS,
+                                                       get_matching_backend)
+from ImageHorizonLibrary.recognition._scaling import MultiScaleMatcher
+
+RESOLUTIONS = {'720p': (1280, 720), '1080p': (1920, 1080),
+               '4k': (3840, 2160)}
+NEEDLE_SIZE = (96, 32)
+TOLERANCE = 2
+
+
+def random_color(random, low=0, high=256):
+    return tuple(int(value) for value in random.randint(low, high, 3))
+
+
+def render_button(random, label):
+    button = Image.new('RGB', NEEDLE_SIZE, random_color(random, 150))
+    draw = ImageDraw.Draw(button)
+    draw.rectangle((0, 0, NEEDLE_SIZE[0] - 1, NEEDLE_SIZE[1] - 1),
+                   outline=random_color(random, 0, 100))
+    draw.text((8, 10), label, fill=(0, 0, 0))
+    return button
+
+
+def render_screen(resolution, noise, scale, distractors, seed):
+    '''Returns a synthetic screen, the reference image and the box where
+    the reference image is on the screen.'''
+    random = np.random.RandomState(seed)
+    width, height = resolution
+    screen = Image.new('RGB', resolution, random_color(random, 60, 200))
+    draw = ImageDraw.Draw(screen)
+    for _ in range(12):
+        left = random.randint(0, width - 200)
+        top = random.randint(0, height - 150)
+        right = left + random.randint(200, width // 2)
+        bottom = top + random.randint(150, height // 2)
+        draw.rectangle((left, top, right, bottom),
+                       fill=random_color(random, 180), outline=(0, 0, 0))
+        draw.rectangle((left, top, right, top + 24),
+                       fill=random_color(random, 0, 120))
+        draw.text((left + 6, top + 6), 'Window %d' % left, fill=(255,) * 3)
+    needle = render_button(random, 'OK %d' % seed)
+    size = (int(round(NEEDLE_SIZE[0] * scale)),
+            int(round(NEEDLE_SIZE[1] * scale)))
+    for index in range(distractors):
+        distractor = render_button(random, 'Cancel %d' % index)
+        screen.paste(distractor.resize(size, Image.BILINEAR),
+                     (random.randint(0, width - size[0]),
+                      random.randint(0, height - size[1])))
+    position = (random.randint(0, width - size[0]),
+                random.randint(0, height - size[1]))
+    screen.paste(needle.resize(size, Image.BILINEAR), position)
+    if noise:
+        pixels = np.asarray(screen).astype(np.int16)
+        pixels += random.normal(0, noise, pixels.shape).astype(np.int16)
+        screen = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    return screen, needle, position + size
+
+
+def engines(names):
+    for name, backend in BACKENDS.items():
+        if backend.is_available() and (not names or name in names):
+            yield name, get_matching_backend(name)
+    if MultiScaleMatcher.is_available() and (not names or
+                                             'multiscale' in names):
+        yield 'multiscale', MultiScaleMatcher(0.75, 1.5, 0.25)
+
+
+def percentile(values, percent):
+    return float(np.percentile(values, percent)) * 1000
+
+
+def run_scenario(engine, screens, confidence):
+    timings = []
+    correct = errors = 0
+    for screen, needle, box in screens:
+        start = perf_counter()
+        try:
+            match = engine.locate(needle, screen, confidence)
+        except Exception:
+            errors += 1
+            continue
+        finally:
+            timings.append(perf_counter() - start)
+        if (match is not None and abs(match[0] - box[0]) <= TOLERANCE and
+                abs(match[1] - box[1]) <= TOLERANCE):
+            correct += 1
+    return {'p50': percentile(timings, 50), 'p90': percentile(timings, 90),
+            'p99': percentile(timings, 99),
+            'accuracy': correct / float(len(screens)), 'errors': errors}
+
+
+def run_benchmarks(options):
+    results = {}
+    for resolution, noise, scale, distractors in product(
+            options.resolutions, options.noise, options.scales,
+            options.distractors):
+        scenario = '%s noise=%g scale=%g distractors=%d' % (
+            resolution, noise, scale, distractors)
+        screens = [render_screen(RESOLUTIONS[resolution], noise, scale,
+                                 distractors, seed)
+                   for seed in range(options.repeats)]
+        exact = not noise and scale == 1.0
+        confidence = None if exact else options.confidence
+        for name, engine in engines(options.engines):
+            if name == 'pyscreeze' and resolution == '4k' and exact and \
+                    not options.slow:
+                continue
+            result = run_scenario(engine, screens, confidence)
+            results['%s | %s' % (scenario, name)] = result
+            print('%-45s %-10s p50 %8.1f ms  p90 %8.1f ms  p99 %8.1f ms  '
+                  'accuracy %5.1f%%%s' %
+                  (scenario, name, result['p50'], result['p90'],
+                   result['p99'], result['accuracy'] * 100,
+                   '  errors %d' % result['errors']
+                   if result['errors'] else ''))
+            sys.stdout.flush()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline:
+            continue
+        previous = baseline[key]
+        if result['p50'] > previous['p50'] * (1 + tolerance):
+            regressions.append('%s: p50 %.1f ms -> %.1f ms' %
+                               (key, previous['p50'], result['p50']))
+        if result['accuracy'] < previous['accuracy']:
+            regressions.append('%s: accuracy %.1f%% -> %.1f%%' %
+                               (key, previous['accuracy'] * 100,
+                                result['accuracy'] * 100))
+    return regressions
+
+
+def parse_arguments(arguments):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resolutions', nargs='+', default=['720p', '1080p'],
+                        choices=sorted(RESOLUTIONS))
+    parser.add_argument('--noise', nargs='+', type=float,
+                        default=[0.0, 8.0],
+                        help='standard deviation of the Gaussian noise')
+    parser.add_argument('--scales', nargs='+', type=float,
+                        default=[1.0, 1.25])
+    parser.add_argument('--distractors', nargs='+', type=int,
+                        default=[0, 20])
+    parser.add_argument('--engines', nargs='+',
+                        help='engines to benchmark, by default all available')
+    parser.add_argument('--confidence', type=float, default=0.8,
+                        help='confidence for noisy and scaled screens')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--slow', action='store_true',
+                        help='run also pure Python matching on 4k screens')
+    parser.add_argument('--json', help='file to store the results to')
+    parser.add_argument('--baseline',
+                        help='results of an earlier run to compare to')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative p50 slowdown compared to '
+                             'the baseline')
+    return parser.parse_args(arguments)
+
+
+def main(arguments):
+    options = parse_arguments(arguments)
+    results = run_benchmarks(options)
+    if options.json:
+        with open(options.json, 'w') as results_file:
+            json.dump(results, results_file, indent=2, sort_keys=True)
+    if options.baseline:
+        with open(options.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file),
+                                  options.tolerance)
+        for regression in regressions:
+            print('REGRESSION %s' % regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
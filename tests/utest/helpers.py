@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+'''Synthetic screens and reference images shared by the unit tests.'''
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def make_pattern(width, height, seed=0, block=1):
+    '''Returns an image of random colours in squares of ``block`` pixels.'''
+    random = np.random.RandomState(seed)
+    pixels = random.randint(0, 256, (height // block, width // block, 3),
+                            dtype=np.uint8)
+    image = Image.fromarray(pixels)
+    if block > 1:
+        image = image.resize((width, height), Image.NEAREST)
+    return image
+
+
+def make_screen(seed=0):
+    '''Returns a screen of flat coloured areas and the reference image
+    found on it at ``(413, 321)``.'''
+    random = np.random.RandomState(seed)
+    pixels = np.full((600, 800, 3), 200, dtype=np.uint8)
+    for _ in range(40):
+        left, top = random.randint(0, 760), random.randint(0, 570)
+        pixels[top:top + 30, left:left + 40] = random.randint(0, 256, 3)
+    # User interfaces consist of areas of one colour rather than noise.
+    needle = random.randint(0, 256, (6, 8, 3)).astype(np.uint8)
+    needle = needle.repeat(8, axis=0).repeat(8, axis=1)
+    pixels[321:369, 413:477] = needle
+    return Image.fromarray(pixels), Image.fromarray(needle)
+
+
+def make_scaled_screen(needle, scale, position, size=(400, 300)):
+    '''Returns a gray screen with ``needle`` resized by ``scale`` at
+    ``position``.'''
+    screen = Image.new('RGB', size, 'gray')
+    scaled = (int(round(needle.width * scale)),
+              int(round(needle.height * scale)))
+    screen.paste(needle.resize(scaled, Image.BILINEAR), position)
+    return screen
@@ -14,6 +14,15 @@ try:
 except ImportError:
     raise ImportError('Please install mock')
 
+# Extension modules cannot be imported twice in the same process. Import the
+# optional ones up front so that tests patching ``sys.modules`` do not unload
+# them.
+for module in ('numpy', 'cv2', 'PIL.Image'):
+    try:
+        __import__(module)
+    except ImportError:
+        pass
+
 if len(sys.argv) > 1 and 'verbosity=' in sys.argv[1]:
     verbosity = int(sys.argv[1].split('=')[1])
 else:
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+from os.path import join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase, skipUnless
+
+from mock import MagicMock, patch
+from PIL import Image
+
+from helpers import make_pattern, np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+
+@skipUnless(np is not None, 'NumPy is not installed')
+class TestBandMatcher(TestCase):
+    def setUp(self):
+        self.mock = MagicMock()
+        self.patcher = patch.dict('sys.modules', {'pyautogui': self.mock})
+        self.patcher.start()
+        import ImageHorizonLibrary
+        self.module = ImageHorizonLibrary
+        self.get_backend = ImageHorizonLibrary.get_matching_backend
+        self.bands = ImageHorizonLibrary.BandMatcher(4, min_height=16)
+        self.haystack = np.array(make_pattern(300, 400))
+        self.tmpdir = mkdtemp()
+
+    def tearDown(self):
+        self.bands.close()
+        self.patcher.stop()
+        rmtree(self.tmpdir)
+
+    def test_bands_cover_every_position_once(self):
+        bands = self.bands.bands(400, 20)
+        self.assertEqual(bands, [(0, 115), (96, 211), (192, 307),
+                                 (288, 400)])
+        tops = [top for band in bands for top in range(band[0],
+                                                       band[1] - 20 + 1)]
+        self.assertEqual(tops, list(range(381)))
+
+    def test_no_bands_for_small_screenshots(self):
+        self.assertEqual(self.bands.bands(40, 20), [])
+        self.assertEqual(self.bands.bands(400, 300), [])
+
+    def _assert_same_as_whole(self, backend, needle, haystack=None,
+                              confidence=None):
+        haystack = self.haystack if haystack is None else haystack
+        expected = backend.locate(needle, haystack, confidence)
+        self.assertEqual(self.bands.locate(backend, needle, haystack,
+                                           confidence), expected)
+        return expected
+
+    def test_numpy_backend(self):
+        backend = self.get_backend('numpy')
+        # Positions at and around the band boundaries.
+        for top in (0, 95, 96, 114, 115, 192, 380):
+            needle = self.haystack[top:top + 20, 40:70]
+            match = self._assert_same_as_whole(backend, needle)
+            self.assertEqual(match[:2], (40, top))
+        self.assertIsNone(self._assert_same_as_whole(
+            backend, np.array(make_pattern(30, 20, seed=1))))
+
+    def test_numpy_backend_returns_topmost(self):
+        backend = self.get_backend('numpy')
+        needle = np.array(make_pattern(10, 20, seed=1))
+        haystack = Image.new('RGB', (300, 400), 'white')
+        for position in ((200, 300), (100, 150), (10, 160)):
+            haystack.paste(Image.fromarray(needle), position)
+        match = self._assert_same_as_whole(backend, needle, haystack)
+        self.assertEqual(match[:2], (100, 150))
+        self.assertEqual(
+            sorted(match[:2] for match in
+                   self.bands.locate_all(backend, needle, haystack)),
+            [(10, 160), (100, 150), (200, 300)])
+
+    @skipUnless(cv2 is not None, 'OpenCV is not installed')
+    def test_opencv_backend_locate_first(self):
+        backend = self.get_backend('opencv')
+        needle = self.haystack[300:320, 40:70].copy()
+        haystack = self.haystack.copy()
+        haystack[150:170, 100:130] = needle
+        haystack[155, 110] = 0
+        expected = backend.locate_first(needle, haystack, 0.5)
+        self.assertEqual(expected[:2], (100, 150))
+        self.assertEqual(self.bands.locate_first(backend, needle, haystack,
+                                                 0.5), expected)
+
+    @skipUnless(cv2 is not None, 'OpenCV is not installed')
+    def test_opencv_backend_returns_best(self):
+        backend = self.get_backend('opencv')
+        needle = self.haystack[300:320, 40:70].copy()
+        haystack = self.haystack.copy()
+        haystack[10:30, 100:130] = needle
+        haystack[15, 110] = 0
+        match = self._assert_same_as_whole(backend, needle, haystack, 0.5)
+        self.assertEqual(match[:2], (40, 300))
+
+    def test_pyscreeze_backend_is_not_split(self):
+        backend = self.get_backend('pyscreeze')
+        self.mock.locate.return_value = (1, 2, 3, 4)
+        needle = self.haystack[:20, :30]
+        self.assertEqual(self.bands.locate(backend, needle, self.haystack),
+                         (1, 2, 3, 4, None))
+        self.assertEqual(self.mock.locate.call_count, 1)
+
+    def test_library_matches_bands(self):
+        screen = path_join(self.tmpdir, 'screen.png')
+        Image.fromarray(self.haystack).save(screen)
+        Image.fromarray(self.haystack[250:290, 120:180]).save(
+            path_join(self.tmpdir, 'needle.png'))
+        library = self.module.ImageHorizonLibrary(
+            reference_folder=self.tmpdir, matching_backend='numpy',
+            capture_backend='image:' + screen, matching_threads=4)
+        self.addCleanup(library._close)
+        self.assertIsNotNone(library._bands)
+        self.mock.center.side_effect = lambda box: MagicMock(
+            x=box[0] + box[2] // 2, y=box[1] + box[3] // 2)
+        self.assertEqual(library.locate_all('needle'), [(150, 270)])
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from os import makedirs
+from os.path import abspath, dirname, join as path_join
+from shutil import copy, rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from mock import MagicMock, patch
+from PIL import Image
+
+import numpy as np
+
+CURDIR = abspath(dirname(__file__))
+TESTIMG = path_join(CURDIR, 'reference_images', 'my_picture.png')
+
+
+class TestReferenceBundle(TestCase):
+    def setUp(self):
+        self.patcher = patch.dict('sys.modules', {'pyautogui': MagicMock()})
+        self.patcher.start()
+        from ImageHorizonLibrary.recognition import _bundle
+        self.module = _bundle
+        self.tmpdir = mkdtemp()
+        self.folder = path_join(self.tmpdir, 'images')
+        makedirs(path_join(self.folder, 'dialogs'))
+        copy(TESTIMG, path_join(self.folder, 'picture.png'))
+        Image.new('RGB', (3, 2), 'red').save(path_join(self.folder, 'dialogs',
+                                                       'ok.png'))
+        Image.new('RGB', (4, 4), 'blue').save(
+            path_join(self.folder, 'dialogs', 'cancel.png'))
+        open(path_join(self.folder, 'notes.txt'), 'w').close()
+        self.path = path_join(self.tmpdir, 'images.bundle')
+
+    def tearDown(self):
+        self.patcher.stop()
+        rmtree(self.tmpdir)
+
+    def test_compile_and_load(self):
+        self.assertEqual(self.module.compile_bundle(self.folder, self.path), 3)
+        self.assertTrue(self.module.is_bundle(self.path))
+        self.assertFalse(self.module.is_bundle(TESTIMG))
+        bundle = self.module.ReferenceBundle(self.path)
+        path, images = bundle.resolve('picture')
+        self.assertEqual(images, [path_join(self.path, 'picture.png')])
+        pixels = bundle.load(path)
+        with Image.open(TESTIMG) as image:
+            self.assertTrue(np.array_equal(pixels,
+                                           np.asarray(image.convert('RGB'))))
+        self.assertFalse(pixels.flags.writeable)
+        self.assertEqual(pixels.ctypes.data % self.module.ALIGNMENT, 0)
+
+    def test_resolve_folder(self):
+        from ImageHorizonLibrary import InvalidImageException
+
+        self.module.compile_bundle(self.folder, self.path)
+        bundle = self.module.ReferenceBundle(self.path)
+        path, images = bundle.resolve('dialogs')
+        self.assertEqual(path, path_join(self.path, 'dialogs'))
+        self.assertEqual([bundle.load(image).shape for image in images],
+                         [(4, 4, 3), (2, 3, 3)])
+        with self.assertRaises(InvalidImageException):
+            bundle.resolve('notes.txt')
+        with self.assertRaises(InvalidImageException):
+            bundle.resolve('../images/picture')
+
+    def test_grayscale(self):
+        self.module.compile_bundle(self.folder, self.path, grayscale=True)
+        bundle = self.module.ReferenceBundle(self.path)
+        self.assertTrue(bundle.grayscale)
+        pixels = bundle.load(bundle.resolve('picture')[0])
+        with Image.open(TESTIMG) as image:
+            expected = np.asarray(image.convert('RGB').convert('L'))
+        self.assertTrue(np.array_equal(pixels, expected))
+
+    def test_command_line(self):
+        from ImageHorizonLibrary.bundle import main
+
+        with patch('sys.stdout'):
+            main(['--grayscale', self.folder, self.path])
+        bundle = self.module.ReferenceBundle(self.path)
+        self.assertTrue(bundle.grayscale)
+        self.assertEqual(len(bundle.resolve('dialogs')[1]), 2)
+
+    def test_invalid_bundle(self):
+        from ImageHorizonLibrary import ReferenceFolderException
+
+        with open(self.path, 'wb') as bundle:
+            bundle.write(b'\0' * 64)
+        self.assertFalse(self.module.is_bundle(self.path))
+        with self.assertRaises(ReferenceFolderException):
+            self.module.ReferenceBundle(self.path)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from os.path import abspath, dirname, join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from mock import MagicMock, patch
+from PIL import Image
+
+import numpy as np
+
+CURDIR = abspath(dirname(__file__))
+TESTIMG = path_join(CURDIR, 'reference_images', 'my_picture.png')
+
+
+class TestCaptureBackends(TestCase):
+    def setUp(self):
+        self.mock = MagicMock()
+        self.patcher = patch.dict('sys.modules', {'pyautogui': self.mock})
+        self.patcher.start()
+        import ImageHorizonLibrary
+        from ImageHorizonLibrary.recognition import _capture
+        self.module = ImageHorizonLibrary
+        self.capture = _capture
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_pyautogui_capture(self):
+        backend = self.module.get_capture_backend('pyautogui')
+        self.assertIs(backend.grab(), self.mock.screenshot.return_value)
+        self.mock.screenshot.assert_called_once_with()
+        backend.grab((1, 2, 3, 4))
+        self.mock.screenshot.assert_called_with(region=(1, 2, 3, 4))
+        backend.save('screen.png')
+        self.mock.screenshot.assert_called_with('screen.png')
+
+    def test_image_capture(self):
+        backend = self.module.get_capture_backend('Image:%s' % TESTIMG)
+        self.assertEqual(backend.grab().size, (500, 322))
+        region = backend.grab((10, 20, 30, 40))
+        self.assertEqual(region.size, (30, 40))
+        self.assertEqual(region.getpixel((0, 0)),
+                         backend.image.getpixel((10, 20)))
+
+    def test_image_capture_with_array(self):
+        pixels = np.arange(60, dtype=np.uint8).reshape(4, 5, 3)
+        backend = self.capture.ImageCapture(pixels)
+        self.assertIs(backend.grab(), pixels)
+        self.assertEqual(backend.grab((1, 2, 3, 2)).tolist(),
+                         pixels[2:4, 1:4].tolist())
+
+    def test_image_capture_saves_screenshots(self):
+        folder = mkdtemp()
+        self.addCleanup(rmtree, folder)
+        path = path_join(folder, 'screen.png')
+        pixels = np.zeros((4, 5, 3), dtype=np.uint8)
+        self.capture.ImageCapture(pixels).save(path)
+        self.assertEqual(Image.open(path).size, (5, 4))
+
+    def test_image_capture_without_image(self):
+        from ImageHorizonLibrary import BackendException
+
+        with self.assertRaises(BackendException):
+            self.capture.ImageCapture().grab()
+
+    def test_mss_capture(self):
+        bgra = np.zeros((2, 3, 4), dtype=np.uint8)
+        bgra[..., 0], bgra[..., 1], bgra[..., 2] = 30, 20, 10
+        connection = MagicMock(monitors=[{}, 'primary'])
+        connection.grab.return_value = MagicMock(bgra=bgra.tobytes(),
+                                                 width=3, height=2)
+        mss = MagicMock()
+        mss.mss.return_value = connection
+        with patch.object(self.capture, 'mss', mss):
+            backend = self.module.get_capture_backend('mss')
+            pixels = backend.grab()
+            connection.grab.assert_called_once_with('primary')
+            self.assertEqual(pixels.shape, (2, 3, 3))
+            self.assertEqual(pixels[0, 0].tolist(), [10, 20, 30])
+            backend.grab((5, 6, 3, 2))
+            connection.grab.assert_called_with({'left': 5, 'top': 6,
+                                                'width': 3, 'height': 2})
+        mss.mss.assert_called_once_with()
+
+    def test_invalid_and_unavailable_backends(self):
+        from ImageHorizonLibrary import BackendException
+
+        with self.assertRaises(BackendException):
+            self.module.get_capture_backend('nonexistent')
+        with patch.object(self.capture, 'mss', None):
+            with self.assertRaises(BackendException):
+                self.module.get_capture_backend('mss')
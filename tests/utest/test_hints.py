@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+
+class TestLocationHints(TestCase):
+    def setUp(self):
+        self.patcher = patch.dict('sys.modules', {'pyautogui': MagicMock()})
+        self.patcher.start()
+        from ImageHorizonLibrary import LocationHints
+        self.hints = LocationHints(margin=10)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_no_hint(self):
+        self.assertIsNone(self.hints.area('image', (0, 0), (800, 600)))
+
+    def test_area_around_previous_location(self):
+        self.hints.remember('image', (100, 200, 30, 20))
+        self.assertEqual(self.hints.area('image', (0, 0), (800, 600)),
+                         (90, 190, 140, 230))
+
+    def test_area_is_relative_to_screenshot(self):
+        self.hints.remember('image', (100, 200, 30, 20))
+        self.assertEqual(self.hints.area('image', (50, 150), (800, 600)),
+                         (40, 40, 90, 80))
+
+    def test_area_is_clipped_to_screenshot(self):
+        self.hints.remember('image', (5, 590, 30, 20))
+        self.assertEqual(self.hints.area('image', (0, 0), (800, 620)),
+                         (0, 580, 45, 620))
+
+    def test_no_area_outside_screenshot(self):
+        self.hints.remember('image', (100, 200, 30, 20))
+        self.assertIsNone(self.hints.area('image', (500, 500), (800, 600)))
+        self.assertIsNone(self.hints.area('image', (0, 0), (110, 600)))
+
+    def test_no_area_covering_whole_screenshot(self):
+        self.hints.remember('image', (5, 5, 30, 20))
+        self.assertIsNone(self.hints.area('image', (0, 0), (40, 30)))
+
+    def test_clear(self):
+        self.hints.remember('image', (100, 200, 30, 20))
+        self.hints.hits = 3
+        self.hints.clear()
+        self.assertEqual(self.hints.statistics(),
+                         {'size': 0, 'hits': 0, 'misses': 0})
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import os
+
+from os.path import abspath, dirname, join as path_join
+from shutil import copy, rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+CURDIR = abspath(dirname(__file__))
+TESTIMG_DIR = path_join(CURDIR, 'reference_images')
+TESTIMG = path_join(TESTIMG_DIR, 'my_picture.png')
+
+
+class TestReferenceImageCache(TestCase):
+    def setUp(self):
+        self.patcher = patch.dict('sys.modules', {'pyautogui': MagicMock()})
+        self.patcher.start()
+        from ImageHorizonLibrary import ReferenceImageCache
+        self.cache = ReferenceImageCache(max_size=2)
+        self.tmpdir = mkdtemp()
+
+    def tearDown(self):
+        self.patcher.stop()
+        rmtree(self.tmpdir)
+
+    def _copy_of_test_image(self, name):
+        path = path_join(self.tmpdir, name)
+        copy(TESTIMG, path)
+        return path
+
+    def test_image_is_decoded_once(self):
+        first = self.cache.get(TESTIMG)
+        second = self.cache.get(path_join(TESTIMG_DIR, '.', 'my_picture.png'))
+        self.assertIs(first, second)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_least_recently_used_image_is_evicted(self):
+        first, second, third = (self._copy_of_test_image('%d.png' % i)
+                                for i in range(3))
+        self.cache.get(first)
+        self.cache.get(second)
+        self.cache.get(first)
+        self.cache.get(third)
+        self.assertEqual(len(self.cache), 2)
+        self.cache.get(first)
+        self.assertEqual(self.cache.misses, 3)
+        self.cache.get(second)
+        self.assertEqual(self.cache.misses, 4)
+
+    def test_modified_image_is_decoded_again(self):
+        path = self._copy_of_test_image('modified.png')
+        first = self.cache.get(path)
+        mtime = os.stat(path).st_mtime
+        os.utime(path, (mtime + 10, mtime + 10))
+        second = self.cache.get(path)
+        self.assertIsNot(first, second)
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_missing_image(self):
+        from ImageHorizonLibrary import InvalidImageException
+
+        path = self._copy_of_test_image('deleted.png')
+        self.cache.get(path)
+        os.remove(path)
+        with self.assertRaises(InvalidImageException):
+            self.cache.get(path)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_disabled_cache(self):
+        from ImageHorizonLibrary import ReferenceImageCache
+        cache = ReferenceImageCache(max_size=0)
+        self.assertIsNot(cache.get(TESTIMG), cache.get(TESTIMG))
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self):
+        self.cache.get(TESTIMG)
+        self.cache.clear()
+        self.assertEqual(self.cache.statistics(),
+                         {'size': 0, 'max_size': 2, 'hits': 0, 'misses': 0})
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
+import json
 import os
 import shlex
+import sys
 
 from os.path import abspath, dirname, join as path_join
 from subprocess import PIPE, Popen
@@ -11,6 +13,22 @@ from mock import MagicMock, patch
 
 
 SRCDIR = path_join(abspath(dirname(__file__)), '..', '..', 'src')
+# Seconds importing the library may take when Robot Framework, which is
+# always loaded before the library, is already imported. The budget is
+# generous so that busy CI runners stay well under it.
+IMPORT_BUDGET = 1.0
+IMPORT_ATTEMPTS = 3
+HEAVY_MODULES = ('pyautogui', 'tkinter', 'numpy', 'cv2', 'PIL.Image', 'mss',
+                 'multiprocessing.connection')
+IMPORT_SCRIPT = '''
+import json, sys, time
+import robot.api, robot.libraries.BuiltIn
+start = time.perf_counter()
+from ImageHorizonLibrary import ImageHorizonLibrary
+ImageHorizonLibrary(reference_folder='.')
+print(json.dumps([time.perf_counter() - start,
+                  [name for name in %r if name in sys.modules]]))
+''' % (HEAVY_MODULES,)
 
 
 class TestMainClass(TestCase):
@@ -72,6 +90,24 @@ class TestMainClass(TestCase):
         _, stderr = p.communicate()
         self.assertNotEqual(stderr, '')
 
+    def test_importing_is_lazy(self):
+        env = dict(os.environ, PYTHONPATH=SRCDIR)
+        timings = []
+        # The fastest of a few imports is compared with the budget, so a
+        # single import slowed down by a busy machine does not fail.
+        for _ in range(IMPORT_ATTEMPTS):
+            p = Popen([sys.executable, '-c', IMPORT_SCRIPT], stdout=PIPE,
+                      stderr=PIPE, env=env)
+            stdout, stderr = p.communicate()
+            self.assertEqual(p.returncode, 0, stderr)
+            elapsed, imported = json.loads(
+                stdout.decode('UTF-8').splitlines()[-1])
+            self.assertEqual(imported, [])
+            timings.append(elapsed)
+            if elapsed < IMPORT_BUDGET:
+                break
+        self.assertLess(min(timings), IMPORT_BUDGET)
+
     def test_set_reference_folder(self):
         self.assertEqual(self.lib.reference_folder, None)
         self.lib.set_reference_folder('/test/path')
@@ -102,3 +138,87 @@ class TestMainClass(TestCase):
 
         self.lib.set_confidence(None)
         self.assertEqual(self.lib.confidence, None)
+
+    def test_set_search_region(self):
+        from ImageHorizonLibrary import InvalidRegionException
+
+        self.assertEqual(self.lib.search_region, None)
+
+        self.lib.set_search_region('10, 20, 300, 400')
+        self.assertEqual(self.lib.search_region, (10, 20, 300, 400))
+
+        self.lib.set_search_region(['-10', '-20', '30', '40'], (100, 200))
+        self.assertEqual(self.lib.search_region, (90, 180, 30, 40))
+
+        self.lib.set_search_region('window:My App')
+        self.assertEqual(self.lib.search_region, 'window:My App')
+
+        for invalid_region in ('1, 2, 3', 'a, b, c, d', '0, 0, 0, 10', 123):
+            with self.assertRaises(InvalidRegionException):
+                self.lib.set_search_region(invalid_region)
+        with self.assertRaises(InvalidRegionException):
+            self.lib.set_search_region('window:My App', (1, 2))
+
+        self.lib.set_search_region()
+        self.assertEqual(self.lib.search_region, None)
+
+    def test_set_polling_strategy(self):
+        from ImageHorizonLibrary import PollingException
+
+        self.assertEqual(self.lib._polling.strategy, 'fixed')
+        self.assertEqual(self.lib._polling.interval, 0.1)
+
+        self.lib.set_polling_strategy('backoff', '0.05', '2')
+        self.assertEqual(self.lib._polling.strategy, 'backoff')
+        self.assertEqual(self.lib._polling.interval, 0.05)
+        self.assertEqual(self.lib._polling.max_interval, 2)
+
+        with self.assertRaises(PollingException):
+            self.lib.set_polling_strategy('spin')
+        self.assertEqual(self.lib._polling.strategy, 'backoff')
+
+    def test_set_scale_range(self):
+        from ImageHorizonLibrary import ImageHorizonLibrary
+
+        self.assertEqual(self.lib._scaling, None)
+
+        self.lib.set_scale_range('0.5', '1.5', '0.5')
+        self.assertEqual(self.lib._scaling.scales, [1.0, 0.5, 1.5])
+
+        self.lib.set_scale_range(1.25)
+        self.assertEqual(self.lib._scaling.scales, [1.25])
+
+        self.lib.set_scale_range()
+        self.assertEqual(self.lib._scaling, None)
+
+        lib = ImageHorizonLibrary(scale_range='1, 1.5', remember_scale=False)
+        self.assertEqual(lib._scaling.scales, [1.0, 1.05, 1.1, 1.15, 1.2,
+                                               1.25, 1.3, 1.35, 1.4, 1.45,
+                                               1.5])
+        self.assertFalse(lib._scaling.remember)
+
+    def test_set_matching_backend(self):
+        from ImageHorizonLibrary import BackendException
+
+        self.assertEqual(self.lib._backend.name, 'pyscreeze')
+        self.assertEqual(self.lib.set_matching_backend('Auto'), 'pyscreeze')
+        with self.assertRaises(BackendException):
+            self.lib.set_matching_backend('nonexistent')
+
+    def test_set_match_strategy(self):
+        from ImageHorizonLibrary import BackendException
+
+        self.assertEqual(self.lib.match_strategy, 'best')
+        self.assertEqual(self.lib.set_match_strategy('FIRST'), 'best')
+        self.assertEqual(self.lib.match_strategy, 'first')
+        with self.assertRaises(BackendException):
+            self.lib.set_match_strategy('fastest')
+
+    def test_set_capture_backend(self):
+        from ImageHorizonLibrary import BackendException
+
+        self.assertEqual(self.lib._capture_backend.name, 'pyautogui')
+        self.assertEqual(self.lib.set_capture_backend('image'), 'pyautogui')
+        self.assertEqual(self.lib._capture_backend.name, 'image')
+        with self.assertRaises(BackendException):
+            self.lib.set_capture_backend('nonexistent')
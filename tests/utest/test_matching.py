@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase, skipUnless
+
+from mock import MagicMock, patch
+from PIL import Image
+
+from helpers import make_pattern, np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+
+class TestMatchingBackends(TestCase):
+    def setUp(self):
+        self.mock = MagicMock()
+        self.patcher = patch.dict('sys.modules', {'pyautogui': self.mock})
+        self.patcher.start()
+        import ImageHorizonLibrary
+        self.module = ImageHorizonLibrary
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_pyscreeze_backend(self):
+        backend = self.module.get_matching_backend('pyscreeze')
+        self.mock.locate.return_value = (1, 2, 3, 4)
+        self.assertEqual(backend.locate('needle', 'haystack'),
+                         (1, 2, 3, 4, None))
+        self.mock.locate.assert_called_once_with('needle', 'haystack')
+        self.mock.reset_mock()
+
+        backend.locate('needle', 'haystack', confidence=0.8)
+        self.mock.locate.assert_called_once_with('needle', 'haystack',
+                                                 confidence=0.8)
+
+    def test_pyscreeze_backend_not_found(self):
+        class ImageNotFoundException(Exception):
+            pass
+
+        backend = self.module.get_matching_backend('pyscreeze')
+        self.mock.locate.return_value = None
+        self.assertIsNone(backend.locate('needle', 'haystack'))
+        self.mock.locate.side_effect = ImageNotFoundException()
+        self.assertIsNone(backend.locate('needle', 'haystack'))
+        self.mock.locate.side_effect = IOError()
+        with self.assertRaises(IOError):
+            backend.locate('needle', 'haystack')
+
+    @skipUnless(cv2 is not None, 'OpenCV is not installed')
+    def test_opencv_backend(self):
+        backend = self.module.get_matching_backend('opencv')
+        haystack = make_pattern(200, 100)
+        needle = haystack.crop((120, 30, 160, 50))
+        match = backend.locate(needle, haystack)
+        self.assertEqual(match[:4], (120, 30, 40, 20))
+        self.assertGreater(match.score, 0.999)
+        self.assertIsNone(backend.locate(make_pattern(40, 20, seed=1),
+                                         haystack, confidence=0.9))
+        self.assertIsNone(backend.locate(haystack, needle))
+
+    @skipUnless(cv2 is not None, 'OpenCV is not installed')
+    def test_opencv_best_match_ignores_confidence(self):
+        backend = self.module.get_matching_backend('opencv')
+        haystack = make_pattern(200, 100)
+        needle = np.array(haystack.crop((120, 30, 160, 50)))
+        needle[5:15, 10:30] = 0
+        self.assertIsNone(backend.locate(needle, haystack))
+        match = backend.best_match(needle, haystack)
+        self.assertEqual(match[:4], (120, 30, 40, 20))
+        self.assertLess(match.score, 0.999)
+        self.assertIsNone(backend.best_match(haystack, needle))
+
+    @skipUnless(np is not None, 'NumPy is not installed')
+    def test_numpy_backend(self):
+        backend = self.module.get_matching_backend('numpy')
+        haystack = make_pattern(200, 100)
+        needle = haystack.crop((120, 30, 160, 50))
+        self.assertEqual(backend.locate(needle, haystack),
+                         (120, 30, 40, 20, 1.0))
+        self.assertIsNone(backend.locate(make_pattern(40, 20, seed=1),
+                                         haystack))
+        self.assertIsNone(backend.locate(haystack, needle))
+
+    @skipUnless(np is not None, 'NumPy is not installed')
+    def test_numpy_backend_finds_first_of_many(self):
+        backend = self.module.get_matching_backend('numpy')
+        needle = make_pattern(10, 10)
+        haystack = Image.new('RGB', (100, 100), 'white')
+        for position in ((60, 70), (5, 40), (80, 40)):
+            haystack.paste(needle, position)
+        self.assertEqual(backend.locate(needle, haystack)[:2], (5, 40))
+        self.assertEqual([match[:2] for match in
+                          backend.locate_all(needle, haystack)],
+                         [(5, 40), (80, 40), (60, 70)])
+
+    @skipUnless(np is not None, 'NumPy is not installed')
+    def test_numpy_backend_with_uniform_rows(self):
+        backend = self.module.get_matching_backend('numpy')
+        needle = Image.new('RGB', (30, 20), 'white')
+        needle.paste(make_pattern(10, 5), (10, 12))
+        haystack = Image.new('RGB', (300, 200), 'white')
+        haystack.paste(needle, (200, 150))
+        self.assertEqual(backend.locate(needle, haystack),
+                         (200, 150, 30, 20, 1.0))
+        self.assertEqual(backend.locate(Image.new('RGB', (5, 5), 'white'),
+                                        haystack), (0, 0, 5, 5, 1.0))
+
+    @skipUnless(np is not None, 'NumPy is not installed')
+    def test_numpy_backend_with_confidence(self):
+        backend = self.module.get_matching_backend('numpy')
+        haystack = make_pattern(200, 100)
+        needle = haystack.crop((120, 30, 160, 50))
+        if backend._opencv is None:
+            self.skipTest('OpenCV is not installed')
+        with patch.object(backend._opencv, 'locate') as opencv_locate:
+            backend.locate(needle, haystack, confidence=0.9)
+            opencv_locate.assert_called_once_with(needle, haystack, 0.9)
+
+    def test_pyscreeze_backend_locate_all(self):
+        backend = self.module.get_matching_backend('pyscreeze')
+        self.mock.locateAll.return_value = iter([(1, 2, 3, 4), (5, 6, 3, 4)])
+        self.assertEqual(backend.locate_all('needle', 'haystack'),
+                         [(1, 2, 3, 4, None), (5, 6, 3, 4, None)])
+
+    @skipUnless(cv2 is not None, 'OpenCV is not installed')
+    def test_opencv_backend_locate_all(self):
+        backend = self.module.get_matching_backend('opencv')
+        needle = make_pattern(10, 10)
+        haystack = Image.new('RGB', (100, 100), 'white')
+        for position in ((60, 70), (5, 40)):
+            haystack.paste(needle, position)
+        matches = backend.locate_all(needle, haystack, confidence=0.8)
+        self.assertEqual(sorted(match[:2] for match in
+                                self.module.suppress_overlapping(matches)),
+                         [(5, 40), (60, 70)])
+
+    @skipUnless(cv2 is not None, 'OpenCV is not installed')
+    def test_opencv_backend_locate_first(self):
+        backend = self.module.get_matching_backend('opencv')
+        needle = np.asarray(make_pattern(30, 20))
+        similar = needle.copy()
+        similar[::3, ::3] = 0
+        haystack = np.full((300, 200, 3), 255, dtype=np.uint8)
+        haystack[250:270, 50:80] = needle
+        haystack[70:90, 100:130] = similar
+        best = backend.locate(needle, haystack, confidence=0.7)
+        self.assertEqual(best[:4], (50, 250, 30, 20))
+        first = backend.locate_first(needle, haystack, confidence=0.7)
+        self.assertEqual(first[:4], (100, 70, 30, 20))
+        self.assertTrue(0.7 <= first.score < best.score)
+        self.assertEqual(backend.locate_first(needle, haystack)[:4],
+                         (50, 250, 30, 20))
+        self.assertIsNone(backend.locate_first(make_pattern(30, 20, seed=1),
+                                               haystack, confidence=0.9))
+        self.assertIsNone(backend.locate_first(haystack, needle))
+
+    @skipUnless(np is not None, 'NumPy is not installed')
+    def test_numpy_backend_locate_first(self):
+        backend = self.module.get_matching_backend('numpy')
+        haystack = make_pattern(200, 100)
+        needle = haystack.crop((120, 30, 160, 50))
+        self.assertEqual(backend.locate_first(needle, haystack),
+                         (120, 30, 40, 20, 1.0))
+        if backend._opencv is None:
+            self.skipTest('OpenCV is not installed')
+        with patch.object(backend._opencv, 'locate_first') as opencv_locate:
+            backend.locate_first(needle, haystack, confidence=0.9)
+            opencv_locate.assert_called_once_with(needle, haystack, 0.9)
+
+    @skipUnless(np is not None, 'NumPy is not installed')
+    def test_conversion_does_not_hold_lock(self):
+        backend = self.module.get_matching_backend('numpy')
+        haystack = make_pattern(20, 10)
+        convert = backend._convert
+
+        def unlocked_convert(image, grayscale=False):
+            self.assertFalse(backend._lock.locked())
+            return convert(image, grayscale)
+
+        with patch.object(backend, '_convert', side_effect=unlocked_convert):
+            array = backend._as_array(haystack)
+            self.assertIs(backend._as_array(haystack), array)
+
+    def test_match_strategy(self):
+        self.assertEqual(self.module.get_match_strategy('First'), 'first')
+        with self.assertRaises(self.module.BackendException):
+            self.module.get_match_strategy('fastest')
+
+    def test_suppress_overlapping(self):
+        Match = self.module.Match
+        matches = [Match(0, 0, 10, 10, 0.9), Match(1, 0, 10, 10, 0.95),
+                   Match(8, 0, 10, 10, 0.8), Match(50, 50, 10, 10, 0.85)]
+        self.assertEqual(self.module.suppress_overlapping(matches),
+                         [matches[1], matches[3], matches[2]])
+        self.assertEqual(self.module.suppress_overlapping(matches, 0.1),
+                         [matches[1], matches[3]])
+
+    def test_suppress_overlapping_without_scores(self):
+        Match = self.module.Match
+        matches = [Match(1, 0, 10, 10, None), Match(0, 0, 10, 10, None)]
+        self.assertEqual(self.module.suppress_overlapping(matches),
+                         [matches[0]])
+
+    def test_auto_backend(self):
+        backend = self.module.get_matching_backend('AUTO')
+        expected = 'numpy' if np is not None else 'pyscreeze'
+        self.assertEqual(backend.name, expected)
+
+    def test_invalid_backend(self):
+        with self.assertRaises(self.module.BackendException):
+            self.module.get_matching_backend('sikuli')
+
+    def test_register_backend(self):
+        class UnavailableBackend(self.module.MatchingBackend):
+            name = 'unavailable'
+
+            @classmethod
+            def is_available(cls):
+                return False
+
+        from ImageHorizonLibrary.recognition._matching import BACKENDS
+        self.module.register_matching_backend(UnavailableBackend)
+        self.addCleanup(BACKENDS.pop, 'unavailable')
+        with self.assertRaises(self.module.BackendException):
+            self.module.get_matching_backend('unavailable')
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+
+from mock import MagicMock, patch
+from PIL import Image
+
+
+class TestPolling(TestCase):
+    def setUp(self):
+        self.patcher = patch.dict('sys.modules', {'pyautogui': MagicMock()})
+        self.patcher.start()
+        from ImageHorizonLibrary import PollingStrategy
+        self.PollingStrategy = PollingStrategy
+        self.clock = [0.0]
+        self.sleep = MagicMock(side_effect=self._advance_clock)
+        self.time_patcher = patch('ImageHorizonLibrary.recognition._polling.time',
+                                  side_effect=lambda: self.clock[0])
+        self.sleep_patcher = patch('ImageHorizonLibrary.recognition._polling.sleep',
+                                   self.sleep)
+        self.time_patcher.start()
+        self.sleep_patcher.start()
+
+    def tearDown(self):
+        self.sleep_patcher.stop()
+        self.time_patcher.stop()
+        self.patcher.stop()
+
+    def _advance_clock(self, seconds):
+        self.clock[0] += seconds
+
+    def _sleeps(self, strategy, timeout):
+        attempts = list(strategy.start(timeout))
+        return attempts, [c[1][0] for c in self.sleep.mock_calls]
+
+    def test_fixed(self):
+        attempts, sleeps = self._sleeps(self.PollingStrategy('fixed', 0.25), 1)
+        self.assertEqual(attempts, [1, 2, 3, 4, 5])
+        self.assertEqual(sleeps, [0.25, 0.25, 0.25, 0.25])
+
+    def test_backoff(self):
+        strategy = self.PollingStrategy('BACKOFF', 0.125, 0.5)
+        attempts, sleeps = self._sleeps(strategy, 2)
+        self.assertEqual(sleeps, [0.125, 0.25, 0.5, 0.5, 0.5, 0.125])
+        self.assertEqual(len(attempts), 7)
+
+    def test_last_sleep_is_cut_to_timeout(self):
+        _, sleeps = self._sleeps(self.PollingStrategy('fixed', 2), 3)
+        self.assertEqual(sleeps, [2, 1])
+
+    def test_at_least_one_attempt_is_made(self):
+        attempts, sleeps = self._sleeps(self.PollingStrategy('fixed', 2), 0)
+        self.assertEqual((attempts, sleeps), ([1], []))
+
+    def test_frame_changed(self):
+        polling = self.PollingStrategy('change').start(1)
+        black = Image.new('RGB', (10, 10))
+        white = Image.new('RGB', (10, 10), 'white')
+        changes = [polling.frame_changed(frame)
+                   for frame in (black, black.copy(), white, white, black)]
+        self.assertEqual(changes, [True, False, True, False, True])
+        self.assertEqual(polling.matches_skipped, 2)
+
+    def test_frames_are_not_compared_without_change_strategy(self):
+        polling = self.PollingStrategy('fixed').start(1)
+        frame = MagicMock()
+        self.assertTrue(polling.frame_changed(frame))
+        self.assertTrue(polling.frame_changed(frame))
+        self.assertEqual(frame.mock_calls, [])
+
+    def test_invalid_strategy(self):
+        from ImageHorizonLibrary import PollingException
+
+        for args in (('busy',), ('fixed', 'fast'), ('fixed', -1),
+                     ('backoff', 2, 1)):
+            with self.assertRaises(PollingException):
+                self.PollingStrategy(*args)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase, skipUnless
+
+from mock import MagicMock, patch
+
+from helpers import make_screen, np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+
+@skipUnless(cv2 is not None, 'OpenCV is not installed')
+class TestCoarseToFineBackend(TestCase):
+    def setUp(self):
+        self.patcher = patch.dict('sys.modules', {'pyautogui': MagicMock()})
+        self.patcher.start()
+        import ImageHorizonLibrary
+        self.module = ImageHorizonLibrary
+        self.backend = ImageHorizonLibrary.get_matching_backend('coarse')
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_same_result_as_opencv(self):
+        screen, needle = make_screen()
+        opencv = self.module.get_matching_backend('opencv')
+        match = self.backend.locate(needle, screen)
+        self.assertEqual(match[:4], (413, 321, 64, 48))
+        self.assertAlmostEqual(match.score,
+                               opencv.locate(needle, screen).score, 5)
+        self.assertEqual(len(self.backend._coarse_frames), 1)
+        self.backend.locate(needle, screen)
+        self.assertEqual(len(self.backend._coarse_frames), 1)
+
+    def test_confidence(self):
+        screen, needle = make_screen()
+        pixels = np.array(needle)
+        pixels[10:30, 10:50] = 0
+        self.assertIsNone(self.backend.locate(pixels, screen))
+        match = self.backend.locate(pixels, screen, confidence=0.5)
+        self.assertEqual(match[:2], (413, 321))
+        self.assertLess(match.score, 0.999)
+        self.assertEqual(self.backend.best_match(pixels, screen), match)
+
+    def test_grayscale_reference_image(self):
+        screen, needle = make_screen()
+        gray = np.asarray(needle.convert('L'))
+        self.assertEqual(self.backend.locate(gray, screen)[:2], (413, 321))
+
+    def test_small_reference_image_is_matched_at_full_resolution(self):
+        screen, needle = make_screen()
+        needle = needle.crop((0, 0, 40, 20))
+        self.assertEqual(self.backend.locate(needle, screen)[:2], (413, 321))
+        self.assertEqual(self.backend._coarse_frames, [])
+
+    def test_reference_image_larger_than_screen(self):
+        screen, needle = make_screen()
+        self.assertIsNone(self.backend.locate(screen, needle))
@@ -2,12 +2,24 @@
 import time
 
 from unittest import TestCase
-from os.path import abspath, dirname, join as path_join
+from os import remove
+from os.path import abspath, basename, dirname, join as path_join
+from shutil import copy, rmtree
+from tempfile import mkdtemp
 from mock import call, MagicMock, patch
+from PIL import Image
 
 CURDIR = abspath(dirname(__file__))
 TESTIMG_DIR = path_join(CURDIR, 'reference_images')
 
+
+def decoded(path):
+    with open(path, 'rb') as image_file:
+        image = Image.open(image_file)
+        image.load()
+    return image
+
+
 class TestRecognizeImages(TestCase):
     def setUp(self):
         self.mock = MagicMock()
@@ -28,7 +40,9 @@ class TestRecognizeImages(TestCase):
         self.lib.has_cv = True
         self.lib.locate('mY_PiCtURe')
         expected_path = path_join(CURDIR, 'symbolic_link', 'my_picture.png')
-        self.mock.locateOnScreen.assert_called_once_with(expected_path, confidence=0.5)
+        self.mock.locate.assert_called_once_with(
+            decoded(expected_path), self.mock.screenshot.return_value,
+            confidence=0.5)
         self.mock.reset_mock()
 
     def test_find_with_confidence_no_opencv(self):
@@ -37,9 +51,149 @@ class TestRecognizeImages(TestCase):
         self.lib.has_cv = False
         self.lib.locate('mY_PiCtURe')
         expected_path = path_join(CURDIR, 'symbolic_link', 'my_picture.png')
-        self.mock.locateOnScreen.assert_called_once_with(expected_path)
+        self.mock.locate.assert_called_once_with(
+            decoded(expected_path), self.mock.screenshot.return_value)
         self.mock.reset_mock()
 
+    def test_reference_image_is_decoded_once(self):
+        for _ in range(3):
+            self.lib.locate('my_picture')
+        self.assertEqual(self.lib._image_cache.misses, 1)
+        self.assertEqual(self.lib._image_cache.hits, 2)
+
+    def test_deleted_reference_image(self):
+        from ImageHorizonLibrary import InvalidImageException
+
+        folder = self._make_reference_folder('a.png')
+        self.lib.reference_folder = folder
+        self.lib.set_matching_backend('numpy')
+        self.mock.screenshot.return_value = Image.new('RGB', (50, 50))
+        self.lib.does_exist('a')
+        remove(path_join(folder, 'a.png'))
+        for _ in range(2):
+            with self.assertRaises(InvalidImageException):
+                self.lib.locate('a')
+
+    def test_reference_folder_is_indexed_once(self):
+        for _ in range(3):
+            self.lib.locate('my_picture')
+        self.assertEqual(self.lib._reference_index.builds, 1)
+        self.lib.set_reference_folder(path_join(CURDIR, 'symbolic_link'))
+        self.lib.locate('my_picture')
+        self.assertEqual(self.lib._reference_index.builds, 1)
+        self.assertEqual(self.lib._reference_index.folder,
+                         path_join(CURDIR, 'symbolic_link'))
+
+    def test_locate_from_reference_bundle(self):
+        from ImageHorizonLibrary import compile_bundle
+
+        folder = mkdtemp()
+        self.addCleanup(rmtree, folder)
+        self._screen_with_pictures((600, 300))
+        for grayscale in (False, True):
+            bundle = path_join(folder, 'images-%s.bundle' % grayscale)
+            compile_bundle(TESTIMG_DIR, bundle, grayscale)
+            self.lib.set_reference_folder(bundle)
+            for backend in ('numpy', 'opencv'):
+                if backend == 'opencv' and not self.lib.has_cv:
+                    continue
+                self.lib.set_matching_backend(backend)
+                self.assertEqual(self.lib.locate('my picture'), (850, 461))
+        self.assertEqual(self.lib._image_cache.misses, 0)
+
+    def _make_reference_folder(self, *names):
+        folder = mkdtemp()
+        self.addCleanup(rmtree, folder)
+        for name in names:
+            copy(path_join(TESTIMG_DIR, 'my_picture.png'),
+                 path_join(folder, name))
+        return folder
+
+    def test_folder_is_matched_against_one_capture(self):
+        folder = self._make_reference_folder('c.png', 'a.png', 'b.png')
+        self.lib.reference_folder = dirname(folder)
+        self.mock.locate.side_effect = [None, None, (0, 0, 10, 10)]
+        self.lib.locate(basename(folder))
+        self.mock.screenshot.assert_called_once_with()
+        haystack = self.mock.screenshot.return_value
+        self.assertEqual(self.mock.locate.mock_calls,
+                         [call(decoded(path_join(folder, name)), haystack)
+                          for name in ('a.png', 'b.png', 'c.png')])
+
+    def test_folder_is_matched_concurrently(self):
+        folder = self._make_reference_folder('a.png', 'b.png', 'c.png')
+        self.lib.reference_folder = dirname(folder)
+        self.lib.matching_threads = 3
+        from ImageHorizonLibrary import Match
+        found = {path_join(folder, 'b.png'): Match(1, 1, 2, 2, None),
+                 path_join(folder, 'c.png'): Match(5, 5, 2, 2, None)}
+        with patch.object(self.lib, '_try_locate',
+                          side_effect=lambda ref, *args: found.get(ref)):
+            self.lib.locate(basename(folder))
+        self.mock.screenshot.assert_called_once_with()
+        self.mock.center.assert_called_once_with((1, 1, 2, 2))
+
+    def test_folder_match_follows_strategy(self):
+        from ImageHorizonLibrary import Match
+
+        folder = self._make_reference_folder('a.png', 'b.png', 'c.png')
+        self.lib.reference_folder = dirname(folder)
+        found = {path_join(folder, 'b.png'): Match(1, 1, 2, 2, 0.8),
+                 path_join(folder, 'c.png'): Match(5, 5, 2, 2, 0.9)}
+        self.mock.center.side_effect = lambda box: MagicMock(x=box[0],
+                                                             y=box[1])
+        for threads in (1, 3):
+            self.lib.matching_threads = threads
+            with patch.object(self.lib, '_try_locate',
+                              side_effect=lambda ref, *args: found.get(ref)):
+                self.assertEqual(self.lib.locate(basename(folder),
+                                                 with_score=True),
+                                 (5, 5, 0.9))
+                self.assertEqual(self.lib.locate(basename(folder),
+                                                 match_strategy='first',
+                                                 with_score=True),
+                                 (1, 1, 0.8))
+
+    def test_locate_in_region(self):
+        self.mock.locate.return_value = (5, 10, 20, 20)
+        self.lib.locate('my_picture', region='100, 200, 300, 400')
+        self.mock.screenshot.assert_called_once_with(
+            region=(100, 200, 300, 400))
+        self.mock.center.assert_called_once_with((105, 210, 20, 20))
+
+    def test_locate_in_search_region(self):
+        self.mock.locate.return_value = (5, 10, 20, 20)
+        self.lib.set_search_region([100, 200, 300, 400])
+        self.lib.locate('my_picture')
+        self.mock.screenshot.assert_called_once_with(
+            region=(100, 200, 300, 400))
+        self.mock.reset_mock()
+
+        self.lib.locate('my_picture', region=(0, 0, 50, 50))
+        self.mock.screenshot.assert_called_once_with(region=(0, 0, 50, 50))
+
+    def test_locate_in_region_with_retina(self):
+        self.lib.has_retina = True
+        self.mock.locate.return_value = (5, 10, 20, 20)
+        self.lib.locate('my_picture', region=(100, 200, 300, 400))
+        self.mock.screenshot.assert_called_once_with(
+            region=(200, 400, 600, 800))
+        self.mock.center.assert_called_once_with((205, 410, 20, 20))
+
+    def test_locate_in_window(self):
+        window = MagicMock(left=10, top=20, width=30, height=40)
+        self.mock.getWindowsWithTitle.return_value = [window]
+        self.lib.wait_for('my_picture', region='window: Calculator')
+        self.mock.getWindowsWithTitle.assert_called_once_with('Calculator')
+        self.mock.screenshot.assert_called_once_with(region=(10, 20, 30, 40))
+
+    def test_locate_in_missing_window(self):
+        from ImageHorizonLibrary import InvalidRegionException
+
+        self.mock.getWindowsWithTitle.return_value = []
+        with self.assertRaises(InvalidRegionException):
+            self.lib.locate('my_picture', region='window:Calculator')
+
     def test_click_image(self):
         with patch(self.locate, return_value=(0, 0)):
             self.lib.click_image('my_picture')
@@ -112,10 +266,499 @@ class TestRecognizeImages(TestCase):
             # default timeout
             self.assertLess(stop-start, 10)
 
+    def test_wait_for_matches_only_changed_screen(self):
+        self.lib.set_polling_strategy('change', interval=0)
+        frames = [Image.new('RGB', (10, 10)), Image.new('RGB', (10, 10)),
+                  Image.new('RGB', (10, 10), 'white')]
+        self.mock.screenshot.side_effect = frames
+        self.mock.locate.side_effect = [None, (0, 0, 1, 1)]
+        with patch.object(self.lib, '_run_on_failure'):
+            self.lib.wait_for('my_picture', timeout=5)
+        self.assertEqual(self.mock.screenshot.call_count, 3)
+        self.assertEqual([c[1][1] for c in self.mock.locate.mock_calls],
+                         [frames[0], frames[2]])
+
+    def _frames(self, *frames):
+        self.mock.screenshot.side_effect = list(frames)
+        self.lib.set_polling_strategy('fixed', interval=0)
+        self.lib.set_matching_backend('numpy')
+
+    def test_wait_until_image_vanishes(self):
+        needle = self._screen_with_pictures((600, 300))
+        screen = self.mock.screenshot.return_value
+        clock = screen.copy()
+        clock.paste(Image.new('RGB', (20, 10), 'black'), (1500, 1100))
+        moved = Image.new('RGB', (1600, 1200), 'white')
+        moved.paste(needle, (20, 30))
+        self._frames(screen, clock, moved, Image.new('RGB', (1600, 1200)))
+        self.lib.wait_until_image_vanishes('my_picture', timeout=5)
+        self.assertEqual(self.mock.screenshot.call_count, 4)
+        counters = self.lib.get_recognition_statistics()['counters']
+        self.assertEqual(counters['unchanged frames'], 1)
+        self.assertEqual(counters['found'], 2)
+
+    def test_wait_until_image_vanishes_waits_for_all_occurrences(self):
+        needle = self._screen_with_pictures((20, 30), (600, 300))
+        both = self.mock.screenshot.return_value
+        one = both.copy()
+        one.paste(Image.new('RGB', needle.size, 'white'), (20, 30))
+        none = Image.new('RGB', (1600, 1200), 'white')
+        self._frames(both, one, one.copy(), none)
+        self.lib.wait_until_image_vanishes('my_picture', timeout=5)
+        self.assertEqual(self.mock.screenshot.call_count, 4)
+        counters = self.lib.get_recognition_statistics()['counters']
+        self.assertEqual(counters['found'], 2)
+
+    def test_wait_until_image_vanishes_fails(self):
+        from ImageHorizonLibrary import ImageVisibleException
+
+        self._screen_with_pictures((600, 300))
+        self.lib.set_polling_strategy('fixed', interval=0.05)
+        self.lib.set_matching_backend('numpy')
+        with patch.object(self.lib, '_run_on_failure') as run_on_failure, \
+                self.assertRaises(ImageVisibleException):
+            self.lib.wait_until_image_vanishes('my_picture', timeout=0.3)
+        run_on_failure.assert_called_once_with()
+        counters = self.lib.get_recognition_statistics()['counters']
+        self.assertEqual(counters['searches'], 1)
+        self.assertGreater(counters['unchanged frames'], 1)
+
+    def test_wait_for_matches_only_changed_tiles(self):
+        from ImageHorizonLibrary.recognition._matching import image_size
+
+        needle = self._screen_with_pictures((600, 300))
+        blank = Image.new('RGB', (1600, 1200), 'white')
+        clock = blank.copy()
+        clock.paste(Image.new('RGB', (20, 10), 'black'), (1500, 1100))
+        appeared = clock.copy()
+        appeared.paste(needle, (600, 300))
+        self._frames(blank, clock, clock.copy(), appeared)
+        sizes = []
+        try_locate = self.lib._try_locate
+
+        def record_size(ref_image, haystack, offset):
+            sizes.append(image_size(haystack))
+            return try_locate(ref_image, haystack, offset)
+
+        with patch.object(self.lib, '_try_locate', side_effect=record_size):
+            self.assertEqual(self.lib.wait_for('my_picture', timeout=5),
+                             (850, 461))
+        self.assertEqual(sizes[0], (1600, 1200))
+        # The tiles of the clock grown by the size of the reference image.
+        self.assertEqual(sizes[1], (1600 - (1472 - 499), 1200 - (1088 - 321)))
+        self.assertEqual(len(sizes), 3)
+        counters = self.lib.get_recognition_statistics()['counters']
+        self.assertEqual(counters['unchanged frames'], 1)
+
+    def test_wait_for_honours_strategy_and_folder_order_in_regions(self):
+        from ImageHorizonLibrary import Match
+
+        folder = self._make_reference_folder('a.png', 'b.png')
+        self.lib.reference_folder = dirname(folder)
+        blank = Image.new('RGB', (1600, 1200), 'white')
+        changed = blank.copy()
+        for position in ((100, 100), (1000, 900)):
+            changed.paste(Image.new('RGB', (10, 10), 'black'), position)
+        self._frames(blank, changed)
+
+        def try_locate(ref_image, haystack, offset):
+            # a.png is in both changed regions, scoring best in the lower
+            # one, and b.png only in the upper one.
+            if haystack.size == (1600, 1200):
+                return None
+            name = basename(ref_image)
+            if name == 'a.png':
+                return Match(5, 5, 2, 2, 0.9 if offset[1] > 500 else 0.8)
+            return Match(5, 5, 2, 2, 0.85) if offset[1] < 500 else None
+
+        self.mock.center.side_effect = lambda box: MagicMock(x=box[0],
+                                                             y=box[1])
+        with patch.object(self.lib, '_try_locate', side_effect=try_locate):
+            best = self.lib.wait_for(basename(folder), timeout=5)
+            self._frames(blank, changed)
+            first = self.lib.wait_for(basename(folder), timeout=5,
+                                      match_strategy='first')
+        self.assertGreater(best[1], 500)
+        self.assertLess(first[1], 500)
+
+    def test_wait_for_scaled_image_drawn_over_many_polls(self):
+        if not self.lib.has_cv:
+            self.skipTest('OpenCV is not installed')
+        needle = decoded(path_join(TESTIMG_DIR, 'my_picture.png'))
+        scaled = needle.resize((needle.width * 2, needle.height * 2))
+        blank = Image.new('RGB', (1600, 1200), 'white')
+        top_half = blank.copy()
+        top_half.paste(scaled.crop((0, 0, scaled.width,
+                                    scaled.height // 2)), (96, 76))
+        drawn = blank.copy()
+        drawn.paste(scaled, (96, 76))
+        self._frames(blank, top_half, drawn)
+        self.lib.set_matching_backend('opencv')
+        self.lib.set_confidence(0.9)
+        self.lib.set_scale_range(1.0, 2.0, 0.5)
+        self.mock.center.side_effect = lambda box: MagicMock(x=box[0],
+                                                             y=box[1])
+        self.assertEqual(self.lib.wait_for('my_picture', timeout=5),
+                         (96, 76))
+
+    def test_wait_for_screen_to_settle(self):
+        frames = [Image.new('RGB', (100, 100), color)
+                  for color in ('red', 'green', 'blue', 'blue')]
+        self._frames(*frames)
+        self.lib.wait_for_screen_to_settle(timeout=5, stable_time=0)
+        self.assertEqual(self.mock.screenshot.call_count, 4)
+
+    def test_wait_for_screen_to_settle_fails(self):
+        from ImageHorizonLibrary import ScreenNotSettledException
+
+        colors = ['red', 'green'] * 100
+        self.mock.screenshot.side_effect = lambda: Image.new(
+            'RGB', (100, 100), colors.pop())
+        self.lib.set_polling_strategy('fixed', interval=0.01)
+        with patch.object(self.lib, '_run_on_failure'), \
+                self.assertRaises(ScreenNotSettledException):
+            self.lib.wait_for_screen_to_settle(timeout=0.2, stable_time=0)
+
+    def test_locate_with_matching_backend(self):
+        if not self.lib.has_cv:
+            self.skipTest('OpenCV is not installed')
+        needle = decoded(path_join(TESTIMG_DIR, 'my_picture.png'))
+        screen = Image.new('RGB', (800, 600), 'white')
+        screen.paste(needle, (30, 40))
+        self.mock.screenshot.return_value = screen
+        self.lib.set_matching_backend('opencv')
+        self.lib.locate('my_picture')
+        self.mock.locate.assert_not_called()
+        self.mock.center.assert_called_once_with(
+            (30, 40, needle.width, needle.height))
+
+    def _screen_with_pictures(self, *positions):
+        needle = decoded(path_join(TESTIMG_DIR, 'my_picture.png'))
+        screen = Image.new('RGB', (1600, 1200), 'white')
+        for position in positions:
+            screen.paste(needle, position)
+        self.mock.screenshot.return_value = screen
+        self.mock.center.side_effect = lambda box: MagicMock(
+            x=box[0] + box[2] // 2, y=box[1] + box[3] // 2)
+        return needle
+
+    def test_locate_with_confidence_import_argument(self):
+        from ImageHorizonLibrary import ImageHorizonLibrary
+        from ImageHorizonLibrary.recognition._matching import BACKENDS
+
+        self._screen_with_pictures((30, 40))
+        for backend in ('numpy', 'opencv', 'coarse'):
+            if not BACKENDS[backend].is_available():
+                continue
+            lib = ImageHorizonLibrary(reference_folder=TESTIMG_DIR,
+                                      confidence='0.9',
+                                      matching_backend=backend)
+            self.assertEqual(lib.confidence, 0.9)
+            self.assertEqual(lib.locate('my_picture'), (280, 201))
+
+    def test_locate_all(self):
+        self._screen_with_pictures((1000, 500), (30, 40), (600, 40))
+        self.lib.set_matching_backend('numpy')
+        self.assertEqual(self.lib.locate_all('my_picture'),
+                         [(280, 201), (850, 201), (1250, 661)])
+        self.mock.screenshot.assert_called_once_with()
+
+    def test_locate_all_in_region_with_scores(self):
+        if not self.lib.has_cv:
+            self.skipTest('OpenCV is not installed')
+        self._screen_with_pictures((20, 30), (520, 30))
+        self.lib.set_matching_backend('opencv')
+        self.lib.set_confidence(0.9)
+        locations = self.lib.locate_all('my_picture',
+                                        region=(100, 100, 1600, 1200),
+                                        with_scores=True)
+        self.assertEqual([location[:2] for location in locations],
+                         [(370, 291), (870, 291)])
+        for location in locations:
+            self.assertGreater(location[2], 0.99)
+
+    def test_locate_with_match_strategy(self):
+        if not self.lib.has_cv:
+            self.skipTest('OpenCV is not installed')
+        needle = self._screen_with_pictures((600, 700))
+        screen = self.mock.screenshot.return_value
+        similar = needle.copy()
+        for x in range(0, needle.width, 3):
+            for y in range(0, needle.height, 3):
+                similar.putpixel((x, y), (0, 0, 0))
+        screen.paste(similar, (30, 40))
+        center = (needle.width // 2, needle.height // 2)
+        self.lib.set_matching_backend('opencv')
+        self.lib.set_confidence(0.7)
+        self.assertEqual(self.lib.locate('my_picture'),
+                         (600 + center[0], 700 + center[1]))
+        x, y, score = self.lib.locate('my_picture', match_strategy='first',
+                                      with_score=True)
+        self.assertEqual((x, y), (30 + center[0], 40 + center[1]))
+        self.assertTrue(0.7 <= score < 0.999)
+        self.assertEqual(self.lib.match_strategy, 'best')
+        self.lib.set_match_strategy('first')
+        self.assertEqual(self.lib.wait_for('my_picture', timeout=0),
+                         (30 + center[0], 40 + center[1]))
+        self.assertEqual(self.lib.wait_for('my_picture', timeout=0,
+                                           match_strategy='best',
+                                           with_score=True)[:2],
+                         (600 + center[0], 700 + center[1]))
+
+    def test_recognition_statistics(self):
+        self._screen_with_pictures((30, 40))
+        self.lib.set_matching_backend('numpy')
+        self.lib.locate('my_picture')
+        self.lib.does_exist('my_picture')
+        self.lib.click_image('my_picture')
+        statistics = self.lib.get_recognition_statistics()
+        self.assertEqual(list(statistics['phases']),
+                         ['capture', 'decode', 'match', 'click'])
+        self.assertEqual(statistics['phases']['match']['count'], 3)
+        self.assertEqual(statistics['counters'],
+                         {'searches': 3, 'found': 3})
+        self.assertEqual(statistics['image cache']['hits'], 2)
+
+    def test_locate_with_image_capture_backend(self):
+        import numpy as np
+
+        self._screen_with_pictures((600, 300))
+        screen = np.asarray(self.mock.screenshot.return_value)
+        self.mock.screenshot.reset_mock()
+        self.lib.set_capture_backend('image')
+        self.lib._capture_backend.set_image(screen)
+        self.lib.set_matching_backend('numpy')
+        self.assertEqual(self.lib.locate('my_picture'), (850, 461))
+        self.assertEqual(self.lib.locate('my_picture',
+                                         region=(500, 200, 700, 500)),
+                         (850, 461))
+        self.lib.set_matching_backend('pyscreeze')
+        self.mock.locate.return_value = (600, 300, 500, 322)
+        self.assertEqual(self.lib.locate('my_picture'), (850, 461))
+        self.mock.screenshot.assert_not_called()
+        haystack = self.mock.locate.call_args[0][1]
+        self.assertIsInstance(haystack, Image.Image)
+
+    def _fail_with_screenshot(self, failure_screenshot):
+        from ImageHorizonLibrary import ImageNotFoundException
+
+        folder = mkdtemp()
+        self.addCleanup(rmtree, folder)
+        self.lib.failure_screenshot = failure_screenshot
+        self.lib.set_screenshot_folder(folder)
+        self.lib.set_matching_backend('numpy')
+        run_keyword = 'robot.libraries.BuiltIn.BuiltIn.run_keyword'
+        with patch(run_keyword,
+                   side_effect=lambda name: self.lib.take_a_screenshot()), \
+                self.assertRaises(ImageNotFoundException):
+            self.lib.locate('my_picture', region=(0, 0, 800, 600))
+        self.mock.screenshot.assert_called_once_with(region=(0, 0, 800, 600))
+        self.assertIsNone(self.lib._last_frame)
+        return Image.open(path_join(folder, 'ImageHorizon-screenshot-1.png'))
+
+    def test_failure_screenshot_is_the_searched_frame(self):
+        self._screen_with_pictures()
+        self.mock.screenshot.return_value = Image.new('RGB', (800, 600),
+                                                      'blue')
+        with self._fail_with_screenshot('frame') as screenshot:
+            self.assertEqual(screenshot.size, (800, 600))
+            self.assertEqual(screenshot.getpixel((10, 10)), (0, 0, 255))
+
+    def test_failure_screenshot_is_annotated(self):
+        if not self.lib.has_cv:
+            self.skipTest('OpenCV is not installed')
+        needle = self._screen_with_pictures()
+        screen = Image.new('RGB', (800, 600), 'white')
+        screen.paste(needle, (100, 200))
+        screen.putpixel((300, 300), (1, 2, 3))
+        self.mock.screenshot.return_value = screen
+        with self._fail_with_screenshot('annotated') as screenshot:
+            self.assertEqual(screenshot.getpixel((100, 200)), (255, 0, 0))
+            self.assertEqual(screenshot.getpixel((599, 521)), (255, 0, 0))
+            self.assertNotEqual(screenshot.getpixel((300, 250)),
+                                (255, 0, 0))
+        self.assertEqual(screen.getpixel((100, 200)),
+                         needle.getpixel((0, 0)))
+
+    def _saved_failure_frames(self):
+        frames = []
+        self.lib.failure_screenshot = 'frame'
+        run_keyword = 'robot.libraries.BuiltIn.BuiltIn.run_keyword'
+        return frames, patch(run_keyword, side_effect=lambda name:
+                             frames.append(self.lib._failure_frame))
+
+    def test_failure_screenshot_is_not_from_earlier_keyword(self):
+        from ImageHorizonLibrary import ScreenNotSettledException
+
+        self._screen_with_pictures((600, 300))
+        self.lib.set_matching_backend('numpy')
+        self.lib.locate('my_picture')
+        self.assertIsNone(self.lib._last_frame)
+        self.lib.set_polling_strategy('fixed', interval=0.01)
+        moving = [Image.new('RGB', (100, 100), (n % 256, 0, 0))
+                  for n in range(1000)]
+        self.mock.screenshot.side_effect = moving
+        frames, run_keyword = self._saved_failure_frames()
+        with run_keyword, self.assertRaises(ScreenNotSettledException):
+            self.lib.wait_for_screen_to_settle(timeout=0.1)
+        self.assertEqual(frames[0].size, (100, 100))
+        self.assertIsNone(self.lib._last_frame)
+
+    def test_failure_screenshot_of_wait_until_image_vanishes(self):
+        from ImageHorizonLibrary import ImageVisibleException
+
+        self._screen_with_pictures((600, 300))
+        screen = self.mock.screenshot.return_value
+        self.lib.set_matching_backend('numpy')
+        self.lib.set_polling_strategy('fixed', interval=0.05)
+        frames, run_keyword = self._saved_failure_frames()
+        with run_keyword, self.assertRaises(ImageVisibleException):
+            self.lib.wait_until_image_vanishes('my_picture', timeout=0.1)
+        self.assertIs(frames[0], screen)
+
+    def test_missing_image_frame_is_not_kept(self):
+        self._screen_with_pictures()
+        self.lib.set_matching_backend('numpy')
+        self.assertFalse(self.lib.does_exist('my_picture'))
+        self.assertIsNone(self.lib._last_frame)
+
+    def test_locate_all_not_found(self):
+        self._screen_with_pictures()
+        self.lib.set_matching_backend('numpy')
+        run_on_failure = MagicMock()
+        with patch.object(self.lib, '_run_on_failure', run_on_failure):
+            self.assertEqual(self.lib.locate_all('my_picture'), [])
+        run_on_failure.assert_not_called()
+
+    def test_locate_with_location_hints(self):
+        from ImageHorizonLibrary import LocationHints
+
+        self.lib._hints = LocationHints()
+        self.lib.set_matching_backend('numpy')
+        self._screen_with_pictures((600, 300))
+        self.assertEqual(self.lib.locate('my_picture'), (850, 461))
+        self.assertEqual(self.lib.locate('my_picture'), (850, 461))
+        self.assertEqual((self.lib._hints.hits, self.lib._hints.misses),
+                         (1, 0))
+
+        self._screen_with_pictures((20, 30))
+        self.assertEqual(self.lib.locate('my_picture'), (270, 191))
+        self.assertEqual((self.lib._hints.hits, self.lib._hints.misses),
+                         (1, 1))
+
+    def test_location_hints_with_region(self):
+        from ImageHorizonLibrary import LocationHints
+
+        self.lib._hints = LocationHints()
+        self.lib.set_matching_backend('numpy')
+        self._screen_with_pictures((600, 300))
+        self.assertEqual(self.lib.locate('my_picture'), (850, 461))
+        self._screen_with_pictures((500, 200))
+        self.assertEqual(self.lib.locate('my_picture',
+                                         region=(100, 100, 1600, 1200)),
+                         (850, 461))
+        self.assertEqual(self.lib._hints.hits, 1)
+
+    def test_locate_with_result_cache(self):
+        from ImageHorizonLibrary import MatchResultCache
+
+        folder = mkdtemp()
+        self.addCleanup(rmtree, folder)
+        path = path_join(folder, 'results.db')
+        self.lib._result_cache = MatchResultCache(path)
+        self.lib.set_matching_backend('numpy')
+        self._screen_with_pictures((600, 300))
+        self.assertEqual(self.lib.locate('my_picture'), (850, 461))
+        self.assertEqual(self.lib.locate('my_picture'), (850, 461))
+        self.assertEqual((self.lib._result_cache.hits,
+                          self.lib._result_cache.misses), (1, 1))
+        self.lib._close()
+
+        self.lib._result_cache = MatchResultCache(path)
+        self.assertEqual(self.lib.locate('my_picture'), (850, 461))
+        self.assertEqual(self.lib._result_cache.hits, 1)
+        self._screen_with_pictures((20, 30))
+        self.assertEqual(self.lib.locate('my_picture'), (270, 191))
+        self.assertEqual(self.lib._result_cache.misses, 1)
+        statistics = self.lib.get_recognition_statistics()['result cache']
+        self.assertEqual(statistics['size'], 2)
+        self.lib._close()
+
+    def test_locate_with_scale_range(self):
+        if not self.lib.has_cv:
+            self.skipTest('OpenCV is not installed')
+        needle = decoded(path_join(TESTIMG_DIR, 'my_picture.png'))
+        screen = Image.new('RGB', (1200, 800), 'white')
+        screen.paste(needle.resize((needle.width * 2, needle.height * 2)),
+                     (30, 40))
+        self.mock.screenshot.return_value = screen
+        self.lib.set_scale_range(1, 2, 0.5)
+        self.lib.set_confidence(0.9)
+        self.lib.locate('my_picture')
+        self.mock.locate.assert_not_called()
+        self.mock.center.assert_called_once_with(
+            (30, 40, needle.width * 2, needle.height * 2))
+        self.assertEqual(self.lib.get_matched_scale('my picture'), 2.0)
+
+    def _wait_for_images(self, keyword, appearing, *names, **options):
+        from ImageHorizonLibrary import Match
+
+        folder = self._make_reference_folder('a.png', 'b.png', 'c.png')
+        self.lib.reference_folder = folder
+        self.lib.set_polling_strategy('fixed', interval=0)
+        self.mock.screenshot.reset_mock()
+        # Every capture differs, so images are matched on every attempt.
+        self.mock.screenshot.side_effect = lambda **region: Image.new(
+            'RGB', (50, 50), (self.mock.screenshot.call_count, 0, 0))
+        attempts = []
+
+        def locate_candidates(reference_images, haystack, offset):
+            attempts.append(basename(reference_images[0]))
+            name = basename(reference_images[0])
+            if appearing.get(name, float('inf')) <= \
+                    self.mock.screenshot.call_count:
+                return Match(10, 20, 2, 2, None)
+            return None
+
+        self.mock.center.side_effect = lambda box: MagicMock(x=box[0],
+                                                             y=box[1])
+        with patch.object(self.lib, '_locate_candidates',
+                          side_effect=locate_candidates):
+            result = getattr(self.lib, keyword)(*names, **options)
+        return result, attempts
+
+    def test_wait_for_any(self):
+        result, attempts = self._wait_for_images(
+            'wait_for_any', {'b.png': 2, 'c.png': 2}, 'a', 'c', 'b')
+        self.assertEqual(result, ('c', (10, 20)))
+        self.assertEqual(self.mock.screenshot.call_count, 2)
+        self.assertEqual(attempts, ['a.png', 'c.png', 'b.png'] * 2)
+
+    def test_wait_for_all(self):
+        result, attempts = self._wait_for_images(
+            'wait_for_all', {'a.png': 1, 'b.png': 3}, 'a', 'b',
+            region='0, 0, 5, 5')
+        self.assertEqual(result, [(10, 20), (10, 20)])
+        self.assertEqual(attempts, ['a.png', 'b.png', 'b.png', 'b.png'])
+        self.assertEqual(self.mock.screenshot.mock_calls,
+                         [call(region=(0, 0, 5, 5))] * 3)
+
+    def test_wait_for_any_and_all_negative_path(self):
+        from ImageHorizonLibrary import ImageNotFoundException
+
+        for keyword in ('wait_for_any', 'wait_for_all'):
+            run_on_failure = MagicMock()
+            with self.assertRaises(ImageNotFoundException), \
+                 patch.object(self.lib, '_run_on_failure', run_on_failure):
+                self._wait_for_images(keyword, {'a.png': 1}, 'b', 'c',
+                                      timeout=0.05)
+            run_on_failure.assert_called_once_with()
+
     def _verify_path_works(self, image_name, expected):
         self.lib.locate(image_name)
         expected_path = path_join(TESTIMG_DIR, expected)
-        self.mock.locateOnScreen.assert_called_once_with(expected_path)
+        self.mock.locate.assert_called_once_with(
+            decoded(expected_path), self.mock.screenshot.return_value)
         self.mock.reset_mock()
 
     def test_locate(self):
@@ -125,7 +768,7 @@ class TestRecognizeImages(TestCase):
                            'mY_PiCtURe'):
             self._verify_path_works(image_name, 'my_picture.png')
 
-        self.mock.locateOnScreen.return_value = None
+        self.mock.locate.return_value = None
         run_on_failure = MagicMock()
         with self.assertRaises(InvalidImageException), \
              patch.object(self.lib, '_run_on_failure', run_on_failure):
@@ -143,14 +786,16 @@ class TestRecognizeImages(TestCase):
         self.lib.reference_folder = path_join(CURDIR, 'symbolic_link')
         self.lib.locate('mY_PiCtURe')
         expected_path = path_join(CURDIR, 'symbolic_link', 'my_picture.png')
-        self.mock.locateOnScreen.assert_called_once_with(expected_path)
+        self.mock.locate.assert_called_once_with(
+            decoded(expected_path), self.mock.screenshot.return_value)
         self.mock.reset_mock()
 
         self.lib.reference_folder = path_join(CURDIR, 'rëförence_imägës')
         self.lib.locate('mŸ PäKSÖR')
         expected_path = path_join(CURDIR, 'rëförence_imägës',
                                   'mÿ_päksör.png')
-        self.mock.locateOnScreen.assert_called_once_with(expected_path)
+        self.mock.locate.assert_called_once_with(
+            decoded(expected_path), self.mock.screenshot.return_value)
         self.mock.reset_mock()
 
     def test_locate_with_invalid_reference_folder(self):
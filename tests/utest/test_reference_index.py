@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from os import makedirs
+from os.path import dirname, isdir, join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+
+class TestReferenceIndex(TestCase):
+    def setUp(self):
+        self.patcher = patch.dict('sys.modules', {'pyautogui': MagicMock()})
+        self.patcher.start()
+        from ImageHorizonLibrary.recognition._reference_index import \
+            ReferenceIndex
+        self.root = mkdtemp()
+        for path in ('button.png', path_join('dialogs', 'ok.png'),
+                     path_join('dialogs', 'cancel.png'),
+                     path_join('nested', 'deeper', 'image.png'),
+                     path_join('outside', 'other.png')):
+            self._touch(path)
+        self.index = ReferenceIndex(self.root)
+
+    def tearDown(self):
+        self.patcher.stop()
+        rmtree(self.root)
+
+    def _touch(self, path):
+        path = path_join(self.root, path)
+        if not isdir(dirname(path)):
+            makedirs(dirname(path))
+        open(path, 'w').close()
+        return path
+
+    def test_resolve_file(self):
+        path = path_join(self.root, 'button.png')
+        self.assertEqual(self.index.resolve('button'), (path, [path]))
+        self.assertEqual(self.index.resolve('button.png'), (path, [path]))
+        path = path_join(self.root, 'nested', 'deeper', 'image.png')
+        self.assertEqual(self.index.resolve('nested/deeper/image'),
+                         (path, [path]))
+        self.assertEqual(self.index.builds, 1)
+
+    def test_resolve_folder(self):
+        folder = path_join(self.root, 'dialogs')
+        self.assertEqual(self.index.resolve('dialogs'),
+                         (folder, [path_join(folder, 'cancel.png'),
+                                   path_join(folder, 'ok.png')]))
+
+    def test_folder_with_folders_is_invalid(self):
+        from ImageHorizonLibrary import InvalidImageException
+
+        with self.assertRaises(InvalidImageException):
+            self.index.resolve('nested')
+
+    def test_new_images_are_found(self):
+        from ImageHorizonLibrary import InvalidImageException
+
+        with self.assertRaises(InvalidImageException):
+            self.index.resolve('new')
+        self.assertEqual(self.index.builds, 2)
+        path = self._touch('new.png')
+        self.assertEqual(self.index.resolve('new'), (path, [path]))
+        self.assertEqual(self.index.builds, 3)
+        self.index.resolve('new')
+        self.assertEqual(self.index.builds, 3)
+
+    def test_mixed_case_names(self):
+        path = self._touch(path_join('Mixed', 'Case.png'))
+        self.assertEqual(self.index.resolve('mixed/case'), (path, [path]))
+        self.assertEqual(self.index.resolve('mixed'),
+                         (dirname(path), [path]))
+        self._touch('Button.png')
+        self.index.clear()
+        path = path_join(self.root, 'button.png')
+        self.assertEqual(self.index.resolve('button'), (path, [path]))
+        self.assertEqual(self.index.builds, 2)
+
+    def test_symbolic_link_loop(self):
+        import os
+
+        try:
+            os.symlink(self.root, path_join(self.root, 'nested', 'loop'))
+        except (AttributeError, NotImplementedError, OSError):
+            self.skipTest('Symbolic links are not supported')
+        path = path_join(self.root, 'button.png')
+        self.assertEqual(self.index.resolve('button'), (path, [path]))
+        self.assertEqual(self.index.statistics()['files'], 5)
+
+    def test_paths_outside_folder(self):
+        from ImageHorizonLibrary.recognition._reference_index import \
+            ReferenceIndex
+
+        index = ReferenceIndex(path_join(self.root, 'dialogs'))
+        path = path_join(self.root, 'outside', 'other.png')
+        self.assertEqual(index.resolve('../outside/other'), (path, [path]))
+        self.assertEqual(index.resolve('../outside'),
+                         (path_join(self.root, 'outside'), [path]))
+        self.assertEqual(index.builds, 0)
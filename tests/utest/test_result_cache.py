@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from os.path import join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase, skipUnless
+
+from mock import MagicMock, patch
+
+from helpers import make_pattern, np
+
+
+@skipUnless(np is not None, 'NumPy is not installed')
+class TestMatchResultCache(TestCase):
+    def setUp(self):
+        self.patcher = patch.dict('sys.modules', {'pyautogui': MagicMock()})
+        self.patcher.start()
+        from ImageHorizonLibrary.recognition import _result_cache
+        self.module = _result_cache
+        self.tmpdir = mkdtemp()
+        self.path = path_join(self.tmpdir, 'results.db')
+        self.cache = self.module.MatchResultCache(self.path, max_size=3)
+        self.needle = np.array(make_pattern(20, 10, seed=1))
+
+    def tearDown(self):
+        self.cache.close()
+        self.patcher.stop()
+        rmtree(self.tmpdir)
+
+    def test_numpy_is_required(self):
+        from ImageHorizonLibrary import ImageHorizonLibraryError
+
+        with patch.object(self.module, 'np', None), \
+                self.assertRaises(ImageHorizonLibraryError) as error:
+            self.module.MatchResultCache(self.path)
+        self.assertIn('numpy', str(error.exception))
+
+    def test_frame_hash_ignores_small_changes(self):
+        screen = np.array(make_pattern(300, 200))
+        changed = screen.copy()
+        changed[100, 150] ^= 1
+        self.assertEqual(self.module.frame_hash(screen),
+                         self.module.frame_hash(changed))
+        self.assertNotEqual(self.module.frame_hash(screen),
+                            self.module.frame_hash(np.array(make_pattern(300, 200, seed=2))))
+        self.assertNotEqual(self.module.frame_hash(screen),
+                            self.module.frame_hash(screen[:, :200]))
+
+    def test_template_hash_is_exact(self):
+        changed = self.needle.copy()
+        changed[0, 0] ^= 1
+        self.assertNotEqual(self.module.template_hash(self.needle),
+                            self.module.template_hash(changed))
+
+    def test_key(self):
+        screen = np.array(make_pattern(300, 200))
+        key = self.cache.key(screen, self.needle, None, (0, 0, 300, 200))
+        self.assertEqual(self.cache.key(screen.copy(), self.needle, None,
+                                        (0, 0, 300, 200)), key)
+        self.assertNotEqual(self.cache.key(screen, self.needle, 0.9,
+                                           (0, 0, 300, 200)), key)
+        self.assertNotEqual(self.cache.key(screen, self.needle, None,
+                                           (10, 0, 300, 200)), key)
+
+    def test_put_and_get(self):
+        Match = self.module.Match
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.put('a', Match(1, 2, 3, 4, 0.5))
+        self.assertEqual(self.cache.get('a'), Match(1, 2, 3, 4, 0.5))
+        self.cache.discard('a')
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_persists_across_instances(self):
+        self.cache.put('a', self.module.Match(1, 2, 3, 4, None))
+        self.cache.close()
+        cache = self.module.MatchResultCache(self.path)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.get('a')[:4], (1, 2, 3, 4))
+
+    def test_least_recently_used_are_evicted(self):
+        Match = self.module.Match
+        for key in 'abc':
+            self.cache.put(key, Match(0, 0, 1, 1, None))
+        self.cache.get('a')
+        self.cache.put('d', Match(0, 0, 1, 1, None))
+        self.assertEqual(len(self.cache), 3)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('a'))
+
+    def test_clear(self):
+        self.cache.put('a', self.module.Match(1, 2, 3, 4, None))
+        self.cache.hits = 1
+        self.cache.clear()
+        self.assertEqual(self.cache.statistics(),
+                         {'size': 0, 'max_size': 3, 'hits': 0, 'misses': 0})
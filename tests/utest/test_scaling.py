@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from os.path import join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase, skipUnless
+
+from mock import MagicMock, patch
+
+from helpers import make_pattern, make_scaled_screen
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+
+@skipUnless(cv2 is not None, 'OpenCV is not installed')
+class TestMultiScaleMatcher(TestCase):
+    def setUp(self):
+        self.pyautogui = MagicMock()
+        self.patcher = patch.dict('sys.modules',
+                                  {'pyautogui': self.pyautogui})
+        self.patcher.start()
+        from ImageHorizonLibrary import MultiScaleMatcher
+        self.MultiScaleMatcher = MultiScaleMatcher
+        self.needle = make_pattern(48, 48, block=8)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_scales_are_tried_closest_to_original_first(self):
+        matcher = self.MultiScaleMatcher(0.5, 1.5, 0.25)
+        self.assertEqual(matcher.scales, [1.0, 0.75, 1.25, 0.5, 1.5])
+
+    def test_locate_scaled_image(self):
+        matcher = self.MultiScaleMatcher(1.0, 2.0, 0.25)
+        screen = make_scaled_screen(self.needle, 1.5, (100, 50))
+        match = matcher.locate(self.needle, screen, 0.9, key='needle')
+        self.assertEqual(match[:4], (100, 50, 72, 72))
+        self.assertGreater(match.score, 0.9)
+        self.assertEqual(matcher.matched_scales, {'needle': 1.5})
+
+    def test_remembered_scale_is_tried_first(self):
+        matcher = self.MultiScaleMatcher(1.0, 2.0, 0.25)
+        screen = make_scaled_screen(self.needle, 1.25, (10, 10))
+        matcher.locate(self.needle, screen, 0.9, key='needle')
+        with patch.object(matcher, '_match', wraps=matcher._match) as match:
+            matcher.locate(self.needle, screen.copy(), 0.9, key='needle')
+            self.assertEqual(match.call_count, 1)
+            self.assertEqual(match.call_args[0][2], 1.25)
+
+    def test_locate_first_scale(self):
+        matcher = self.MultiScaleMatcher(1.0, 2.0, 0.25)
+        screen = make_scaled_screen(self.needle, 1.25, (10, 10))
+        match = matcher.locate_first(self.needle, screen, 0.9, key='needle')
+        self.assertEqual(match[:4], (10, 10, 60, 60))
+        self.assertEqual(matcher.matched_scales, {'needle': 1.25})
+        with patch.object(matcher, '_match', wraps=matcher._match) as match:
+            matcher.locate_first(self.needle, screen.copy(), 0.9,
+                                 key='needle')
+            self.assertEqual(match.call_count, 1)
+
+    def test_forgetting_scale(self):
+        matcher = self.MultiScaleMatcher(1.0, 2.0, 0.25, remember=False)
+        screen = make_scaled_screen(self.needle, 1.25, (10, 10))
+        matcher.locate(self.needle, screen, 0.9, key='needle')
+        with patch.object(matcher, '_match', wraps=matcher._match) as match:
+            matcher.locate(self.needle, screen.copy(), 0.9, key='needle')
+            self.assertEqual(match.call_count, 5)
+
+    def test_library_with_confidence_import_argument(self):
+        from ImageHorizonLibrary import ImageHorizonLibrary
+
+        folder = mkdtemp()
+        self.addCleanup(rmtree, folder)
+        self.needle.save(path_join(folder, 'needle.png'))
+        self.pyautogui.screenshot.return_value = make_scaled_screen(
+            self.needle, 1.5, (100, 50))
+        self.pyautogui.center.side_effect = lambda box: MagicMock(
+            x=box[0] + box[2] // 2, y=box[1] + box[3] // 2)
+        lib = ImageHorizonLibrary(reference_folder=folder, confidence='0.9',
+                                  matching_backend='opencv',
+                                  scale_range='1.0, 2.0')
+        self.assertEqual(lib.locate('needle'), (136, 86))
+
+    def test_image_not_found(self):
+        matcher = self.MultiScaleMatcher(0.5, 1.5, 0.5)
+        screen = make_scaled_screen(make_pattern(48, 48, seed=1, block=8), 1.0, (10, 10))
+        self.assertIsNone(matcher.locate(self.needle, screen, 0.9,
+                                         key='needle'))
+        self.assertEqual(matcher.matched_scales, {})
+
+    def test_invalid_scale_range(self):
+        from ImageHorizonLibrary import InvalidScaleException
+
+        for args in ((0, 1), (2, 1), ('a', 1), (1, 2, 0)):
+            with self.assertRaises(InvalidScaleException):
+                self.MultiScaleMatcher(*args)
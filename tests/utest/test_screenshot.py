@@ -7,6 +7,7 @@ from tempfile import mkdtemp
 from unittest import TestCase
 
 from mock import patch, MagicMock
+from PIL import Image
 from robot.libraries.BuiltIn import BuiltIn
 
 CURDIR = abspath(dirname(__file__))
@@ -56,3 +57,35 @@ class TestScreenshot(TestCase):
             self.lib.screenshot_folder = invalid_folder
             with self.assertRaises(ScreenshotFolderException):
                 self.lib.take_a_screenshot()
+
+    def test_take_a_screenshot_in_background(self):
+        from ImageHorizonLibrary import ImageHorizonLibrary
+
+        folder = mkdtemp()
+        self.addCleanup(rmtree, folder)
+        lib = ImageHorizonLibrary(screenshot_folder=folder,
+                                  screenshot_format='jpg',
+                                  screenshot_scale=0.5,
+                                  async_screenshots=True,
+                                  capture_backend='image')
+        lib._capture_backend.set_image(Image.new('RGB', (100, 60)))
+        lib.take_a_screenshot()
+        lib.take_a_screenshot()
+        self.mock.screenshot.assert_not_called()
+        lib.ROBOT_LIBRARY_LISTENER.end_suite('Suite', {})
+        self.assertEqual(sorted(listdir(folder)),
+                         ['ImageHorizon-screenshot-1.jpg',
+                          'ImageHorizon-screenshot-2.jpg'])
+        with Image.open(path_join(folder,
+                                  'ImageHorizon-screenshot-1.jpg')) as image:
+            self.assertEqual(image.size, (50, 30))
+
+    def test_invalid_screenshot_options(self):
+        from ImageHorizonLibrary import (ImageHorizonLibrary,
+                                         ScreenshotException)
+
+        for options in ({'screenshot_format': 'gif'},
+                        {'failure_screenshot': 'nonexistent'},
+                        {'screenshot_scale': 0}, {'screenshot_scale': 2}):
+            with self.assertRaises(ScreenshotException):
+                ImageHorizonLibrary(**options)
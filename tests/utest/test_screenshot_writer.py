@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from os.path import join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from mock import MagicMock, patch
+from PIL import Image
+
+import numpy as np
+
+
+class TestScreenshotWriter(TestCase):
+    def setUp(self):
+        self.mock = MagicMock()
+        self.patcher = patch.dict('sys.modules', {'pyautogui': self.mock})
+        self.patcher.start()
+        from ImageHorizonLibrary.recognition import _screenshot_writer
+        self.module = _screenshot_writer
+        self.tmpdir = mkdtemp()
+
+    def tearDown(self):
+        self.patcher.stop()
+        rmtree(self.tmpdir)
+
+    def test_save_image_formats(self):
+        image = Image.new('RGBA', (40, 20), 'red')
+        for extension, image_format in (('png', 'PNG'), ('jpg', 'JPEG'),
+                                         ('webp', 'WEBP')):
+            path = path_join(self.tmpdir, 'screen.%s' % extension)
+            self.module.save_image(image, path)
+            with Image.open(path) as saved:
+                self.assertEqual(saved.format, image_format)
+                self.assertEqual(saved.size, (40, 20))
+
+    def test_save_image_scaled_from_array(self):
+        path = path_join(self.tmpdir, 'screen.png')
+        self.module.save_image(np.zeros((20, 40, 3), dtype=np.uint8), path,
+                               scale=0.5)
+        with Image.open(path) as saved:
+            self.assertEqual(saved.size, (20, 10))
+
+    def test_writer_writes_in_background(self):
+        writer = self.module.ScreenshotWriter(queue_size=2)
+        paths = [path_join(self.tmpdir, 'screen-%d.jpg' % index)
+                 for index in range(5)]
+        for path in paths:
+            writer.submit(Image.new('RGB', (10, 10)), path)
+        self.assertEqual(writer.flush(), [])
+        for path in paths:
+            with Image.open(path) as saved:
+                self.assertEqual(saved.format, 'JPEG')
+
+    def test_writer_reports_errors_on_flush(self):
+        writer = self.module.ScreenshotWriter()
+        path = path_join(self.tmpdir, 'nonexistent', 'screen.png')
+        writer.submit(Image.new('RGB', (10, 10)), path)
+        errors = writer.flush()
+        self.assertEqual(len(errors), 1)
+        self.assertIn(path, errors[0])
+        self.assertEqual(writer.flush(), [])
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+import os
+import stat
+import sys
+import time
+
+from os.path import basename, exists, join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Thread
+from unittest import TestCase, skipIf, skipUnless
+
+from mock import MagicMock, patch
+
+from helpers import make_pattern, np
+
+
+@skipUnless(np is not None, 'NumPy is not installed')
+class TestRecognitionServer(TestCase):
+    def setUp(self):
+        self.patcher = patch.dict('sys.modules', {'pyautogui': MagicMock()})
+        self.patcher.start()
+        from ImageHorizonLibrary.recognition import _server
+        self.module = _server
+        self.tmpdir = mkdtemp()
+        self.screen = path_join(self.tmpdir, 'screen.png')
+        self.needle = path_join(self.tmpdir, 'needle.png')
+        haystack = make_pattern(200, 100)
+        haystack.save(self.screen)
+        haystack.crop((120, 30, 160, 50)).save(self.needle)
+        self.missing = path_join(self.tmpdir, 'missing.png')
+        make_pattern(40, 20, seed=1).save(self.missing)
+        self.address = self._address('server.sock')
+        self.server = self.module.RecognitionServer(self.address)
+        self.thread = Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.client = self.module.RecognitionClient(self.address,
+                                                    autostart=False)
+        self._wait_for_server()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.thread.join(5)
+        self.patcher.stop()
+        rmtree(self.tmpdir)
+
+    def _address(self, *parts):
+        # Windows has no Unix sockets, the server listens on a named pipe.
+        if sys.platform == 'win32':
+            return r'\\.\pipe\imagehorizon-test-%s-%s' % (
+                basename(self.tmpdir), '-'.join(parts))
+        return path_join(self.tmpdir, *parts)
+
+    def _wait_for_server(self):
+        for _ in range(50):
+            try:
+                return self.client.request('ping')
+            except self.module.ServerException:
+                time.sleep(0.05)
+        self.fail('Server did not start.')
+
+    def _locate(self, references, region=None):
+        return self.client.locate(references, region, backend='numpy',
+                                  capture='image:%s' % self.screen)
+
+    def test_ping(self):
+        self.assertEqual(self.client.request('ping'), os.getpid())
+
+    def test_locate(self):
+        references = [('needle', [self.needle]), ('missing', [self.missing])]
+        self.assertEqual(self._locate(references),
+                         {'needle': (120, 30, 40, 20)})
+        self.assertEqual(self._locate(references, (100, 20, 80, 40)),
+                         {'needle': (120, 30, 40, 20)})
+        statistics = self.client.request('statistics')
+        self.assertEqual(statistics['requests'], 2)
+        self.assertEqual(statistics['image cache']['misses'], 2)
+
+    def test_errors_are_reported(self):
+        with self.assertRaises(self.module.ServerException):
+            self._locate([('missing', [path_join(self.tmpdir, 'no.png')])])
+        with self.assertRaises(self.module.ServerException):
+            self.client.request('serve_forever')
+        self.assertIsNotNone(self.client.request('ping'))
+
+    def test_not_running_without_autostart(self):
+        client = self.module.RecognitionClient(
+            self._address('other.sock'), autostart=False)
+        with self.assertRaises(self.module.ServerException):
+            client.request('ping')
+
+    def test_reconnects_after_connection_is_lost(self):
+        self.client._connection.close()
+        self.assertIsNotNone(self.client.request('ping'))
+
+    def test_shutdown(self):
+        self.client.request('shutdown')
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+
+    @skipIf(sys.platform == 'win32', 'File modes are POSIX only')
+    def test_key_is_private(self):
+        key = self.module.key_path(self.address)
+        self.assertEqual(stat.S_IMODE(os.stat(key).st_mode), 0o600)
+        self.assertEqual(len(open(key, 'rb').read()), 32)
+
+    def test_wrong_key_is_rejected(self):
+        with self.assertRaises(self.module.connection.AuthenticationError):
+            self.module.connection.Client(self.address,
+                                          authkey=b'ImageHorizonLibrary')
+        self.assertIsNotNone(self.client.request('ping'))
+
+    @skipIf(sys.platform == 'win32', 'Socket owners are POSIX only')
+    def test_socket_of_other_user_is_refused(self):
+        client = self.module.RecognitionClient(self.address,
+                                               autostart=False)
+        with patch.object(self.module.os, 'getuid',
+                          return_value=os.getuid() + 1):
+            with self.assertRaises(self.module.ServerException):
+                client.request('ping')
+
+    @skipIf(sys.platform == 'win32', 'Windows uses a named pipe')
+    def test_default_address_is_in_private_directory(self):
+        with patch.dict('os.environ', {'XDG_RUNTIME_DIR': self.tmpdir}):
+            self.assertEqual(self.module.default_address(),
+                             path_join(self.tmpdir, 'imagehorizon',
+                                       'server.sock'))
+
+    def test_idle_server_exits(self):
+        server = self.module.RecognitionServer(
+            self._address('idle', 'server.sock'), idle_timeout=0.1)
+        thread = Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(exists(self.module.key_path(server.address)))
+
+    def test_started_server_inherits_import_path(self):
+        client = self.module.RecognitionClient(self._address('other.sock'))
+        with patch.object(self.module.subprocess, 'Popen') as popen, \
+                patch.object(sys, 'path', sys.path + [self.tmpdir]):
+            client._start_server()
+            paths = popen.call_args[1]['env']['PYTHONPATH']
+            self.assertIn(self.tmpdir, paths.split(os.pathsep))
+
+    def test_library_locates_on_server(self):
+        from ImageHorizonLibrary import ImageHorizonLibrary
+
+        library = ImageHorizonLibrary(reference_folder=self.tmpdir,
+                                      matching_backend='numpy',
+                                      capture_backend='image:%s' %
+                                      self.screen,
+                                      recognition_server=self.address)
+        references = [library._reference_images('needle')]
+        self.assertEqual(library._locate_on_one_capture(references, None),
+                         {self.needle: (120, 30, 40, 20)})
+        counters = library.get_recognition_statistics()['counters']
+        self.assertEqual((counters['searches'], counters['found']), (1, 1))
+        library._close()
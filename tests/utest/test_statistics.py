@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import json
+
+from os.path import join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+
+class TestRecognitionStatistics(TestCase):
+    def setUp(self):
+        self.mock = MagicMock()
+        self.patcher = patch.dict('sys.modules', {'pyautogui': self.mock})
+        self.patcher.start()
+        import ImageHorizonLibrary
+        self.module = ImageHorizonLibrary
+        self.statistics = ImageHorizonLibrary.RecognitionStatistics()
+        self.tmpdir = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.tmpdir)
+        self.patcher.stop()
+
+    def test_record_and_increment(self):
+        self.statistics.record('match', 0.5)
+        self.statistics.record('match', 1.5)
+        self.statistics.record('capture', 0.25)
+        self.statistics.increment('searches')
+        self.statistics.increment('polls', 3)
+        self.assertEqual(self.statistics.as_dict(), {
+            'phases': {
+                'match': {'count': 2, 'total': 2.0, 'average': 1.0,
+                          'max': 1.5},
+                'capture': {'count': 1, 'total': 0.25, 'average': 0.25,
+                            'max': 0.25}},
+            'counters': {'searches': 1, 'polls': 3}})
+        self.statistics.clear()
+        self.assertEqual(self.statistics.as_dict(),
+                         {'phases': {}, 'counters': {}})
+
+    def test_measure(self):
+        with patch('ImageHorizonLibrary.recognition._statistics.perf_counter',
+                   side_effect=[10.0, 10.25, 20.0, 21.0]):
+            with self.statistics.measure('click'):
+                pass
+            with self.assertRaises(ValueError), \
+                    self.statistics.measure('click'):
+                raise ValueError()
+        self.assertEqual(self.statistics.as_dict()['phases']['click'],
+                         {'count': 2, 'total': 1.25, 'average': 0.625,
+                          'max': 1.0})
+
+    def test_format_statistics(self):
+        self.statistics.record('match', 0.5)
+        self.statistics.increment('found')
+        statistics = self.statistics.as_dict()
+        statistics['image cache'] = {'hits': 2}
+        self.assertEqual(
+            self.module.format_statistics(statistics).splitlines(),
+            ['Phase                   Count  Total (s)   Avg (ms)   Max (ms)',
+             'match                       1      0.500      500.0      500.0',
+             'found                                  1',
+             'image cache hits                       2'])
+
+    def test_write_statistics_keeps_other_suites(self):
+        path = path_join(self.tmpdir, 'statistics.json')
+        self.module.write_statistics(path, 'Suite 1', {'counters': {'a': 1}})
+        self.module.write_statistics(path, 'Suite 2', {'counters': {'a': 2}})
+        self.module.write_statistics(path, 'Suite 1', {'counters': {'a': 3}})
+        with open(path) as statistics_file:
+            self.assertEqual(json.load(statistics_file),
+                             {'Suite 1': {'counters': {'a': 3}},
+                              'Suite 2': {'counters': {'a': 2}}})
+
+    def test_statistics_are_collected(self):
+        lib = self.module.ImageHorizonLibrary()
+        lib.click()
+        lib.take_a_screenshot()
+        statistics = lib.get_recognition_statistics()
+        self.assertEqual(list(statistics['phases']), ['click', 'screenshot'])
+        self.assertEqual(statistics['image cache']['hits'], 0)
+        self.assertNotIn('location hints', statistics)
+
+    def test_summary_is_written_at_end_of_suite(self):
+        path = path_join(self.tmpdir, 'statistics.json')
+        lib = self.module.ImageHorizonLibrary(statistics_summary=path)
+        lib.click()
+        lib.ROBOT_LIBRARY_LISTENER.end_suite('Suite',
+                                             {'longname': 'Top.Suite'})
+        with open(path) as statistics_file:
+            statistics = json.load(statistics_file)
+        self.assertEqual(statistics['Top.Suite']['phases']['click']['count'],
+                         1)
+
+    def test_summary_is_logged(self):
+        lib = self.module.ImageHorizonLibrary(statistics_summary='LOG')
+        with patch('ImageHorizonLibrary.LOGGER') as logger:
+            lib.ROBOT_LIBRARY_LISTENER.end_suite('Suite', {})
+        self.assertIn('Image recognition statistics',
+                      logger.info.call_args[0][0])
+
+    def test_no_summary_by_default(self):
+        lib = self.module.ImageHorizonLibrary()
+        self.assertFalse(hasattr(lib, 'ROBOT_LIBRARY_LISTENER'))
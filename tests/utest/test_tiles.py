@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+import numpy as np
+
+
+class TestTileDiff(TestCase):
+    def setUp(self):
+        self.patcher = patch.dict('sys.modules', {'pyautogui': MagicMock()})
+        self.patcher.start()
+        from ImageHorizonLibrary.recognition._tiles import TileDiff
+        self.tiles = TileDiff(tile_size=10)
+        self.frame = np.zeros((45, 100, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_first_frame_is_all_changed(self):
+        self.assertIsNone(self.tiles.update(self.frame))
+        self.assertTrue(self.tiles.is_changed())
+        self.assertEqual(self.tiles.regions((5, 5)), [(0, 0, 100, 45)])
+
+    def test_unchanged_frame(self):
+        self.tiles.update(self.frame)
+        self.assertEqual(self.tiles.update(self.frame.copy()).shape, (5, 10))
+        self.assertFalse(self.tiles.is_changed())
+        self.assertEqual(self.tiles.regions((5, 5)), [])
+
+    def test_changed_tiles(self):
+        self.tiles.update(self.frame)
+        frame = self.frame.copy()
+        frame[42, 55] = 1
+        frame[3, 3] = 1
+        frame[3, 12] = 1
+        self.tiles.update(frame)
+        self.assertTrue(self.tiles.is_changed())
+        self.assertTrue(self.tiles.is_changed((50, 40, 10, 5)))
+        self.assertFalse(self.tiles.is_changed((30, 10, 20, 20)))
+        self.assertEqual(self.tiles.regions(), [(0, 0, 20, 10),
+                                                (50, 40, 60, 45)])
+        self.assertEqual(self.tiles.regions((4, 3)), [(0, 0, 23, 12),
+                                                      (47, 38, 63, 45)])
+
+    def test_overlapping_regions_are_merged(self):
+        self.tiles.update(self.frame)
+        frame = self.frame.copy()
+        frame[5, 5] = frame[5, 45] = 1
+        self.tiles.update(frame)
+        self.assertEqual(len(self.tiles.regions((2, 2))), 2)
+        self.assertEqual(self.tiles.regions((20, 2)), [(0, 0, 69, 11)])
+
+    def test_size_change_compares_nothing(self):
+        self.tiles.update(self.frame)
+        self.assertIsNone(self.tiles.update(self.frame[:, :50]))
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import sys
+
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+
+class TestUtils(TestCase):
+    def setUp(self):
+        self.patcher = patch.dict('sys.modules', {'pyautogui': MagicMock()})
+        self.patcher.start()
+        from ImageHorizonLibrary import utils
+        self.utils = utils
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_lazy_module_imports_on_first_use(self):
+        sys.modules.pop('colorsys', None)
+        colorsys = self.utils.LazyModule('colorsys')
+        self.assertNotIn('colorsys', sys.modules)
+        self.assertEqual(colorsys.rgb_to_hsv(1, 0, 0), (0, 1, 1))
+        self.assertIn('colorsys', sys.modules)
+
+    def test_lazy_module_import_error(self):
+        from ImageHorizonLibrary import ImageHorizonLibraryError
+
+        module = self.utils.LazyModule('not_installed_module', 'Install it.')
+        with self.assertRaises(ImageHorizonLibraryError):
+            module.anything
+        with self.assertRaises(ImportError):
+            self.utils.LazyModule('not_installed_module').anything
+
+    def test_lazy_import(self):
+        self.assertIsNone(self.utils.lazy_import('not_installed_module'))
+        self.assertIsNone(self.utils.lazy_import('not_installed.module'))
+        self.assertIsNotNone(self.utils.lazy_import('json'))
+
+    def test_platform_probes_are_cached(self):
+        with patch.object(self.utils, 'call', return_value=0) as call, \
+                patch.object(self.utils, 'is_mac', return_value=True):
+            self.utils.has_retina.cache_clear()
+            self.addCleanup(self.utils.has_retina.cache_clear)
+            self.assertTrue(self.utils.has_retina())
+            self.assertTrue(self.utils.has_retina())
+            self.assertEqual(call.call_count, 1)
+
+    def test_library_probes_on_first_use(self):
+        from ImageHorizonLibrary import ImageHorizonLibrary
+
+        with patch.object(self.utils, 'has_retina',
+                          return_value=True) as has_retina:
+            lib = ImageHorizonLibrary()
+            has_retina.assert_not_called()
+            self.assertTrue(lib.has_retina)
+            self.assertTrue(lib.has_retina)
+            has_retina.assert_called_once_with()